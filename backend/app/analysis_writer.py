@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Rows are flushed when this many are buffered or FLUSH_INTERVAL seconds
+# after the first buffered row, whichever comes first.
+ANALYSIS_FLUSH_ROWS = int(os.getenv("ANALYSIS_FLUSH_ROWS", "500"))
+ANALYSIS_FLUSH_INTERVAL = float(os.getenv("ANALYSIS_FLUSH_INTERVAL", "1.0"))
+# Beyond this many pending rows new ones are dropped rather than slowing requests
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "50000"))
+
+# Queued by stop(); everything ahead of it is flushed before the worker exits
+_STOP = object()
+
+
+def bulk_insert_analyses(rows: List[dict]):
+    """Insert UserAnalysis rows in one executemany statement.
+
+    The daily rollups and per-user score summaries are updated in the same
+    transaction, so they never disagree with the rows they summarise.
+    """
+    from sqlalchemy import insert
+
+    from .analytics import add_to_rollups, add_to_summaries, rollup_counts, summary_updates
+    from .models import SessionLocal, UserAnalysis
+
+    with SessionLocal() as db:
+        # Ids in row order: summaries break created_at ties by id
+        ids = db.execute(insert(UserAnalysis).returning(UserAnalysis.id, sort_by_parameter_order=True), rows).scalars()
+        add_to_rollups(db, rollup_counts(rows))
+        add_to_summaries(db, summary_updates(rows, ids.all()))
+        db.commit()
+
+
+class AnalysisWriter:
+    """Write-behind queue that appends predictions to UserAnalysis in bulk.
+
+    ``record()`` never blocks or touches the database; a worker task drains
+    the queue and flushes batches with one bulk insert on a worker thread.
+    """
+
+    def __init__(self, flush_rows: int = ANALYSIS_FLUSH_ROWS,
+                 flush_interval: float = ANALYSIS_FLUSH_INTERVAL,
+                 max_queue: int = ANALYSIS_QUEUE_SIZE,
+                 insert=bulk_insert_analyses):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._insert = insert
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closing = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker after flushing everything still queued"""
+        if self._worker is None:
+            return
+        self._closing = True
+        await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+
+    def record(self, row: dict):
+        """Queue one UserAnalysis row; dropped if the writer is saturated"""
+        if self._queue is None or self._closing:
+            self.dropped += 1
+            return
+        row.setdefault('created_at', datetime.utcnow())
+        try:
+            self._queue.put_nowait(row)
+            self.enqueued += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def record_many(self, rows: List[dict]):
+        for row in rows:
+            self.record(row)
+
+    async def _collect(self) -> Tuple[List[dict], bool]:
+        """Next batch to flush, and whether stop() was requested"""
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.perf_counter() + self.flush_interval
+        while len(batch) < self.flush_rows:
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+            else:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch: List[dict]):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._insert, batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Error writing {len(batch)} analyses: {e}")
+        self.flushes += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    def stats(self) -> dict:
+        return {
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'pending': self._queue.qsize() if self._queue is not None else 0,
+            'flushes': self.flushes,
+            'mean_rows_per_flush': round(self.written / self.flushes, 1) if self.flushes else 0.0,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+        }
@@ -0,0 +1,390 @@
+"""Analytics queries over the UserAnalysis history.
+
+Listings use keyset pagination on the (…, created_at) composite indexes, so a
+page costs the same however deep it is. Distributions are read from
+DailyScoreRollup, which counts analyses per (day, company type, score) and is
+updated in the same transaction as every bulk insert; dashboard reads are
+O(days), not O(rows), and percentiles are exact because scores are integers.
+Improvements are read the same way from UserScoreSummary, each user's first
+and latest scored analysis.
+"""
+import base64
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_PAGE_SIZE = 500
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+SCORE_RANGE = (0, 100)
+UNKNOWN_COMPANY_TYPE = ''
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise InvalidCursor(f"invalid cursor '{cursor}'")
+
+
+def _analysis_dict(row) -> dict:
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'cgpa': row.cgpa,
+        'leetcode_problems': row.leetcode_problems,
+        'codeforces_rating': row.codeforces_rating,
+        'github_repos': row.github_repos,
+        'project_count': row.project_count,
+        'skills_count': row.skills_count,
+        'work_experience': row.work_experience,
+        'overall_score': row.overall_score,
+        'predicted_company_type': row.predicted_company_type,
+        'created_at': row.created_at.isoformat(),
+    }
+
+
+def list_analyses(user_id: Optional[str] = None, company_type: Optional[str] = None,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  cursor: Optional[str] = None, limit: int = 50) -> dict:
+    """One page of analyses, newest first; pass ``next_cursor`` back for the next"""
+    from sqlalchemy import and_, or_
+
+    from .models import SessionLocal, UserAnalysis
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query_filters = []
+    if user_id is not None:
+        query_filters.append(UserAnalysis.user_id == user_id)
+    if company_type is not None:
+        query_filters.append(UserAnalysis.predicted_company_type == company_type)
+    if since is not None:
+        query_filters.append(UserAnalysis.created_at >= since)
+    if until is not None:
+        query_filters.append(UserAnalysis.created_at < until)
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        query_filters.append(or_(
+            UserAnalysis.created_at < created_at,
+            and_(UserAnalysis.created_at == created_at, UserAnalysis.id < row_id),
+        ))
+
+    with SessionLocal() as db:
+        rows = (
+            db.query(UserAnalysis)
+            .filter(*query_filters)
+            .order_by(UserAnalysis.created_at.desc(), UserAnalysis.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    return {'items': [_analysis_dict(row) for row in page], 'next_cursor': next_cursor}
+
+
+def score_improvements(min_delta: int = 1, cursor: Optional[str] = None, limit: int = 50) -> dict:
+    """Users whose latest score beats their first by at least ``min_delta``.
+
+    Pages are keyed by user_id and read from UserScoreSummary, so a page
+    costs the same however many analyses there are.
+    """
+    from .models import SessionLocal, UserScoreSummary
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    summary = UserScoreSummary
+    query_filters = [summary.analyses > 1, summary.latest_score - summary.first_score >= min_delta]
+    if cursor is not None:
+        query_filters.append(summary.user_id > cursor)
+    with SessionLocal() as db:
+        rows = db.query(summary).filter(*query_filters).order_by(summary.user_id).limit(limit + 1).all()
+
+    page = rows[:limit]
+    items = [
+        {
+            'user_id': row.user_id,
+            'analyses': row.analyses,
+            'first_score': row.first_score,
+            'latest_score': row.latest_score,
+            'improvement': row.latest_score - row.first_score,
+            'first_at': row.first_at.isoformat(),
+            'latest_at': row.latest_at.isoformat(),
+        }
+        for row in page
+    ]
+    next_cursor = page[-1].user_id if len(rows) > limit else None
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+# Per-user summaries
+
+def summary_updates(rows: Iterable[dict], ids: Iterable[int]) -> Dict[str, dict]:
+    """First and latest scored analysis per user in a batch of UserAnalysis
+    rows (with their inserted ids), as UserScoreSummary values"""
+    summaries: Dict[str, dict] = {}
+    for row, row_id in zip(rows, ids):
+        user_id, score = row.get('user_id'), row.get('overall_score')
+        if user_id is None or score is None:
+            continue
+        key = (row['created_at'], row_id)
+        summary = summaries.get(user_id)
+        if summary is None:
+            summaries[user_id] = {
+                'user_id': user_id, 'analyses': 1,
+                'first_id': row_id, 'first_at': row['created_at'], 'first_score': int(score),
+                'latest_id': row_id, 'latest_at': row['created_at'], 'latest_score': int(score),
+            }
+            continue
+        summary['analyses'] += 1
+        if key < (summary['first_at'], summary['first_id']):
+            summary.update(first_id=row_id, first_at=row['created_at'], first_score=int(score))
+        if key > (summary['latest_at'], summary['latest_id']):
+            summary.update(latest_id=row_id, latest_at=row['created_at'], latest_score=int(score))
+    return summaries
+
+
+def add_to_summaries(db, summaries: Dict[str, dict]):
+    """Merge batch summaries into UserScoreSummary with one upsert; commit is
+    the caller's"""
+    from sqlalchemy import and_, case, or_
+
+    from .models import UserScoreSummary
+
+    if not summaries:
+        return
+    values = list(summaries.values())
+    dialect = db.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        # Core table, not the ORM entity: skips ORM bulk-insert bookkeeping
+        table = UserScoreSummary.__table__.c
+        statement = insert(UserScoreSummary.__table__)
+        new = statement.excluded
+        # (created_at, id) of the incoming row against the stored one
+        earlier = or_(new.first_at < table.first_at, and_(new.first_at == table.first_at, new.first_id < table.first_id))
+        later = or_(new.latest_at > table.latest_at,
+                    and_(new.latest_at == table.latest_at, new.latest_id > table.latest_id))
+        set_ = {'analyses': table.analyses + new.analyses}
+        for end, wins in (('first', earlier), ('latest', later)):
+            for field in ('id', 'at', 'score'):
+                name = f'{end}_{field}'
+                set_[name] = case((wins, new[name]), else_=table[name])
+        db.execute(statement.on_conflict_do_update(index_elements=['user_id'], set_=set_), values)
+        return
+
+    # Other databases: read-modify-write, row by row
+    for value in values:
+        row = db.get(UserScoreSummary, value['user_id'])
+        if row is None:
+            db.add(UserScoreSummary(**value))
+            continue
+        row.analyses += value['analyses']
+        if (value['first_at'], value['first_id']) < (row.first_at, row.first_id):
+            row.first_id, row.first_at, row.first_score = value['first_id'], value['first_at'], value['first_score']
+        if (value['latest_at'], value['latest_id']) > (row.latest_at, row.latest_id):
+            row.latest_id, row.latest_at, row.latest_score = value['latest_id'], value['latest_at'], value['latest_score']
+    db.flush()
+
+
+def rebuild_score_summaries(chunk_rows: int = 10_000) -> int:
+    """Recompute UserScoreSummary from the full UserAnalysis table"""
+    from sqlalchemy import select
+
+    from .models import SessionLocal, UserAnalysis, UserScoreSummary
+
+    with SessionLocal() as db:
+        db.query(UserScoreSummary).delete()
+        rows = db.execute(
+            select(UserAnalysis.id, UserAnalysis.user_id, UserAnalysis.created_at, UserAnalysis.overall_score)
+            .where(UserAnalysis.created_at.isnot(None))
+            .execution_options(yield_per=chunk_rows)
+        )
+        # Chunks are merged by the same upsert as live inserts
+        for chunk in rows.partitions():
+            add_to_summaries(db, summary_updates(
+                ({'user_id': user_id, 'created_at': created_at, 'overall_score': score}
+                 for _, user_id, created_at, score in chunk),
+                (row_id for row_id, _, _, _ in chunk),
+            ))
+        db.commit()
+        return db.query(UserScoreSummary).count()
+
+
+def backfill_score_summaries():
+    """Build the per-user summaries once for history that predates them"""
+    from .models import SessionLocal, UserAnalysis, UserScoreSummary
+
+    with SessionLocal() as db:
+        needed = db.query(UserScoreSummary.user_id).first() is None and db.query(UserAnalysis.id).first() is not None
+    if needed:
+        print(f"Backfilled score summaries for {rebuild_score_summaries()} users")
+
+
+# Daily rollups
+
+def rollup_counts(rows: Iterable[dict]) -> Counter:
+    """Analyses per (day, company type, score) in a batch of UserAnalysis rows"""
+    return Counter(
+        (row['created_at'].date(), row.get('predicted_company_type') or UNKNOWN_COMPANY_TYPE, int(row['overall_score']))
+        for row in rows
+    )
+
+
+def add_to_rollups(db, counts: Counter):
+    """Add counts into DailyScoreRollup with one upsert; commit is the caller's"""
+    from .models import DailyScoreRollup
+
+    if not counts:
+        return
+    values = [
+        {'day': day, 'predicted_company_type': company_type, 'overall_score': score, 'count': n}
+        for (day, company_type, score), n in counts.items()
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        # executemany of one cached statement, rather than a multi-VALUES
+        # statement compiled afresh for every batch
+        statement = insert(DailyScoreRollup)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=['day', 'predicted_company_type', 'overall_score'],
+            set_={'count': DailyScoreRollup.count + statement.excluded['count']},
+        ), values)
+        return
+
+    # Other databases: read-modify-write, row by row
+    for value in values:
+        row = db.get(DailyScoreRollup, (value['day'], value['predicted_company_type'], value['overall_score']))
+        if row is None:
+            db.add(DailyScoreRollup(**value))
+        else:
+            row.count += value['count']
+
+
+def rebuild_rollups():
+    """Recompute DailyScoreRollup from the full UserAnalysis table"""
+    from sqlalchemy import func
+
+    from .models import DailyScoreRollup, SessionLocal, UserAnalysis
+
+    day = func.date(UserAnalysis.created_at)
+    company_type = func.coalesce(UserAnalysis.predicted_company_type, UNKNOWN_COMPANY_TYPE)
+    with SessionLocal() as db:
+        grouped = (
+            db.query(day, company_type, UserAnalysis.overall_score, func.count())
+            .filter(UserAnalysis.overall_score.isnot(None), UserAnalysis.created_at.isnot(None))
+            .group_by(day, company_type, UserAnalysis.overall_score)
+            .all()
+        )
+        counts = Counter()
+        for row_day, row_company_type, score, n in grouped:
+            if isinstance(row_day, str):
+                row_day = date.fromisoformat(row_day)
+            counts[row_day, row_company_type, score] += n
+        db.query(DailyScoreRollup).delete()
+        add_to_rollups(db, counts)
+        db.commit()
+    return len(counts)
+
+
+def backfill_rollups():
+    """Build the rollups once for history that predates them"""
+    from .models import DailyScoreRollup, SessionLocal, UserAnalysis
+
+    with SessionLocal() as db:
+        needed = db.query(DailyScoreRollup).first() is None and db.query(UserAnalysis.id).first() is not None
+    if needed:
+        print(f"Backfilled {rebuild_rollups()} daily score rollups")
+
+
+def _period_start(day: date, period: str) -> Optional[date]:
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return None
+
+
+def _percentiles(score_counts: Dict[int, int], total: int) -> Dict[str, int]:
+    """Nearest-rank percentiles from exact per-score counts"""
+    result = {}
+    scores = sorted(score_counts)
+    for p in PERCENTILES:
+        rank = max(1, -(-p * total // 100))
+        seen = 0
+        for score in scores:
+            seen += score_counts[score]
+            if seen >= rank:
+                result[f"p{p}"] = score
+                break
+    return result
+
+
+def _histogram(score_counts: Dict[int, int], bin_width: int) -> List[dict]:
+    low, high = SCORE_RANGE
+    bins = Counter()
+    for score, n in score_counts.items():
+        bins[(min(max(score, low), high) - low) // bin_width] += n
+    return [
+        {'from': low + i * bin_width, 'to': min(low + (i + 1) * bin_width - 1, high), 'count': bins[i]}
+        for i in range((high - low) // bin_width + 1)
+        if low + i * bin_width <= high
+    ]
+
+
+def score_distribution(company_type: Optional[str] = None, since: Optional[date] = None,
+                       until: Optional[date] = None, period: str = 'all', bin_width: int = 10) -> List[dict]:
+    """Score histogram, mean and percentiles per (period, company type) from the rollups.
+
+    ``period`` is one of all, day, week (starting Monday) or month; days are UTC.
+    """
+    from .models import DailyScoreRollup, SessionLocal
+
+    query_filters = []
+    if company_type is not None:
+        query_filters.append(DailyScoreRollup.predicted_company_type == company_type)
+    if since is not None:
+        query_filters.append(DailyScoreRollup.day >= since)
+    if until is not None:
+        query_filters.append(DailyScoreRollup.day < until)
+
+    with SessionLocal() as db:
+        rows = (
+            db.query(DailyScoreRollup.day, DailyScoreRollup.predicted_company_type,
+                     DailyScoreRollup.overall_score, DailyScoreRollup.count)
+            .filter(*query_filters)
+            .all()
+        )
+
+    groups: Dict[tuple, Counter] = {}
+    for day, row_company_type, score, n in rows:
+        key = (_period_start(day, period), row_company_type)
+        groups.setdefault(key, Counter())[score] += n
+
+    result = []
+    for (start, row_company_type), score_counts in sorted(groups.items(), key=lambda item: (item[0][0] or date.min, item[0][1])):
+        total = sum(score_counts.values())
+        result.append({
+            'period_start': start.isoformat() if start is not None else None,
+            'company_type': row_company_type or None,
+            'count': total,
+            'mean_score': round(sum(score * n for score, n in score_counts.items()) / total, 2),
+            'percentiles': _percentiles(score_counts, total),
+            'histogram': _histogram(score_counts, bin_width),
+        })
+    return result
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Requests arriving within MAX_WAIT_MS of the first queued one are scored
+# together, up to MAX_BATCH_SIZE rows per model call.
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "1") == "1"
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "2"))
+
+ScoreFn = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+class _Pending:
+    __slots__ = ('row', 'future', 'enqueued_at')
+
+    def __init__(self, row: np.ndarray, future: asyncio.Future):
+        self.row = row
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceBatcher:
+    """Coalesces concurrent single-row predictions into one model call.
+
+    Callers ``await submit(row)``; a worker task collects rows for up to
+    ``max_wait_ms`` (or until ``max_batch_size`` rows are queued), stacks them,
+    runs ``score_fn`` once on a dedicated executor thread and resolves every
+    caller's future with its own row of the result. While one batch is being
+    scored the next one fills up, so the wait only applies when the model is
+    idle.
+    """
+
+    def __init__(
+        self,
+        score_fn: ScoreFn,
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Metrics
+        self.batches = 0
+        self.requests = 0
+        self._queue_delays = deque(maxlen=4096)
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Start the worker on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker; queued requests are failed"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("inference batcher stopped"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, row: np.ndarray) -> Tuple[int, np.ndarray]:
+        """Score one feature row; returns (overall_score, company_type_prob)"""
+        if not self.running:
+            raise RuntimeError("inference batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(np.asarray(row, dtype=np.float64).ravel(), future))
+        return await future
+
+    async def _collect(self) -> List[_Pending]:
+        batch = [await self._queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            for pending in batch:
+                self._queue_delays.append(started - pending.enqueued_at)
+
+            try:
+                features = np.vstack([pending.row for pending in batch])
+                scores, company_probs = await loop.run_in_executor(self._executor, self.score_fn, features)
+            except Exception as e:
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            for i, pending in enumerate(batch):
+                if not pending.future.done():
+                    pending.future.set_result((int(scores[i]), company_probs[i]))
+
+    def stats(self) -> dict:
+        """Batch fill rate and queue delay over recent requests"""
+        delays_ms = np.array(self._queue_delays) * 1000
+        mean_batch = self.requests / self.batches if self.batches else 0.0
+        return {
+            'enabled': self.running,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': round(mean_batch, 2),
+            'batch_fill_rate': round(mean_batch / self.max_batch_size, 4),
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_delay_ms': {
+                'p50': round(float(np.percentile(delays_ms, 50)), 3) if len(delays_ms) else 0.0,
+                'p99': round(float(np.percentile(delays_ms, 99)), 3) if len(delays_ms) else 0.0,
+                'max': round(float(delays_ms.max()), 3) if len(delays_ms) else 0.0,
+            },
+        }
@@ -1,19 +1,117 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Response, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
-import pandas as pd
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from typing import Iterator, List, Optional, Union
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
-import joblib
-import requests
-from bs4 import BeautifulSoup
-import json
+import orjson
 import os
-from datetime import datetime
+from datetime import date, datetime
 
-app = FastAPI(title="Student Placement Predictor API", version="1.0.0")
+from . import analytics, metrics, online_training, profiling, rules, similarity, whatif
+from .analysis_writer import AnalysisWriter
+from .batching import INFERENCE_BATCHING, InferenceBatcher
+from .model_bundle import ModelRegistry
+from .platform_cache import get_platform_data
+from .prediction_cache import PREDICTION_CACHE, PredictionCache, profile_key
+from .platforms import GUARDS, close_client, fetch_all, upstream_stats
+from .predictor import (
+    COMPANY_TYPES,
+    analysis_rows,
+    analysis_user_id,
+    build_feature_matrix,
+    iter_batch_payloads,
+    platform_data_from_results,
+    predict_batch,
+    prediction_payload,
+    profiles_from_frame,
+    read_profile_table,
+    score_features,
+)
+from .resume import ResumeJobQueue, ResumeTooLarge, UnsupportedResume, store_upload
+from .schemas import (
+    CompactPredictionResponse,
+    OutcomeReport,
+    PlatformData,
+    PredictionResponse,
+    UserProfile,
+    WhatIfRequest,
+)
+from .upstream import api_quota_share, scale_guards
+
+# "sklearn" runs the estimators as-is; "numpy" uses the compiled tree engine;
+# "auto" uses the compiled engine for batches up to INFERENCE_NUMPY_MAX_ROWS
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn")
+INFERENCE_NUMPY_MAX_ROWS = int(os.getenv("INFERENCE_NUMPY_MAX_ROWS", "160"))
+
+# "eager" loads and warms the models before serving, "background" starts
+# serving immediately and loads them on a worker thread, "lazy" loads them on
+# first use (or on the first /ready probe). app.serve sets "preloaded": it
+# did all of that before forking, so its workers skip it
+STARTUP_MODE = os.getenv("STARTUP_MODE", "eager")
+
+# Upper bound on students per batch request, and on concurrent platform
+# lookups while preparing a batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+BATCH_FETCH_CONCURRENCY = int(os.getenv("BATCH_FETCH_CONCURRENCY", "32"))
+
+# Predictions per chunk written to a streamed NDJSON batch response
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "100"))
+
+# Append every prediction to UserAnalysis through the write-behind queue
+PERSIST_ANALYSES = os.getenv("PERSIST_ANALYSES", "1") == "1"
+
+# Seconds between checks for a new current model bundle (e.g. one written by
+# app.online_training), swapped in without a restart; 0 disables
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+
+# Processes serving this app with the same upstream credentials, each with
+# its own rate limiters (e.g. uvicorn --workers); app.serve sets it to its
+# worker count
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Leave app.refresher its share of every upstream quota and split the
+    # rest evenly between the workers
+    scale_guards(GUARDS, api_quota_share() / WORKER_PROCESSES)
+    if STARTUP_MODE == "eager":
+        # A missing or invalid model bundle fails startup here
+        await asyncio.to_thread(init_db)
+        await asyncio.to_thread(warm_up)
+    elif STARTUP_MODE == "background":
+        start_background(init_db, warm_up)
+    elif STARTUP_MODE != "preloaded":
+        start_background(init_db)
+    if INFERENCE_BATCHING:
+        inference_batcher.start()
+    if PERSIST_ANALYSES:
+        analysis_writer.start()
+    if MODEL_RELOAD_INTERVAL > 0:
+        model_watcher = asyncio.create_task(watch_model_bundle())
+    if similarity.SIMILARITY_SYNC_INTERVAL > 0:
+        similarity_syncer = asyncio.create_task(sync_similarity_index())
+    yield
+    if MODEL_RELOAD_INTERVAL > 0:
+        model_watcher.cancel()
+    if similarity.SIMILARITY_SYNC_INTERVAL > 0:
+        similarity_syncer.cancel()
+    await inference_batcher.stop()
+    # Flush analyses still queued before the process exits
+    await analysis_writer.stop()
+    resume_jobs.shutdown()
+    # Release pooled upstream connections on shutdown
+    await close_client()
+
+# Responses are serialized with orjson; prediction endpoints return prebuilt
+# documents directly, skipping response model validation
+app = FastAPI(
+    title="Student Placement Predictor API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -24,476 +122,442 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Pydantic models
-class UserProfile(BaseModel):
-    leetcode_username: Optional[str] = ""
-    codeforces_username: Optional[str] = ""
-    codechef_username: Optional[str] = ""
-    github_username: Optional[str] = ""
-    hackerrank_username: Optional[str] = ""
-    linkedin_profile: Optional[str] = ""
-    cgpa: float
-    skills: List[str] = []
-    project_count: int = 0
-    preferred_countries: List[str] = []
-    work_experience: float = 0
-    english_proficiency: str = "Intermediate"
-
-class PlatformData(BaseModel):
-    leetcode_problems: int = 0
-    leetcode_rating: int = 0
-    codeforces_rating: int = 0
-    codeforces_contests: int = 0
-    codechef_rating: int = 0
-    codechef_stars: int = 0
-    github_repos: int = 0
-    github_contributions: int = 0
-    github_followers: int = 0
-    hackerrank_problems: int = 0
-    hackerrank_badges: int = 0
-    linkedin_connections: int = 0
-
-class PredictionResponse(BaseModel):
-    overall_score: int
-    company_matches: List[dict]
-    focus_areas: List[str]
-    strengths: List[str]
-    course_recommendations: List[dict]
-    international_opportunities: List[dict]
-    linkedin_insights: Optional[dict] = None
-
-# Load or create ML models
-def load_or_create_models():
-    """Load existing models or create new ones if they don't exist"""
-    try:
-        # Try to load existing models
-        placement_model = joblib.load('models/placement_model.pkl')
-        company_model = joblib.load('models/company_model.pkl')
-        scaler = joblib.load('models/scaler.pkl')
-        print("Loaded existing ML models")
-    except FileNotFoundError:
-        # Create and train new models with synthetic data
-        print("Creating new ML models with synthetic data...")
-        placement_model, company_model, scaler = create_and_train_models()
-        
-        # Save models
-        os.makedirs('models', exist_ok=True)
-        joblib.dump(placement_model, 'models/placement_model.pkl')
-        joblib.dump(company_model, 'models/company_model.pkl')
-        joblib.dump(scaler, 'models/scaler.pkl')
-        print("Created and saved new ML models")
-    
-    return placement_model, company_model, scaler
+# Opt-in sampling profiler; not installed at all unless enabled
+if profiling.PROFILING:
+    app.add_middleware(profiling.ProfilerMiddleware)
 
-def create_and_train_models():
-    """Create and train ML models with synthetic data"""
-    # Generate synthetic training data
-    np.random.seed(42)
-    n_samples = 5000
-    
-    # Features: CGPA, LeetCode problems, Codeforces rating, Projects, Skills count, Experience
-    X = np.random.rand(n_samples, 6)
-    X[:, 0] = np.random.normal(7.5, 1.2, n_samples)  # CGPA (5-10)
-    X[:, 1] = np.random.exponential(100, n_samples)  # LeetCode problems
-    X[:, 2] = np.random.normal(1400, 300, n_samples)  # Codeforces rating
-    X[:, 3] = np.random.poisson(3, n_samples)  # Projects
-    X[:, 4] = np.random.poisson(8, n_samples)  # Skills count
-    X[:, 5] = np.random.exponential(1.5, n_samples)  # Experience
-    
-    # Clip values to realistic ranges
-    X[:, 0] = np.clip(X[:, 0], 5, 10)
-    X[:, 1] = np.clip(X[:, 1], 0, 2000)
-    X[:, 2] = np.clip(X[:, 2], 800, 3000)
-    X[:, 3] = np.clip(X[:, 3], 0, 20)
-    X[:, 4] = np.clip(X[:, 4], 1, 25)
-    X[:, 5] = np.clip(X[:, 5], 0, 8)
-    
-    # Generate target variables
-    # Overall placement score (0-100)
-    placement_score = (
-        X[:, 0] * 10 +  # CGPA weight
-        X[:, 1] * 0.05 +  # LeetCode weight
-        X[:, 2] * 0.03 +  # Codeforces weight
-        X[:, 3] * 3 +  # Projects weight
-        X[:, 4] * 2 +  # Skills weight
-        X[:, 5] * 5  # Experience weight
-    )
-    placement_score = np.clip(placement_score / 2, 0, 100)
-    
-    # Company type (0: Service, 1: Product, 2: Startup, 3: FAANG)
-    company_type = np.zeros(n_samples)
-    company_type[placement_score > 60] = 1
-    company_type[placement_score > 75] = 2
-    company_type[placement_score > 85] = 3
-    
-    # Create and train models
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    # Placement score regression model
-    placement_model = GradientBoostingRegressor(n_estimators=100, random_state=42)
-    placement_model.fit(X_scaled, placement_score)
-    
-    # Company type classification model
-    company_model = RandomForestClassifier(n_estimators=100, random_state=42)
-    company_model.fit(X_scaled, company_type)
-    
-    return placement_model, company_model, scaler
+# The served model bundle is loaded on startup or first use, never at import;
+# the API never trains models itself
+model_registry = ModelRegistry()
+_background_tasks = set()
 
-# Initialize models
-placement_model, company_model, scaler = load_or_create_models()
+def score_batch(features: np.ndarray):
+    """Score a feature matrix with the currently loaded models"""
+    bundle = model_registry.get()
+    if bundle.compiled is not None and (INFERENCE_BACKEND == "numpy" or (
+        INFERENCE_BACKEND == "auto" and len(features) <= INFERENCE_NUMPY_MAX_ROWS
+    )):
+        with metrics.span('compiled.score'):
+            return bundle.compiled.score(features)
+    return score_features(features, bundle.placement_model, bundle.company_model, bundle.scaler)
 
-# Platform data fetching functions
-async def fetch_leetcode_data(username: str) -> dict:
-    """Fetch LeetCode user data"""
-    try:
-        # LeetCode GraphQL API
-        url = "https://leetcode.com/graphql"
-        query = """
-        query getUserProfile($username: String!) {
-            matchedUser(username: $username) {
-                submitStats: submitStatsGlobal {
-                    acSubmissionNum {
-                        difficulty
-                        count
-                    }
-                }
-                profile {
-                    ranking
-                }
-            }
-        }
-        """
-        
-        response = requests.post(url, json={
-            'query': query,
-            'variables': {'username': username}
-        }, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('data', {}).get('matchedUser'):
-                user_data = data['data']['matchedUser']
-                total_solved = sum([
-                    item['count'] for item in 
-                    user_data.get('submitStats', {}).get('acSubmissionNum', [])
-                ])
-                return {
-                    'problems_solved': total_solved,
-                    'ranking': user_data.get('profile', {}).get('ranking', 0)
-                }
-    except Exception as e:
-        print(f"Error fetching LeetCode data: {e}")
-    
-    return {'problems_solved': 0, 'ranking': 0}
+def init_db():
+    """Create database tables (imports SQLAlchemy, so kept off the import path)"""
+    from .models import init_db as create_tables
+    create_tables()
+    analytics.backfill_rollups()
+    analytics.backfill_score_summaries()
 
-async def fetch_codeforces_data(username: str) -> dict:
-    """Fetch Codeforces user data"""
-    try:
-        url = f"https://codeforces.com/api/user.info?handles={username}"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data['status'] == 'OK':
-                user = data['result'][0]
-                return {
-                    'rating': user.get('rating', 0),
-                    'max_rating': user.get('maxRating', 0),
-                    'rank': user.get('rank', 'unrated')
-                }
-    except Exception as e:
-        print(f"Error fetching Codeforces data: {e}")
-    
-    return {'rating': 0, 'max_rating': 0, 'rank': 'unrated'}
+def warm_up():
+    """Load the models and run one prediction through every inference path"""
+    warm_bundle(model_registry.get())
 
-async def fetch_github_data(username: str) -> dict:
-    """Fetch GitHub user data"""
-    try:
-        # GitHub API
-        headers = {'Accept': 'application/vnd.github.v3+json'}
-        
-        # User info
-        user_url = f"https://api.github.com/users/{username}"
-        user_response = requests.get(user_url, headers=headers, timeout=10)
-        
-        if user_response.status_code == 200:
-            user_data = user_response.json()
-            
-            # Repositories
-            repos_url = f"https://api.github.com/users/{username}/repos"
-            repos_response = requests.get(repos_url, headers=headers, timeout=10)
-            
-            repos_data = repos_response.json() if repos_response.status_code == 200 else []
-            
-            return {
-                'public_repos': user_data.get('public_repos', 0),
-                'followers': user_data.get('followers', 0),
-                'following': user_data.get('following', 0),
-                'total_stars': sum([repo.get('stargazers_count', 0) for repo in repos_data])
-            }
-    except Exception as e:
-        print(f"Error fetching GitHub data: {e}")
-    
-    return {'public_repos': 0, 'followers': 0, 'following': 0, 'total_stars': 0}
+def warm_bundle(bundle):
+    row = np.zeros((1, len(bundle.feature_names)))
+    score_features(row, bundle.placement_model, bundle.company_model, bundle.scaler)
+    if INFERENCE_BACKEND != "sklearn" and bundle.compiled is not None:
+        bundle.compiled.score(row)
+
+def start_background(*steps):
+    """Run blocking startup steps on a worker thread without delaying serving"""
+    async def run():
+        for step in steps:
+            try:
+                await asyncio.to_thread(step)
+            except Exception as e:
+                print(f"Background startup step {step.__name__} failed: {e}")
+                return
+    
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def watch_model_bundle():
+    """Hot-swap the models whenever MODEL_DIR/current names a new bundle.
+
+    The new bundle is loaded and warmed up on a worker thread while the old
+    one keeps serving; each prediction scores with one bundle or the other,
+    never a mix. Each serve.py worker swaps on its own.
+    """
+    while True:
+        await asyncio.sleep(MODEL_RELOAD_INTERVAL)
+        if not model_registry.ready:
+            continue
+        try:
+            await asyncio.to_thread(model_registry.reload, warm_bundle)
+        except Exception as e:
+            print(f"Error reloading model bundle: {e}")
+
+async def sync_similarity_index():
+    """Index new analyses for /api/similar-students and map them.
+
+    Every worker tries; whichever holds the index lock appends, and the
+    others pick up its rows.
+    """
+    while True:
+        try:
+            if model_registry.ready:
+                await asyncio.to_thread(similarity.sync, model_registry.get().scaler)
+            await asyncio.to_thread(similarity_index.refresh)
+        except Exception as e:
+            print(f"Error syncing similarity index: {e}")
+        await asyncio.sleep(similarity.SIMILARITY_SYNC_INTERVAL)
+
+# Resume parsing runs in a process pool, off the request path
+resume_jobs = ResumeJobQueue()
+
+# Coalesces concurrent single-student predictions into one model call
+inference_batcher = InferenceBatcher(score_batch)
+
+# Repeated predictions for the same profile and model version
+prediction_cache = PredictionCache()
+
+# Predictions are persisted in bulk off the request path
+analysis_writer = AnalysisWriter()
+
+# Past analyses by scaled features, for "students like you"
+similarity_index = similarity.SimilarityIndex()
+
+def record_analyses(profiles: List[UserProfile], platform_data: List[PlatformData]):
+    """on_scored callback queueing one UserAnalysis row per scored student"""
+    def on_scored(scores, company_probs):
+        if analysis_writer.running:
+            analysis_writer.record_many(analysis_rows(profiles, platform_data, scores, company_probs))
+    return on_scored
 
 @app.get("/")
 async def root():
     return {"message": "Student Placement Predictor API", "version": "1.0.0"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the models are resident, 503 until then"""
+    if not model_registry.ready and not model_registry.loading and model_registry.error is None:
+        start_background(warm_up)
+    status = model_registry.status()
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
+
 @app.post("/api/fetch-platform-data")
 async def fetch_platform_data(profile: UserProfile):
     """Fetch data from various coding platforms"""
-    platform_data = PlatformData()
-    
-    # Fetch LeetCode data
-    if profile.leetcode_username:
-        leetcode_data = await fetch_leetcode_data(profile.leetcode_username)
-        platform_data.leetcode_problems = leetcode_data['problems_solved']
-        platform_data.leetcode_rating = leetcode_data['ranking']
-    
-    # Fetch Codeforces data
-    if profile.codeforces_username:
-        cf_data = await fetch_codeforces_data(profile.codeforces_username)
-        platform_data.codeforces_rating = cf_data['rating']
-    
-    # Fetch GitHub data
-    if profile.github_username:
-        github_data = await fetch_github_data(profile.github_username)
-        platform_data.github_repos = github_data['public_repos']
-        platform_data.github_followers = github_data['followers']
+    # Fetch all platforms concurrently through the platform cache; latency is
+    # bounded by the slowest one
+    results = await fetch_all({
+        'leetcode': profile.leetcode_username,
+        'codeforces': profile.codeforces_username,
+        'github': profile.github_username,
+    }, fetch=get_platform_data)
+    
+    return platform_data_from_results(results)
+
+async def compute_prediction(profile: UserProfile):
+    """Fetch platform data and score one student: (platform data, score, probabilities)"""
+    with metrics.span('platform_fetch'):
+        platform_data = await fetch_platform_data(profile)
     
-    return platform_data
+    # Prepare features, scale and predict
+    with metrics.span('features'):
+        features = build_feature_matrix([profile], [platform_data])
+    with metrics.span('inference'):
+        if inference_batcher.running:
+            overall_score, company_type_prob = await inference_batcher.submit(features[0])
+        else:
+            scores, company_probs = score_batch(features)
+            overall_score, company_type_prob = int(scores[0]), company_probs[0]
+    return platform_data, overall_score, tuple(float(p) for p in company_type_prob)
 
-@app.post("/api/predict-placement", response_model=PredictionResponse)
-async def predict_placement(profile: UserProfile):
-    """Main prediction endpoint"""
+@app.post("/api/predict-placement", response_model=Union[PredictionResponse, CompactPredictionResponse])
+async def predict_placement(profile: UserProfile, compact: bool = False):
+    """Main prediction endpoint; ``compact`` references static text by catalog id"""
     try:
-        # Fetch platform data
-        platform_data = await fetch_platform_data(profile)
-        
-        # Prepare features for ML model
-        features = np.array([[
-            profile.cgpa,
-            platform_data.leetcode_problems,
-            platform_data.codeforces_rating,
-            profile.project_count,
-            len(profile.skills),
-            profile.work_experience
-        ]])
-        
-        # Scale features
-        features_scaled = scaler.transform(features)
-        
-        # Make predictions
-        overall_score = int(placement_model.predict(features_scaled)[0])
-        company_type_prob = company_model.predict_proba(features_scaled)[0]
-        
-        # Generate company matches
-        company_types = ['Service-based', 'Product-based', 'Startup', 'FAANG']
-        company_matches = []
-        
-        for i, (company_type, prob) in enumerate(zip(company_types, company_type_prob)):
-            company_matches.append({
-                'type': company_type,
-                'match_percentage': int(prob * 100),
-                'description': f'Match probability for {company_type} companies',
-                'requirements': get_company_requirements(company_type),
-                'suggestions': get_improvement_suggestions(profile, platform_data)
-            })
-        
-        # Sort by match percentage
-        company_matches.sort(key=lambda x: x['match_percentage'], reverse=True)
-        
-        # Generate focus areas and strengths
-        focus_areas = generate_focus_areas(profile, platform_data, overall_score)
-        strengths = generate_strengths(profile, platform_data, overall_score)
-        
-        # Get course recommendations
-        course_recommendations = get_course_recommendations(focus_areas)
-        
-        # Get international opportunities
-        international_opportunities = get_international_opportunities(profile, overall_score)
-        
-        # LinkedIn insights
-        linkedin_insights = None
-        if profile.linkedin_profile:
-            linkedin_insights = generate_linkedin_insights(profile)
-        
-        return PredictionResponse(
-            overall_score=overall_score,
-            company_matches=company_matches,
-            focus_areas=focus_areas,
-            strengths=strengths,
-            course_recommendations=course_recommendations,
-            international_opportunities=international_opportunities,
-            linkedin_insights=linkedin_insights
-        )
+        with metrics.span('total'):
+            bundle = await model_registry.ensure_loaded()
+            if PREDICTION_CACHE:
+                platform_data, overall_score, company_type_prob = await prediction_cache.get_or_compute(
+                    profile_key(profile, bundle.version), lambda: compute_prediction(profile),
+                )
+            else:
+                platform_data, overall_score, company_type_prob = await compute_prediction(profile)
+            
+            record_analyses([profile], [platform_data])([overall_score], [company_type_prob])
+            
+            with metrics.span('response'):
+                payload = prediction_payload(
+                    profile, platform_data, overall_score, company_type_prob, compact=compact,
+                )
+            with metrics.span('serialize'):
+                return ORJSONResponse(payload)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
-def get_company_requirements(company_type: str) -> List[str]:
-    """Get requirements for different company types"""
-    requirements = {
-        'FAANG': [
-            'Strong DSA skills (500+ problems)',
-            'System design knowledge',
-            'Previous internship experience',
-            'High CGPA (8.5+)'
-        ],
-        'Product-based': [
-            'Good DSA skills (200+ problems)',
-            'Project experience',
-            'Technology stack expertise',
-            'Problem-solving ability'
-        ],
-        'Startup': [
-            'Versatile skill set',
-            'Quick learning ability',
-            'Hands-on project experience',
-            'Adaptability'
-        ],
-        'Service-based': [
-            'Basic programming skills',
-            'Good communication',
-            'Willingness to learn',
-            'Team collaboration'
-        ]
-    }
-    return requirements.get(company_type, [])
-
-def get_improvement_suggestions(profile: UserProfile, platform_data: PlatformData) -> List[str]:
-    """Generate improvement suggestions"""
-    suggestions = []
-    
-    if platform_data.leetcode_problems < 100:
-        suggestions.append('Solve more LeetCode problems daily')
-    
-    if platform_data.codeforces_rating < 1200:
-        suggestions.append('Participate in Codeforces contests')
-    
-    if profile.project_count < 3:
-        suggestions.append('Build more projects to showcase skills')
-    
-    if len(profile.skills) < 5:
-        suggestions.append('Learn more relevant technologies')
-    
-    if not profile.linkedin_profile:
-        suggestions.append('Create a professional LinkedIn profile')
-    
-    return suggestions
+# The catalog only changes with a deploy, so it is rendered once
+CATALOG_ETAG = f'"{rules.CATALOG_VERSION}"'
+CATALOG_BODY = orjson.dumps({'version': rules.CATALOG_VERSION, **rules.CATALOG})
 
-def generate_focus_areas(profile: UserProfile, platform_data: PlatformData, score: int) -> List[str]:
-    """Generate focus areas based on weak points"""
-    focus_areas = []
-    
-    if platform_data.leetcode_problems < 100:
-        focus_areas.append('Data Structures & Algorithms')
-    
-    if profile.project_count < 3:
-        focus_areas.append('Project Development')
-    
-    if len(profile.skills) < 5:
-        focus_areas.append('Technical Skills')
-    
-    if score > 70:
-        focus_areas.append('System Design')
-    
-    if not profile.linkedin_profile:
-        focus_areas.append('Professional Networking')
-    
-    return focus_areas if focus_areas else ['Continue building on strengths']
+@app.get("/api/catalog")
+async def catalog(if_none_match: Optional[str] = Header(None)):
+    """Static response text by id, for compact predictions; cache by ETag"""
+    headers = {"ETag": CATALOG_ETAG, "Cache-Control": "public, max-age=3600"}
+    if if_none_match is not None and CATALOG_ETAG in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(CATALOG_BODY, media_type="application/json", headers=headers)
 
-def generate_strengths(profile: UserProfile, platform_data: PlatformData, score: int) -> List[str]:
-    """Generate strengths based on strong points"""
-    strengths = []
-    
-    if profile.cgpa >= 8.0:
-        strengths.append('Strong Academic Performance')
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage timings and upstream metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/profiles")
+async def list_profiles():
+    """Recent request profiles (PROFILE_SAMPLE_RATE / PROFILE_HEADER)"""
+    return {'enabled': profiling.PROFILING, 'profiles': profiling.list_profiles()}
+
+@app.get("/api/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """One profile as collapsed stacks, e.g. for flamegraph.pl or speedscope"""
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
+
+@app.get("/api/inference/stats")
+async def inference_stats():
+    """Micro-batching scheduler metrics: batch fill rate and queue delay"""
+    return inference_batcher.stats()
+
+@app.get("/api/prediction-cache/stats")
+async def prediction_cache_stats():
+    """Prediction cache hit ratio, memory use and evictions"""
+    return prediction_cache.stats()
+
+@app.get("/api/upstream/stats")
+async def upstream_platform_stats():
+    """Per-platform rate limiter quota and circuit breaker state"""
+    return upstream_stats()
+
+@app.get("/api/analyses/stats")
+async def analysis_write_stats():
+    """Write-behind queue metrics: rows queued, written and dropped"""
+    return analysis_writer.stats()
+
+@app.post("/api/what-if")
+async def what_if(request: WhatIfRequest):
+    """Score every combination of feature increases for one student in one
+    pass: per-feature gain curves and the cheapest path to the next tier"""
+    try:
+        grid = whatif.resolve_grid(request.deltas)
+        costs = whatif.resolve_costs(request.costs)
+    except whatif.InvalidWhatIf as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        await model_registry.ensure_loaded()
+        platform_data = await fetch_platform_data(request.profile)
+        base = build_feature_matrix([request.profile], [platform_data])[0]
+        scenarios = whatif.scenario_matrix(base, grid)
+        with metrics.span('what_if.score'):
+            scores, company_probs = await asyncio.to_thread(score_batch, scenarios[2])
+        return whatif.analyse(base, scenarios, costs, scores, company_probs)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"What-if error: {str(e)}")
+
+@app.post("/api/similar-students")
+async def similar_students(profile: UserProfile, k: int = 10):
+    """Scores and reported outcomes of the k past students most like this one"""
+    if not 1 <= k <= similarity.SIMILARITY_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {similarity.SIMILARITY_MAX_K}")
+    try:
+        bundle = await model_registry.ensure_loaded()
+        platform_data = await fetch_platform_data(profile)
+        features = build_feature_matrix([profile], [platform_data])
+        return await asyncio.to_thread(
+            similarity.similar_students, similarity_index, bundle.scaler, features[0], k, analysis_user_id(profile)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Similarity error: {str(e)}")
+
+@app.get("/api/similarity/stats")
+async def similarity_stats():
+    """Rows, generation and partitioning of the similar-students index"""
+    return similarity_index.stats()
+
+@app.post("/api/outcomes")
+async def report_outcome(outcome: OutcomeReport):
+    """Record where a student was placed, against their latest analysis"""
+    if outcome.company_type not in COMPANY_TYPES:
+        raise HTTPException(status_code=400, detail=f"company_type must be one of {', '.join(COMPANY_TYPES)}")
+    if outcome.placement_score is not None and not 0 <= outcome.placement_score <= 100:
+        raise HTTPException(status_code=400, detail="placement_score must be between 0 and 100")
+    analysis_id = await asyncio.to_thread(
+        online_training.record_outcome, outcome.user_id, outcome.company_type, outcome.placement_score
+    )
+    if analysis_id is None:
+        raise HTTPException(status_code=404, detail="No analysis found for this user")
+    return {'analysis_id': analysis_id}
+
+@app.get("/api/analytics/analyses")
+async def analytics_analyses(
+    user_id: Optional[str] = None,
+    company_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+):
+    """Analysis history, newest first, keyset-paginated via ``next_cursor``"""
+    try:
+        return await asyncio.to_thread(
+            analytics.list_analyses, user_id, company_type, since, until, cursor, limit
+        )
+    except analytics.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/analytics/score-distribution")
+async def analytics_score_distribution(
+    company_type: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    period: str = "all",
+    bin_width: int = 10,
+):
+    """Score histogram, mean and percentiles per period and company type"""
+    if period not in ("all", "day", "week", "month"):
+        raise HTTPException(status_code=400, detail="period must be all, day, week or month")
+    if not 1 <= bin_width <= 100:
+        raise HTTPException(status_code=400, detail="bin_width must be between 1 and 100")
+    return await asyncio.to_thread(
+        analytics.score_distribution, company_type, since, until, period, bin_width
+    )
+
+@app.get("/api/analytics/improvements")
+async def analytics_improvements(min_delta: int = 1, cursor: Optional[str] = None, limit: int = 50):
+    """Users whose latest score beats their first, paginated by user_id"""
+    return await asyncio.to_thread(analytics.score_improvements, min_delta, cursor, limit)
+
+async def fetch_platform_data_many(profiles: List[UserProfile]) -> List[PlatformData]:
+    """Fetch platform data for a whole batch with bounded concurrency"""
+    semaphore = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY)
     
-    if platform_data.leetcode_problems >= 200:
-        strengths.append('Excellent Problem Solving')
+    async def fetch_one(profile: UserProfile) -> PlatformData:
+        async with semaphore:
+            return await fetch_platform_data(profile)
     
-    if profile.project_count >= 5:
-        strengths.append('Strong Project Portfolio')
+    return await asyncio.gather(*(fetch_one(profile) for profile in profiles))
+
+def stream_predictions(payloads: Iterator[dict]) -> StreamingResponse:
+    """Stream one prediction JSON document per line (NDJSON), written
+    STREAM_CHUNK_ROWS lines at a time"""
+    def chunks():
+        lines = []
+        for payload in payloads:
+            lines.append(orjson.dumps(payload))
+            if len(lines) >= STREAM_CHUNK_ROWS:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+    
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+def check_batch_size(n: int):
+    if n > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {n} > {MAX_BATCH_SIZE} students")
+
+@app.post("/api/predict-placement/batch")
+async def predict_placement_batch(profiles: List[UserProfile], fetch_platforms: bool = True, compact: bool = False):
+    """Score a list of students in one vectorized pass, streamed back as NDJSON"""
+    check_batch_size(len(profiles))
+    if fetch_platforms:
+        platform_data = await fetch_platform_data_many(profiles)
+    else:
+        platform_data = [PlatformData() for _ in profiles]
     
-    if len(profile.skills) >= 8:
-        strengths.append('Diverse Technical Skills')
+    try:
+        await model_registry.ensure_loaded()
+        features = build_feature_matrix(profiles, platform_data)
+        payloads = iter_batch_payloads(
+            profiles, platform_data, score_batch, features=features,
+            on_scored=record_analyses(profiles, platform_data), compact=compact,
+        )
+        return stream_predictions(payloads)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@app.post("/api/predict-placement/batch/upload")
+async def predict_placement_batch_upload(
+    file: UploadFile = File(...), fetch_platforms: bool = True, compact: bool = False,
+):
+    """Score a CSV or Parquet file of students, streamed back as NDJSON.
+    
+    Columns are UserProfile fields, with ``skills`` separated by ``;``. If the
+    file carries PlatformData columns (e.g. ``leetcode_problems``) they are used
+    as-is instead of fetching the platforms.
+    """
+    try:
+        frame = read_profile_table(await file.read(), file.filename or "")
+        profiles, platform_data = profiles_from_frame(frame)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch file: {str(e)}")
+    
+    check_batch_size(len(profiles))
+    if platform_data is None:
+        if fetch_platforms:
+            platform_data = await fetch_platform_data_many(profiles)
+        else:
+            platform_data = [PlatformData() for _ in profiles]
     
-    if profile.work_experience > 0:
-        strengths.append('Relevant Work Experience')
+    try:
+        await model_registry.ensure_loaded()
+        return stream_predictions(iter_batch_payloads(
+            profiles, platform_data, score_batch,
+            on_scored=record_analyses(profiles, platform_data), compact=compact,
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+def predict_profiles(
+    profiles: List[UserProfile], platform_data: Optional[List[PlatformData]] = None
+) -> List[PredictionResponse]:
+    """Python API: score many students at once with the loaded models.
+    
+    Platform data is not fetched here; pass it in (defaults to zeros).
+    """
+    if platform_data is None:
+        platform_data = [PlatformData() for _ in profiles]
+    return predict_batch(profiles, platform_data, score_batch)
+
+@app.post("/api/upload-resume", status_code=202)
+async def upload_resume(response: Response, file: UploadFile = File(...)):
+    """Store a resume and queue it for parsing; poll /api/resume-jobs/{job_id}.
     
-    return strengths if strengths else ['Dedicated to learning']
-
-def get_course_recommendations(focus_areas: List[str]) -> List[dict]:
-    """Get course recommendations based on focus areas"""
-    # This would typically query a course database
-    # For now, returning mock data
-    courses = [
-        {
-            'title': 'Master the Coding Interview: Data Structures + Algorithms',
-            'provider': 'Udemy',
-            'duration': '19 hours',
-            'difficulty': 'Intermediate',
-            'rating': 4.6,
-            'price': '$84.99',
-            'url': 'https://www.udemy.com/course/master-the-coding-interview-data-structures-algorithms/'
-        }
-    ]
-    return courses
-
-def get_international_opportunities(profile: UserProfile, score: int) -> List[dict]:
-    """Get international job opportunities"""
-    # Mock international opportunities
-    opportunities = [
-        {
-            'country': 'United States',
-            'match_score': min(score + 10, 100),
-            'visa_type': 'H1-B',
-            'average_salary': '$120,000 - $200,000',
-            'top_companies': ['Google', 'Microsoft', 'Amazon']
-        }
-    ]
-    return opportunities
-
-def generate_linkedin_insights(profile: UserProfile) -> dict:
-    """Generate LinkedIn profile insights"""
-    return {
-        'profile_strength': 75,
-        'network_quality': 80,
-        'industry_alignment': 70,
-        'suggestions': [
-            'Add more technical skills',
-            'Get recommendations from colleagues',
-            'Share technical articles'
-        ]
-    }
-
-@app.post("/api/upload-resume")
-async def upload_resume(file: UploadFile = File(...)):
-    """Upload and analyze resume"""
+    Resumes parsed before are answered from the cache with status "done".
+    """
     try:
-        # Save uploaded file
-        file_path = f"uploads/{file.filename}"
-        os.makedirs("uploads", exist_ok=True)
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Parse resume (mock implementation)
-        resume_data = {
-            'score': 75,
-            'keywords': ['Python', 'JavaScript', 'React', 'Machine Learning'],
-            'experience_years': 2,
-            'education': 'Computer Science'
-        }
-        
-        return resume_data
-        
+        resume = await store_upload(file)
+    except ResumeTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedResume as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Resume upload error: {str(e)}")
+    
+    job = await resume_jobs.submit(resume)
+    if job.status == 'done':
+        response.status_code = 200
+    return job.to_dict()
+
+@app.get("/api/resume-jobs/{job_id}")
+async def resume_job_status(job_id: str):
+    """Status of a resume parsing job, with the parsed result once done"""
+    job = await resume_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown resume job")
+    return job.to_dict()
+
+@app.get("/api/resume-cache/stats")
+async def resume_cache_stats():
+    """Parsed-resume cache hit ratio"""
+    return resume_jobs.cache.stats()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import joblib
+
+from .predictor import FEATURE_NAMES
+
+# Bundles live in MODEL_DIR/bundles/<version>/; MODEL_DIR/current names the
+# one to serve. MODEL_BUNDLE pins a specific bundle directory instead.
+MODEL_DIR = Path(os.getenv("MODEL_DIR", Path(__file__).resolve().parent.parent / "models"))
+MODEL_BUNDLE = os.getenv("MODEL_BUNDLE")
+MODEL_VERIFY_CHECKSUM = os.getenv("MODEL_VERIFY_CHECKSUM", "1") == "1"
+
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+ARTIFACTS = {
+    'placement_model': 'placement_model.joblib',
+    'company_model': 'company_model.joblib',
+    'scaler': 'scaler.joblib',
+    # Flattened tree arrays for app.tree_engine; memory-mapped, so every
+    # worker on the host shares the same pages. None for models the engine
+    # cannot compile (e.g. xgboost)
+    'compiled': 'compiled.joblib',
+}
+
+
+class ModelBundleError(Exception):
+    """A model bundle is missing, corrupt, or does not match the features we serve"""
+
+
+@dataclass
+class ModelBundle:
+    version: str
+    path: Path
+    manifest: dict
+    placement_model: object
+    company_model: object
+    scaler: object
+    compiled: object
+
+    @property
+    def feature_names(self):
+        return self.manifest['feature_names']
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _bundle_checksum(files: dict) -> str:
+    lines = ''.join(f"{name}:{files[name]}\n" for name in sorted(files))
+    return hashlib.sha256(lines.encode()).hexdigest()
+
+
+def save_bundle(placement_model, company_model, scaler, training: Optional[dict] = None,
+                model_dir: Path = MODEL_DIR) -> Path:
+    """Write a new versioned bundle and make it the current one"""
+    from .tree_engine import CompiledModels
+
+    n_features = getattr(scaler, 'n_features_in_', len(FEATURE_NAMES))
+    if n_features != len(FEATURE_NAMES):
+        raise ModelBundleError(f"models take {n_features} features, the API serves {len(FEATURE_NAMES)}")
+
+    model_dir = Path(model_dir)
+    staging = model_dir / "bundles" / f".staging-{os.getpid()}-{time.time_ns()}"
+    staging.mkdir(parents=True)
+
+    try:
+        compiled = CompiledModels(placement_model, company_model, scaler)
+    except TypeError as e:
+        # Served through the estimators' own predict instead
+        print(f"Not compiling models: {e}")
+        compiled = None
+    objects = {
+        'placement_model': placement_model,
+        'company_model': company_model,
+        'scaler': scaler,
+        'compiled': compiled,
+    }
+    files = {}
+    for key, filename in ARTIFACTS.items():
+        # Uncompressed, so arrays can be memory-mapped on load
+        joblib.dump(objects[key], staging / filename)
+        files[filename] = _sha256(staging / filename)
+
+    checksum = _bundle_checksum(files)
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{checksum[:8]}"
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'feature_names': list(FEATURE_NAMES),
+        'training': training or {},
+        'files': files,
+        'checksum': checksum,
+    }
+    with open(staging / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    final = model_dir / "bundles" / version
+    if final.exists():
+        shutil.rmtree(final)
+    os.replace(staging, final)
+
+    pointer = model_dir / f".current-{os.getpid()}"
+    pointer.write_text(version + "\n")
+    os.replace(pointer, model_dir / "current")
+    return final
+
+
+def current_bundle_path(model_dir: Path = MODEL_DIR) -> Path:
+    """Directory of the bundle that should be served"""
+    if MODEL_BUNDLE:
+        return Path(MODEL_BUNDLE)
+    pointer = Path(model_dir) / "current"
+    if not pointer.exists():
+        raise ModelBundleError(
+            f"No model bundle found in {model_dir}. Train one with: python train_model.py"
+        )
+    return Path(model_dir) / "bundles" / pointer.read_text().strip()
+
+
+def prune_bundles(keep: int, model_dir: Path = MODEL_DIR) -> list:
+    """Delete all but the ``keep`` newest bundles, never the current one.
+
+    Workers still serving a deleted bundle keep its open and mapped files.
+    """
+    bundles = sorted((path for path in (Path(model_dir) / "bundles").iterdir()
+                      if path.is_dir() and not path.name.startswith('.')), key=lambda path: path.name)
+    current = current_bundle_path(model_dir)
+    removed = [path for path in bundles[:-keep] if path != current] if keep > 0 else []
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
+
+
+def read_manifest(path: Path) -> dict:
+    try:
+        with open(Path(path) / MANIFEST_NAME) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ModelBundleError(f"{path} has no {MANIFEST_NAME}")
+
+
+def load_bundle(path: Optional[Path] = None, mmap: bool = True,
+                verify_checksum: bool = MODEL_VERIFY_CHECKSUM) -> ModelBundle:
+    """Load and validate a bundle; never trains"""
+    path = Path(path) if path is not None else current_bundle_path()
+    manifest = read_manifest(path)
+
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ModelBundleError(f"{path}: unsupported bundle format {manifest.get('format')}")
+    if manifest.get('feature_names') != FEATURE_NAMES:
+        raise ModelBundleError(
+            f"{path}: bundle features {manifest.get('feature_names')} do not match served features {FEATURE_NAMES}"
+        )
+
+    if verify_checksum:
+        files = {name: _sha256(path / name) for name in manifest['files']}
+        if files != manifest['files'] or _bundle_checksum(files) != manifest['checksum']:
+            raise ModelBundleError(f"{path}: checksum mismatch, bundle is corrupt")
+
+    mmap_mode = 'r' if mmap else None
+    objects = {key: joblib.load(path / filename, mmap_mode=mmap_mode) for key, filename in ARTIFACTS.items()}
+
+    for key in ('placement_model', 'company_model', 'scaler'):
+        n_features = getattr(objects[key], 'n_features_in_', len(FEATURE_NAMES))
+        if n_features != len(FEATURE_NAMES):
+            raise ModelBundleError(f"{path}: {key} expects {n_features} features, not {len(FEATURE_NAMES)}")
+
+    return ModelBundle(version=manifest['version'], path=path, manifest=manifest, **objects)
+
+
+class ModelRegistry:
+    """Holds the served bundle and loads it once, on demand.
+
+    Readers take ``registry.get()`` once per scoring call, so every prediction
+    uses one consistent bundle even if another is loaded concurrently.
+    ``reload()`` replaces the bundle with a single assignment; the three
+    models and the scaler are always swapped together.
+    """
+
+    def __init__(self, loader=load_bundle):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._bundle: Optional[ModelBundle] = None
+        self.error: Optional[Exception] = None
+        self.loading = False
+        self.load_seconds: Optional[float] = None
+        self.reloads = 0
+        self.reload_error: Optional[Exception] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._bundle is not None
+
+    def get(self) -> ModelBundle:
+        """The loaded bundle, loading it on first use (blocking)"""
+        bundle = self._bundle
+        if bundle is not None:
+            return bundle
+        with self._lock:
+            if self._bundle is None:
+                self.loading = True
+                started = time.perf_counter()
+                try:
+                    self._bundle = self._loader()
+                    self.error = None
+                except Exception as e:
+                    self.error = e
+                    raise
+                finally:
+                    self.loading = False
+                self.load_seconds = time.perf_counter() - started
+                print(f"Loaded model bundle {self._bundle.version} in {self.load_seconds:.2f}s")
+            return self._bundle
+
+    def reload(self, prepare=None) -> bool:
+        """Swap in the bundle MODEL_DIR/current names, if it changed.
+
+        The new bundle is loaded, validated and passed to ``prepare`` (e.g. to
+        warm it up) while the old one keeps serving. Requests that already
+        took the old bundle finish with it. A bundle that fails to load is
+        not swapped in. Returns whether the bundle changed.
+        """
+        path = current_bundle_path()
+        if self._bundle is None or path == self._bundle.path:
+            return False
+        with self._lock:
+            if path == self._bundle.path:
+                return False
+            started = time.perf_counter()
+            try:
+                bundle = self._loader(path)
+                if prepare is not None:
+                    prepare(bundle)
+            except Exception as e:
+                self.reload_error = e
+                raise
+            previous, self._bundle = self._bundle, bundle
+            self.reload_error = None
+            self.reloads += 1
+            self.load_seconds = time.perf_counter() - started
+        print(f"Swapped model bundle {previous.version} for {bundle.version} in {self.load_seconds:.2f}s")
+        return True
+
+    async def ensure_loaded(self) -> ModelBundle:
+        """Like get(), but loads on a worker thread instead of the event loop"""
+        if self._bundle is not None:
+            return self._bundle
+        return await asyncio.to_thread(self.get)
+
+    def status(self) -> dict:
+        bundle = self._bundle
+        return {
+            'ready': bundle is not None,
+            'loading': self.loading,
+            'model_version': bundle.version if bundle is not None else None,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'error': str(self.error) if self.error is not None else None,
+            'reloads': self.reloads,
+            'reload_error': str(self.reload_error) if self.reload_error is not None else None,
+        }
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from datetime import datetime
+import os
 
 Base = declarative_base()
 
@@ -21,6 +22,41 @@ class UserAnalysis(Base):
     overall_score = Column(Integer)
     predicted_company_type = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Where the student was actually placed, reported later (POST
+    # /api/outcomes); training data for the online model refresh
+    outcome_company_type = Column(String)
+    outcome_score = Column(Integer)
+    outcome_recorded_at = Column(DateTime)
+    
+    __table_args__ = (
+        # Per-user history and cohort slices, both read newest first
+        Index('ix_user_analyses_user_created', 'user_id', 'created_at'),
+        Index('ix_user_analyses_company_created', 'predicted_company_type', 'created_at'),
+        Index('ix_user_analyses_outcome_recorded', 'outcome_recorded_at'),
+    )
+
+class DailyScoreRollup(Base):
+    """Analyses per (UTC day, company type, score); maintained on every insert"""
+    __tablename__ = "daily_score_rollups"
+    
+    day = Column(Date, primary_key=True)
+    predicted_company_type = Column(String, primary_key=True)
+    overall_score = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+class UserScoreSummary(Base):
+    """Each user's first and latest scored analysis, ordered by
+    (created_at, id); maintained on every insert"""
+    __tablename__ = "user_score_summaries"
+    
+    user_id = Column(String, primary_key=True)
+    analyses = Column(Integer, nullable=False, default=0)
+    first_id = Column(Integer, nullable=False)
+    first_at = Column(DateTime, nullable=False)
+    first_score = Column(Integer, nullable=False)
+    latest_id = Column(Integer, nullable=False)
+    latest_at = Column(DateTime, nullable=False)
+    latest_score = Column(Integer, nullable=False)
     
 class PlatformCache(Base):
     __tablename__ = "platform_cache"
@@ -31,11 +67,114 @@ class PlatformCache(Base):
     data = Column(Text)  # JSON data
     last_updated = Column(DateTime, default=datetime.utcnow)
     is_valid = Column(Boolean, default=True)
+    # Last time a request needed this entry (at most hourly resolution); the
+    # refresh worker keeps recently requested entries warm
+    last_requested = Column(DateTime)
+    
+    __table_args__ = (
+        # One row per handle, so writers can upsert on it
+        Index('ix_platform_cache_platform_username', 'platform', 'username', unique=True),
+        Index('ix_platform_cache_platform_requested', 'platform', 'last_requested'),
+    )
+
+class ParsedResume(Base):
+    __tablename__ = "parsed_resumes"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)
+    parser_version = Column(String, nullable=False)
+    result = Column(Text)  # JSON data
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        Index('ix_parsed_resumes_hash_version', 'content_hash', 'parser_version', unique=True),
+    )
+
+class ResumeJobRecord(Base):
+    """Status of a resume parsing job, readable from every worker process"""
+    __tablename__ = "resume_jobs"
+    
+    id = Column(String(32), primary_key=True)
+    resume_id = Column(String(64), nullable=False)
+    status = Column(String, nullable=False)  # queued | running | done | failed
+    result = Column(Text)  # JSON data
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime)
+
+# Database setup; DATABASE_URL may point at Postgres in production
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./placement_predictor.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
 
-# Database setup
-DATABASE_URL = "sqlite:///./placement_predictor.db"
-engine = create_engine(DATABASE_URL)
+def create_db_engine(url: str = DATABASE_URL):
+    """Engine tuned for concurrent readers and a background writer"""
+    if url.startswith("sqlite"):
+        # Sessions are used from worker threads, so allow cross-thread use
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+        
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            # WAL lets readers proceed while the writer commits
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=30000")
+            cursor.close()
+        
+        return engine
+    
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    )
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+def init_db():
+    """Create tables; called once at application startup"""
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    make_platform_cache_unique()
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def make_platform_cache_unique():
+    """Drop duplicate PlatformCache rows (keeping each handle's newest) and
+    the old non-unique index, so init_db recreates it as unique"""
+    indexes = {index['name']: index for index in inspect(engine).get_indexes(PlatformCache.__tablename__)}
+    index = indexes.get('ix_platform_cache_platform_username')
+    if index is None or index.get('unique'):
+        return
+    with engine.begin() as connection:
+        connection.execute(text(
+            'DELETE FROM platform_cache WHERE EXISTS ('
+            ' SELECT 1 FROM platform_cache AS newer'
+            ' WHERE newer.platform = platform_cache.platform AND newer.username = platform_cache.username'
+            ' AND (newer.last_updated > platform_cache.last_updated'
+            ' OR (newer.last_updated = platform_cache.last_updated AND newer.id > platform_cache.id)))'
+        ))
+        connection.execute(text('DROP INDEX ix_platform_cache_platform_username'))
+
+def add_missing_columns():
+    """Add columns introduced after a table was created (nullable ones only)"""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
\ No newline at end of file
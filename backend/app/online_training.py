@@ -0,0 +1,254 @@
+"""Online model refresh from reported placement outcomes.
+
+Runs next to the API as its own process, like app.refresher:
+
+    python -m app.online_training            # every ONLINE_TRAINING_INTERVAL seconds
+    python -m app.online_training --once
+
+A UserAnalysis row records what the models predicted, which is nothing new
+to learn from. It becomes a training example once the student's actual
+placement is reported for it (``POST /api/outcomes``). Each cycle takes the
+outcomes reported since the served bundle was built. When there are at least
+ONLINE_MIN_ROWS, copies of the served models are warm-started on them: the
+placement booster gets up to ONLINE_EXTRA_ROUNDS more rounds (an outcome
+needs a reported score to count for it) and the forest gets
+ONLINE_EXTRA_TREES more trees. The scaler is kept as it is, because the
+existing trees split on scaled values. ONLINE_REPLAY_ROWS synthetic rows are
+mixed into every batch. They stop the new trees from fitting only the few
+students with outcomes, and they make sure the forest sees every company
+type.
+
+A fixed share of outcome rows, chosen by row id, is never trained on. The
+refreshed models must score at least as well as the served ones on that
+holdout (within ONLINE_TOLERANCE) to be saved as a new bundle. The API
+workers then swap it in without a restart (see MODEL_RELOAD_INTERVAL in
+app.main).
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from . import synthetic
+from .model_bundle import current_bundle_path, load_bundle, prune_bundles, save_bundle
+from .predictor import COMPANY_TYPES, FEATURE_NAMES
+
+ONLINE_TRAINING_INTERVAL = float(os.getenv("ONLINE_TRAINING_INTERVAL", "3600"))
+# New outcomes (per model) needed before a refresh is attempted, and holdout
+# outcomes needed to validate one
+ONLINE_MIN_ROWS = int(os.getenv("ONLINE_MIN_ROWS", "200"))
+ONLINE_MIN_HOLDOUT = int(os.getenv("ONLINE_MIN_HOLDOUT", "50"))
+ONLINE_HOLDOUT_FRACTION = float(os.getenv("ONLINE_HOLDOUT_FRACTION", "0.2"))
+ONLINE_EXTRA_ROUNDS = int(os.getenv("ONLINE_EXTRA_ROUNDS", "50"))
+ONLINE_EXTRA_TREES = int(os.getenv("ONLINE_EXTRA_TREES", "20"))
+ONLINE_REPLAY_ROWS = int(os.getenv("ONLINE_REPLAY_ROWS", "2000"))
+# Allowed holdout regression: relative for placement MSE, absolute for
+# company accuracy
+ONLINE_TOLERANCE = float(os.getenv("ONLINE_TOLERANCE", "0.01"))
+# Bundles kept on disk; each refresh writes a new one
+ONLINE_KEEP_BUNDLES = int(os.getenv("ONLINE_KEEP_BUNDLES", "5"))
+# Fitting stays off the cores and CPU time the API workers need
+ONLINE_TRAINING_THREADS = int(os.getenv("ONLINE_TRAINING_THREADS", "1"))
+ONLINE_TRAINING_NICE = int(os.getenv("ONLINE_TRAINING_NICE", "10"))
+
+
+def record_outcome(user_id: str, company_type: str, placement_score: Optional[int] = None) -> Optional[int]:
+    """Attach a reported placement to the user's latest analysis; its id, or
+    None if the user has no analysis"""
+    from sqlalchemy import select
+
+    from .models import SessionLocal, UserAnalysis
+
+    with SessionLocal() as db:
+        analysis = db.execute(
+            select(UserAnalysis)
+            .where(UserAnalysis.user_id == user_id)
+            .order_by(UserAnalysis.created_at.desc(), UserAnalysis.id.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if analysis is None:
+            return None
+        analysis.outcome_company_type = company_type
+        analysis.outcome_score = placement_score
+        analysis.outcome_recorded_at = datetime.utcnow()
+        db.commit()
+        return analysis.id
+
+
+def load_outcomes():
+    """Every analysis with a reported outcome, as arrays: (ids, features,
+    scores with NaN where none was reported, company type indices,
+    recorded_at)"""
+    from sqlalchemy import select
+
+    from .models import SessionLocal, UserAnalysis
+
+    columns = [getattr(UserAnalysis, name) for name in FEATURE_NAMES]
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(UserAnalysis.id, *columns, UserAnalysis.outcome_score, UserAnalysis.outcome_company_type,
+                   UserAnalysis.outcome_recorded_at)
+            .where(UserAnalysis.outcome_company_type.in_(COMPANY_TYPES))
+            .order_by(UserAnalysis.id)
+        ).all()
+
+    n = len(FEATURE_NAMES)
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    X = np.array([[value or 0 for value in row[1:n + 1]] for row in rows], dtype=np.float64).reshape(-1, n)
+    scores = np.array([np.nan if row[n + 1] is None else row[n + 1] for row in rows], dtype=np.float64)
+    companies = np.array([COMPANY_TYPES.index(row[n + 2]) for row in rows], dtype=np.int64)
+    recorded_at = np.array([row[n + 3] or datetime.min for row in rows], dtype=object)
+    return ids, X, scores, companies, recorded_at
+
+
+def holdout_mask(ids: np.ndarray, fraction: float = ONLINE_HOLDOUT_FRACTION) -> np.ndarray:
+    """Rows kept out of training, always the same ones for a given id"""
+    return ((ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(1 << 32)) < fraction * (1 << 32)
+
+
+def evaluate(placement_model, company_model, scaler, X, scores, companies) -> dict:
+    """Placement MSE (rows with a reported score) and company accuracy"""
+    metrics = {}
+    if len(X):
+        X_scaled = scaler.transform(X)
+        scored = ~np.isnan(scores)
+        if scored.any():
+            errors = placement_model.predict(X_scaled[scored]) - scores[scored]
+            metrics['placement_mse'] = float(np.mean(errors ** 2))
+        metrics['company_accuracy'] = float(np.mean(company_model.predict(X_scaled) == companies))
+    return metrics
+
+
+def refresh_once(seed: Optional[int] = None) -> dict:
+    """One refresh attempt; the summary's ``status`` is skipped, rejected or
+    saved"""
+    from threadpoolctl import threadpool_limits
+
+    from .training import boosting_rounds, warm_start
+
+    base_path = current_bundle_path()
+    # Not memory-mapped: the models are extended in place
+    base = load_bundle(base_path, mmap=False)
+    previous = base.manifest.get('training', {}).get('online', {})
+    # Latest outcome each model has been refreshed with
+    through = dict(previous.get('outcomes_through', {}))
+
+    ids, X, scores, companies, recorded_at = load_outcomes()
+    holdout = holdout_mask(ids)
+    scored = ~np.isnan(scores)
+
+    def since(model: str) -> np.ndarray:
+        if model not in through:
+            return ~holdout
+        cutoff = datetime.fromisoformat(through[model])
+        return ~holdout & np.array([recorded > cutoff for recorded in recorded_at], dtype=bool)
+
+    new_scores = since('placement_model') & scored
+    new = since('company_model')
+    summary = {
+        'base_version': base.version,
+        'new_outcomes': int(new.sum()),
+        'new_scores': int(new_scores.sum()),
+        'holdout_outcomes': int(holdout.sum()),
+        'holdout_scores': int((holdout & scored).sum()),
+    }
+
+    # A model is refreshed only with enough new labels and a holdout to
+    # validate it on
+    refresh_placement = summary['new_scores'] >= ONLINE_MIN_ROWS and summary['holdout_scores'] >= ONLINE_MIN_HOLDOUT
+    refresh_company = summary['new_outcomes'] >= ONLINE_MIN_ROWS and summary['holdout_outcomes'] >= ONLINE_MIN_HOLDOUT
+    if not (refresh_placement or refresh_company):
+        return dict(summary, status='skipped', reason='not enough new or holdout outcomes')
+
+    seed = int(time.time()) if seed is None else seed
+    replay_X, replay_scores, replay_companies = synthetic.generate(ONLINE_REPLAY_ROWS, seed)
+    scaler = base.scaler
+    before = evaluate(base.placement_model, base.company_model, scaler,
+                      X[holdout], scores[holdout], companies[holdout])
+
+    started = time.perf_counter()
+    with threadpool_limits(ONLINE_TRAINING_THREADS):
+        if refresh_placement:
+            warm_start(base.placement_model,
+                       scaler.transform(np.concatenate([X[new_scores], replay_X])),
+                       np.concatenate([scores[new_scores], replay_scores]),
+                       ONLINE_EXTRA_ROUNDS)
+        if refresh_company:
+            warm_start(base.company_model,
+                       scaler.transform(np.concatenate([X[new], replay_X])),
+                       np.concatenate([companies[new], replay_companies]),
+                       ONLINE_EXTRA_TREES)
+    summary['fit_seconds'] = round(time.perf_counter() - started, 2)
+
+    after = evaluate(base.placement_model, base.company_model, scaler,
+                     X[holdout], scores[holdout], companies[holdout])
+    summary.update(holdout_before=before, holdout_after=after)
+    worse = []
+    if refresh_placement and after['placement_mse'] > before['placement_mse'] * (1 + ONLINE_TOLERANCE):
+        worse.append('placement_mse')
+    if refresh_company and after['company_accuracy'] < before['company_accuracy'] - ONLINE_TOLERANCE:
+        worse.append('company_accuracy')
+    if worse:
+        return dict(summary, status='rejected', reason=f"worse on the holdout: {', '.join(worse)}")
+    if current_bundle_path() != base_path:
+        return dict(summary, status='rejected', reason='the served bundle changed during the refresh')
+
+    if refresh_placement:
+        through['placement_model'] = max(recorded_at[new_scores]).isoformat()
+    if refresh_company:
+        through['company_model'] = max(recorded_at[new]).isoformat()
+    training = dict(base.manifest.get('training', {}))
+    training['online'] = {
+        'base_version': base.version,
+        'refreshed_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'refreshes': previous.get('refreshes', 0) + 1,
+        'outcomes_through': through,
+        'models': [name for name, refreshed in (('placement_model', refresh_placement),
+                                                ('company_model', refresh_company)) if refreshed],
+        'new_outcomes': summary['new_outcomes'],
+        'new_scores': summary['new_scores'],
+        'replay_rows': ONLINE_REPLAY_ROWS,
+        'replay_seed': seed,
+        'boosting_rounds': boosting_rounds(base.placement_model),
+        'forest_trees': len(getattr(base.company_model, 'estimators_', [])) or None,
+        'holdout_before': before,
+        'holdout_after': after,
+    }
+    path = save_bundle(base.placement_model, base.company_model, scaler, training=training)
+    summary['pruned'] = len(prune_bundles(ONLINE_KEEP_BUNDLES))
+    return dict(summary, status='saved', version=path.name)
+
+
+def run(interval: float = ONLINE_TRAINING_INTERVAL, once: bool = False):
+    from .models import init_db
+
+    init_db()
+    if ONLINE_TRAINING_NICE:
+        os.nice(ONLINE_TRAINING_NICE)
+    while True:
+        started = time.perf_counter()
+        try:
+            summary = refresh_once()
+            print(f"Model refresh {summary['status']}: " + ", ".join(
+                f"{key} {value}" for key, value in summary.items() if key != 'status'
+            ))
+        except Exception as e:
+            print(f"Error refreshing models: {e}")
+        if once:
+            return
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Refresh the served models from reported placement outcomes")
+    parser.add_argument("--interval", type=float, default=ONLINE_TRAINING_INTERVAL, help="seconds between cycles")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args(argv)
+    run(args.interval, args.once)
+
+
+if __name__ == "__main__":
+    main()
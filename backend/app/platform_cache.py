@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from .platforms import LOADERS, PLATFORM_NAMES, PlatformUserNotFound, default_data
+
+
+def _seconds(name: str, default: int) -> timedelta:
+    return timedelta(seconds=int(os.getenv(name, default)))
+
+
+# How long fetched stats are served without touching the upstream platform.
+# Ratings move after contests, solved counts and repos move more slowly.
+CACHE_TTLS = {
+    'leetcode': _seconds('LEETCODE_CACHE_TTL', 6 * 3600),
+    'codeforces': _seconds('CODEFORCES_CACHE_TTL', 3600),
+    'github': _seconds('GITHUB_CACHE_TTL', 6 * 3600),
+}
+# Past its TTL an entry is still served for this long while it is refreshed
+# in the background (stale-while-revalidate).
+STALE_GRACE = _seconds('PLATFORM_CACHE_STALE_GRACE', 24 * 3600)
+# Unknown usernames are remembered for this long
+NEGATIVE_TTL = _seconds('PLATFORM_CACHE_NEGATIVE_TTL', 15 * 60)
+LRU_SIZE = int(os.getenv('PLATFORM_CACHE_LRU_SIZE', 4096))
+# PlatformCache.last_requested is written at most this often per entry
+ACTIVITY_RESOLUTION = _seconds('PLATFORM_CACHE_ACTIVITY_RESOLUTION', 3600)
+
+CacheKey = Tuple[str, str]
+
+
+@dataclass
+class CacheEntry:
+    data: dict
+    fetched_at: datetime
+    found: bool = True
+    requested_at: Optional[datetime] = None
+
+    def age(self, now: datetime) -> timedelta:
+        return now - self.fetched_at
+
+    def ttl(self, platform: str) -> timedelta:
+        return CACHE_TTLS[platform] if self.found else NEGATIVE_TTL
+
+    def is_fresh(self, platform: str, now: datetime) -> bool:
+        return self.age(now) < self.ttl(platform)
+
+    def is_servable(self, platform: str, now: datetime) -> bool:
+        """Fresh, or stale but still inside the revalidation grace period"""
+        return self.age(now) < self.ttl(platform) + STALE_GRACE
+
+
+class LRUCache:
+    """Small in-process LRU map in front of the database tier"""
+
+    def __init__(self, maxsize: int = LRU_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: CacheKey, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_lru = LRUCache()
+# Loads in progress, foreground or background; concurrent lookups of the same
+# handle share one upstream call
+_inflight: Dict[CacheKey, asyncio.Task] = {}
+_activity_writes = set()
+
+
+def cache_key(platform: str, username: str) -> CacheKey:
+    """Handles are case-insensitive on every supported platform"""
+    return platform, username.strip().lower()
+
+
+def _read_db(key: CacheKey) -> Optional[CacheEntry]:
+    from .models import PlatformCache, SessionLocal
+
+    platform, username = key
+    with SessionLocal() as db:
+        row = (
+            db.query(PlatformCache)
+            .filter(PlatformCache.platform == platform, PlatformCache.username == username)
+            .order_by(PlatformCache.last_updated.desc())
+            .first()
+        )
+        if row is None:
+            return None
+        return CacheEntry(data=json.loads(row.data), fetched_at=row.last_updated, found=row.is_valid,
+                          requested_at=row.last_requested)
+
+
+def _write_db(key: CacheKey, entry: CacheEntry):
+    from .models import PlatformCache, SessionLocal
+
+    platform, username = key
+    values = {
+        'platform': platform,
+        'username': username,
+        'data': json.dumps(entry.data),
+        'last_updated': entry.fetched_at,
+        'is_valid': entry.found,
+    }
+    if entry.requested_at is not None:
+        values['last_requested'] = entry.requested_at
+    with SessionLocal() as db:
+        dialect = db.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            # One statement, so concurrent writers of the same handle cannot
+            # both miss the row and insert it twice
+            statement = insert(PlatformCache).values(**values)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=['platform', 'username'],
+                set_={name: statement.excluded[name] for name in values if name not in ('platform', 'username')},
+            ))
+        else:
+            # Other databases: read-modify-write; the unique index turns a
+            # lost race into an IntegrityError instead of a duplicate
+            row = (
+                db.query(PlatformCache)
+                .filter(PlatformCache.platform == platform, PlatformCache.username == username)
+                .first()
+            )
+            if row is None:
+                row = PlatformCache(username=username, platform=platform)
+                db.add(row)
+            for name, value in values.items():
+                setattr(row, name, value)
+        db.commit()
+
+
+def _write_requested(key: CacheKey, requested_at: datetime):
+    from .models import PlatformCache, SessionLocal
+
+    platform, username = key
+    with SessionLocal() as db:
+        (
+            db.query(PlatformCache)
+            .filter(PlatformCache.platform == platform, PlatformCache.username == username)
+            .update({PlatformCache.last_requested: requested_at}, synchronize_session=False)
+        )
+        db.commit()
+
+
+async def _load(key: CacheKey, username: str) -> Optional[CacheEntry]:
+    """Fetch from the platform and store the result in both tiers.
+
+    Returns None on transient errors, which are never cached.
+    """
+    platform = key[0]
+    # Loads here are always on behalf of a request
+    try:
+        entry = CacheEntry(data=await LOADERS[platform](username), fetched_at=datetime.utcnow(),
+                           requested_at=datetime.utcnow())
+    except PlatformUserNotFound:
+        entry = CacheEntry(data=default_data(platform), fetched_at=datetime.utcnow(), found=False,
+                           requested_at=datetime.utcnow())
+    except Exception as e:
+        print(f"Error fetching {PLATFORM_NAMES[platform]} data: {e}")
+        return None
+
+    _lru.put(key, entry)
+    try:
+        await asyncio.to_thread(_write_db, key, entry)
+    except Exception as e:
+        print(f"Error writing platform cache: {e}")
+    return entry
+
+
+def _start_load(key: CacheKey, username: str) -> asyncio.Task:
+    """The load in progress for ``key``, or a new one"""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_load(key, username))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return task
+
+
+def _touch(key: CacheKey, entry: CacheEntry, now: datetime):
+    """Record that a request used ``entry``, in the background and at most
+    once per ACTIVITY_RESOLUTION"""
+    if entry.requested_at is not None and now - entry.requested_at < ACTIVITY_RESOLUTION:
+        return
+    entry.requested_at = now
+
+    async def write():
+        try:
+            await asyncio.to_thread(_write_requested, key, now)
+        except Exception as e:
+            print(f"Error writing platform cache activity: {e}")
+
+    task = asyncio.create_task(write())
+    _activity_writes.add(task)
+    task.add_done_callback(_activity_writes.discard)
+
+
+async def get_platform_data(platform: str, username: str) -> dict:
+    """Read-through lookup: in-process LRU, then PlatformCache, then the platform"""
+    key = cache_key(platform, username)
+    now = datetime.utcnow()
+
+    entry = _lru.get(key)
+    if entry is None or not entry.is_fresh(platform, now):
+        # Also re-read a stale entry: the refresh worker may have renewed it
+        try:
+            stored = await asyncio.to_thread(_read_db, key)
+        except Exception as e:
+            print(f"Error reading platform cache: {e}")
+            stored = None
+        if stored is not None and (entry is None or stored.fetched_at > entry.fetched_at):
+            if entry is not None and entry.requested_at is not None:
+                stored.requested_at = max(entry.requested_at, stored.requested_at or entry.requested_at)
+            entry = stored
+            _lru.put(key, entry)
+
+    if entry is not None and entry.is_fresh(platform, now):
+        _touch(key, entry, now)
+        return dict(entry.data)
+
+    if entry is not None and entry.is_servable(platform, now):
+        _start_load(key, username.strip())
+        return dict(entry.data)
+
+    # Shielded: one caller giving up must not cancel the load for the others
+    fresh = await asyncio.shield(_start_load(key, username.strip()))
+    if fresh is not None:
+        return dict(fresh.data)
+    # Upstream is failing; an expired entry still beats zeros
+    if entry is not None:
+        return dict(entry.data)
+    return default_data(platform)
+
+
+def clear_memory_cache():
+    """Drop the in-process tier (the database tier is left intact)"""
+    _lru.clear()
@@ -0,0 +1,415 @@
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+import orjson
+
+from .metrics import UPSTREAM_ERRORS, span
+from .upstream import GITHUB_TOKENS, RateLimited, build_guards
+
+if TYPE_CHECKING:
+    import httpx
+
+# Per-call timeout for a single upstream request, and the overall deadline for
+# fetching every platform of one profile.
+PLATFORM_TIMEOUT = float(os.getenv("PLATFORM_TIMEOUT", "10"))
+PLATFORM_FETCH_DEADLINE = float(os.getenv("PLATFORM_FETCH_DEADLINE", "12"))
+
+# Upstream endpoints; overridable to point at mirrors or local stubs
+LEETCODE_GRAPHQL_URL = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
+CODEFORCES_API_URL = os.getenv("CODEFORCES_API_URL", "https://codeforces.com/api")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{GITHUB_API_URL}/graphql")
+
+# Repositories are listed 100 per page, pages fetched concurrently; stars of
+# repositories past the last page are not counted
+GITHUB_REPOS_PER_PAGE = 100
+GITHUB_MAX_REPO_PAGES = int(os.getenv("GITHUB_MAX_REPO_PAGES", "10"))
+# Totals from one GraphQL query (per 100 repositories) instead of REST;
+# needs GITHUB_TOKENS
+GITHUB_GRAPHQL = os.getenv("GITHUB_GRAPHQL", "0") == "1"
+# Last ETag and parsed result per GitHub REST URL, for conditional requests
+GITHUB_ETAG_CACHE_SIZE = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "4096"))
+
+LEETCODE_QUERY = """
+query getUserProfile($username: String!) {
+    matchedUser(username: $username) {
+        submitStats: submitStatsGlobal {
+            acSubmissionNum {
+                difficulty
+                count
+            }
+        }
+        profile {
+            ranking
+        }
+    }
+}
+"""
+
+GITHUB_USER_QUERY = """
+query getUser($login: String!, $cursor: String) {
+    user(login: $login) {
+        followers { totalCount }
+        following { totalCount }
+        repositories(ownerAffiliations: OWNER, privacy: PUBLIC, first: 100, after: $cursor) {
+            totalCount
+            pageInfo { hasNextPage endCursor }
+            nodes { stargazerCount }
+        }
+    }
+}
+"""
+
+# Values returned when a platform cannot be reached or the user is unknown
+DEFAULT_PLATFORM_DATA = {
+    'leetcode': {'problems_solved': 0, 'ranking': 0},
+    'codeforces': {'rating': 0, 'max_rating': 0, 'rank': 'unrated'},
+    'github': {'public_repos': 0, 'followers': 0, 'following': 0, 'total_stars': 0},
+}
+
+_client: Optional["httpx.AsyncClient"] = None
+
+
+class PlatformUserNotFound(Exception):
+    """The platform answered, but has no user with that handle"""
+
+
+def _is_timeout(error: BaseException) -> bool:
+    # httpx is already imported by get_client once a call has failed
+    import httpx
+
+    return isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError))
+
+
+# Rate limiter and circuit breaker per platform; see upstream.py
+GUARDS = build_guards(expected=(PlatformUserNotFound,), is_timeout=_is_timeout)
+
+
+def get_client() -> "httpx.AsyncClient":
+    """Return the shared, connection-pooled HTTP client"""
+    global _client
+    if _client is None or _client.is_closed:
+        # Imported lazily to keep app import light
+        import httpx
+
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(PLATFORM_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
+            headers={'User-Agent': 'placement-predictor/1.0'},
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared HTTP client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def default_data(platform: str) -> dict:
+    """Fresh copy of the fallback data for a platform"""
+    return dict(DEFAULT_PLATFORM_DATA[platform])
+
+
+def _check_rate_limit(response: "httpx.Response"):
+    if response.status_code == 429:
+        raise RateLimited(f"{response.url.host} answered 429")
+
+
+async def load_leetcode_data(username: str) -> dict:
+    """Load LeetCode user data, raising on any failure"""
+    async with GUARDS['leetcode'].call():
+        response = await get_client().post(LEETCODE_GRAPHQL_URL, json={
+            'query': LEETCODE_QUERY,
+            'variables': {'username': username}
+        })
+        _check_rate_limit(response)
+        response.raise_for_status()
+
+    user_data = (response.json().get('data') or {}).get('matchedUser')
+    if not user_data:
+        raise PlatformUserNotFound(username)
+
+    total_solved = sum(
+        item['count'] for item in
+        user_data.get('submitStats', {}).get('acSubmissionNum', [])
+    )
+    return {
+        'problems_solved': total_solved,
+        'ranking': (user_data.get('profile') or {}).get('ranking', 0) or 0
+    }
+
+
+_CODEFORCES_NOT_FOUND = re.compile(r'User with handle (\S+) not found')
+
+
+async def load_codeforces_users(handles: Sequence[str]) -> Dict[str, dict]:
+    """Load several Codeforces users with one call, keyed by lowercased handle.
+
+    Raises PlatformUserNotFound with the first unknown handle.
+    """
+    async with GUARDS['codeforces'].call():
+        response = await get_client().get(
+            f"{CODEFORCES_API_URL}/user.info", params={'handles': ';'.join(handles)}
+        )
+        _check_rate_limit(response)
+        data = response.json()
+        # Codeforces reports unknown handles as a 400 with status FAILED, and
+        # its own rate limit as a 503 with "Call limit exceeded"
+        comment = data.get('comment', '')
+        if data.get('status') == 'FAILED' and 'not found' in comment:
+            match = _CODEFORCES_NOT_FOUND.search(comment)
+            raise PlatformUserNotFound(match.group(1) if match else ';'.join(handles))
+        if 'limit exceeded' in comment.lower():
+            raise RateLimited(comment)
+        response.raise_for_status()
+
+    return {
+        user['handle'].lower(): {
+            'rating': user.get('rating', 0),
+            'max_rating': user.get('maxRating', 0),
+            'rank': user.get('rank', 'unrated')
+        }
+        for user in data['result']
+    }
+
+
+async def load_codeforces_data(username: str) -> dict:
+    """Load Codeforces user data, raising on any failure"""
+    users = await load_codeforces_users([username])
+    return users.get(username.lower()) or next(iter(users.values()))
+
+
+# In a JSON document this can only match an object key, never text inside
+# a string (where quotes are escaped)
+_STARGAZERS_COUNT = re.compile(rb'"stargazers_count":\s*(\d+)')
+_github_etags: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+
+
+async def _read_user(response: "httpx.Response") -> dict:
+    user = orjson.loads(await response.aread())
+    return {name: user.get(name, 0) for name in ('public_repos', 'followers', 'following')}
+
+
+async def _sum_stars(response: "httpx.Response") -> int:
+    """Sum stargazers_count over a repository listing as it streams in,
+    without building the repository objects"""
+    stars, tail = 0, b''
+    async for chunk in response.aiter_bytes():
+        buffer = tail + chunk
+        end = 0
+        for match in _STARGAZERS_COUNT.finditer(buffer):
+            # A match touching the end may still have digits to come
+            if match.end() == len(buffer):
+                break
+            stars += int(match.group(1))
+            end = match.end()
+        # Keep enough to complete a key cut off at the chunk boundary
+        tail = buffer[max(end, len(buffer) - 64):]
+    match = _STARGAZERS_COUNT.search(tail)
+    return stars + (int(match.group(1)) if match and match.end() == len(tail) else 0)
+
+
+async def _github_get(url: str, parse: Callable[["httpx.Response"], Awaitable], params: Optional[dict] = None):
+    """GET a GitHub REST resource and ``parse`` the response.
+
+    Requests are conditional on the ETag of the last response for the same
+    URL; an unchanged resource answers 304 (free of quota when authenticated)
+    and the memoized result is returned.
+    """
+    key = f"{url}?{urlencode(params or {})}"
+    cached = _github_etags.get(key)
+    headers = {'Accept': 'application/vnd.github.v3+json'}
+    if cached is not None:
+        headers['If-None-Match'] = cached[0]
+
+    guard = GUARDS['github']
+    async with guard.call() as token:
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        async with get_client().stream('GET', url, params=params, headers=headers) as response:
+            _sync_github_quota(token, response)
+            if response.status_code == 304 and cached is not None:
+                if token:
+                    # Authenticated 304s do not count against the quota
+                    guard.limiter.refund(token)
+                _github_etags.move_to_end(key)
+                return cached[1]
+            if response.status_code == 404:
+                raise PlatformUserNotFound(url)
+            response.raise_for_status()
+            result = await parse(response)
+
+    etag = response.headers.get('ETag')
+    if etag:
+        _github_etags[key] = (etag, result)
+        _github_etags.move_to_end(key)
+        while len(_github_etags) > GITHUB_ETAG_CACHE_SIZE:
+            _github_etags.popitem(last=False)
+    return result
+
+
+async def load_github_data(username: str) -> dict:
+    """Load GitHub user data, raising on any failure"""
+    if GITHUB_GRAPHQL and GITHUB_TOKENS:
+        return await load_github_data_graphql(username)
+
+    user_url = f"{GITHUB_API_URL}/users/{username}"
+    repos_url = f"{user_url}/repos"
+
+    def page(number: int) -> dict:
+        return {'per_page': GITHUB_REPOS_PER_PAGE, 'page': number}
+
+    # The first repository page is requested along with the user; the user's
+    # repository count then says how many more pages to request at once
+    user, stars = await asyncio.gather(
+        _github_get(user_url, _read_user),
+        _github_get(repos_url, _sum_stars, page(1)),
+    )
+    pages = min(GITHUB_MAX_REPO_PAGES, -(-user['public_repos'] // GITHUB_REPOS_PER_PAGE))
+    stars += sum(await asyncio.gather(*(
+        _github_get(repos_url, _sum_stars, page(number)) for number in range(2, pages + 1)
+    )))
+    return {**user, 'total_stars': stars}
+
+
+async def load_github_data_graphql(username: str) -> dict:
+    """Load GitHub user data with the GraphQL API, one query per 100 repositories"""
+    guard = GUARDS['github']
+    stars, cursor = 0, None
+    for _ in range(GITHUB_MAX_REPO_PAGES):
+        async with guard.call() as token:
+            response = await get_client().post(
+                GITHUB_GRAPHQL_URL,
+                json={'query': GITHUB_USER_QUERY, 'variables': {'login': username, 'cursor': cursor}},
+                headers={'Authorization': f'Bearer {token}'},
+            )
+            _sync_github_quota(token, response)
+            response.raise_for_status()
+            data = response.json()
+
+        user = (data.get('data') or {}).get('user')
+        if user is None:
+            errors = data.get('errors') or []
+            if any(error.get('type') == 'NOT_FOUND' for error in errors):
+                raise PlatformUserNotFound(username)
+            raise RuntimeError(f"GitHub GraphQL error: {errors}")
+        repositories = user['repositories']
+        stars += sum(node['stargazerCount'] for node in repositories['nodes'])
+        if not repositories['pageInfo']['hasNextPage']:
+            break
+        cursor = repositories['pageInfo']['endCursor']
+
+    return {
+        'public_repos': repositories['totalCount'],
+        'followers': user['followers']['totalCount'],
+        'following': user['following']['totalCount'],
+        'total_stars': stars,
+    }
+
+
+def _sync_github_quota(token: Optional[str], response: "httpx.Response"):
+    """Track GitHub's reported quota; an exhausted one blocks the credential"""
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    reset = response.headers.get('X-RateLimit-Reset')
+    if remaining is None or reset is None:
+        return
+    GUARDS['github'].limiter.sync(token, int(remaining), float(reset))
+    if response.status_code in (403, 429) and int(remaining) == 0:
+        raise RateLimited("GitHub rate limit exhausted")
+
+
+LOADERS = {
+    'leetcode': load_leetcode_data,
+    'codeforces': load_codeforces_data,
+    'github': load_github_data,
+}
+
+PLATFORM_NAMES = {'leetcode': 'LeetCode', 'codeforces': 'Codeforces', 'github': 'GitHub'}
+
+
+async def fetch_platform(platform: str, username: str) -> dict:
+    """Fetch one platform, falling back to default data on any failure"""
+    try:
+        return await LOADERS[platform](username)
+    except PlatformUserNotFound:
+        pass
+    except Exception as e:
+        print(f"Error fetching {PLATFORM_NAMES[platform]} data: {e}")
+
+    return default_data(platform)
+
+
+async def fetch_leetcode_data(username: str) -> dict:
+    """Fetch LeetCode user data"""
+    return await fetch_platform('leetcode', username)
+
+
+async def fetch_codeforces_data(username: str) -> dict:
+    """Fetch Codeforces user data"""
+    return await fetch_platform('codeforces', username)
+
+
+async def fetch_github_data(username: str) -> dict:
+    """Fetch GitHub user data"""
+    return await fetch_platform('github', username)
+
+
+def upstream_stats() -> Dict[str, dict]:
+    """Rate limiter and circuit breaker state per platform"""
+    return {platform: guard.stats() for platform, guard in GUARDS.items()}
+
+
+PlatformFetch = Callable[[str, str], Awaitable[dict]]
+
+
+async def fetch_all(
+    usernames: Dict[str, str],
+    deadline: float = PLATFORM_FETCH_DEADLINE,
+    fetch: PlatformFetch = fetch_platform,
+) -> Dict[str, dict]:
+    """Fetch every platform with a username in parallel.
+
+    Platforms that have not answered when the deadline expires are cancelled
+    and reported with their default data, so the total latency is bounded by
+    the slowest platform (or the deadline), not by the sum of all of them.
+    """
+    async def timed_fetch(platform: str, username: str) -> dict:
+        with span(f'fetch.{platform}'):
+            return await fetch(platform, username)
+
+    tasks = {
+        platform: asyncio.create_task(timed_fetch(platform, username))
+        for platform, username in usernames.items()
+        if username
+    }
+    if not tasks:
+        return {}
+
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    # Let the cancelled fetches unwind (close responses, release limiter
+    # slots) before the request returns
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    results = {}
+    for platform, task in tasks.items():
+        if task in done and task.exception() is None:
+            results[platform] = task.result()
+        else:
+            if task in pending:
+                print(f"Timed out fetching {platform} data after {deadline}s")
+                UPSTREAM_ERRORS.labels(platform, 'deadline').inc()
+            results[platform] = default_data(platform)
+    return results
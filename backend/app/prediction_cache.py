@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from .schemas import UserProfile
+
+# Identical profiles are answered from memory for this long; platform stats
+# behind a cached prediction are at most this much older than the platform
+# cache would serve them
+PREDICTION_CACHE = os.getenv("PREDICTION_CACHE", "1") == "1"
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "600"))
+PREDICTION_CACHE_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Platform handles are case-insensitive (see platform_cache.cache_key)
+HANDLE_FIELDS = ('leetcode_username', 'codeforces_username', 'codechef_username',
+                 'github_username', 'hackerrank_username')
+LIST_FIELDS = ('skills', 'preferred_countries')
+
+CacheKey = Tuple[str, str]
+
+
+def normalized_profile(profile: UserProfile) -> dict:
+    """The fields a prediction depends on, in canonical form.
+
+    ``user_id`` only says who asked, so it is left out; handles are trimmed
+    and lowercased, list fields trimmed and sorted. Nothing is normalized
+    that could change the prediction (e.g. the number of skills).
+    """
+    data = profile.model_dump(exclude={'user_id'})
+    for name in HANDLE_FIELDS:
+        data[name] = (data[name] or '').strip().lower()
+    for name in LIST_FIELDS:
+        data[name] = sorted(item.strip() for item in data[name])
+    return data
+
+
+def profile_key(profile: UserProfile, model_version: str) -> CacheKey:
+    digest = hashlib.sha256(orjson.dumps(normalized_profile(profile), option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return model_version, digest
+
+
+def _sizeof(value) -> int:
+    """Approximate deep size of a cached value"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(_sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    elif hasattr(value, '__dict__'):
+        size += _sizeof(vars(value))
+    return size
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class PredictionCache:
+    """Prediction results keyed by (model version, normalized profile hash).
+
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted once their approximate size passes ``max_bytes``. A lookup under
+    a new model version drops every entry of the old one. Concurrent misses
+    for the same key share a single computation.
+    """
+
+    def __init__(self, ttl: float = PREDICTION_CACHE_TTL, max_bytes: int = PREDICTION_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.model_version: Optional[str] = None
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self.bytes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, model_version: str):
+        if model_version != self.model_version:
+            if self.model_version is not None:
+                self.invalidations += 1
+            self.clear()
+            self.model_version = model_version
+
+    def get(self, key: CacheKey):
+        """The cached value, or None if missing or expired"""
+        self._check_version(key[0])
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def put(self, key: CacheKey, value):
+        if key[0] != self.model_version:
+            # Computed with a bundle that has since been replaced
+            return
+        if key in self._entries:
+            self._remove(key)
+        entry = _Entry(value, time.monotonic() + self.ttl, _sizeof(key) + _sizeof(value))
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey):
+        self.bytes -= self._entries.pop(key).size
+
+    async def get_or_compute(self, key: CacheKey, compute: Callable[[], Awaitable]):
+        """Cached value for ``key``, else the result of ``compute()``, which
+        runs once however many callers miss on the key at the same time.
+
+        Failures are not cached; every waiting caller sees the exception.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # One caller going away must not cancel the others' computation
+        return await asyncio.shield(task)
+
+    def _finish(self, key: CacheKey, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'model_version': self.model_version,
+            'entries': len(self._entries),
+            'memory_bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_ratio': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            'in_flight': len(self._inflight),
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
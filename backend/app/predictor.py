@@ -0,0 +1,279 @@
+import io
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import rules
+from .metrics import span
+from .schemas import PlatformData, PredictionResponse, UserProfile
+
+# Column order expected by the scaler and both models
+FEATURE_NAMES = [
+    'cgpa',
+    'leetcode_problems',
+    'codeforces_rating',
+    'project_count',
+    'skills_count',
+    'work_experience',
+]
+
+# Class order of company_model.predict_proba
+COMPANY_TYPES = ['Service-based', 'Product-based', 'Startup', 'FAANG']
+
+# Maps a raw feature matrix to (overall scores, company type probabilities)
+ScoreFn = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+def platform_data_from_results(results: Dict[str, dict]) -> PlatformData:
+    """Map raw per-platform fetch results onto PlatformData"""
+    platform_data = PlatformData()
+
+    if 'leetcode' in results:
+        platform_data.leetcode_problems = results['leetcode']['problems_solved']
+        platform_data.leetcode_rating = results['leetcode']['ranking']
+
+    if 'codeforces' in results:
+        platform_data.codeforces_rating = results['codeforces']['rating']
+
+    if 'github' in results:
+        platform_data.github_repos = results['github']['public_repos']
+        platform_data.github_followers = results['github']['followers']
+
+    return platform_data
+
+
+def build_feature_matrix(profiles: Sequence[UserProfile], platform_data: Sequence[PlatformData]) -> np.ndarray:
+    """Assemble the (n_students, 6) model input in FEATURE_NAMES order"""
+    return np.array([
+        [
+            profile.cgpa,
+            data.leetcode_problems,
+            data.codeforces_rating,
+            profile.project_count,
+            len(profile.skills),
+            profile.work_experience,
+        ]
+        for profile, data in zip(profiles, platform_data)
+    ], dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+
+
+def score_features(features: np.ndarray, placement_model, company_model, scaler):
+    """Run the scaler and both models once over a whole feature matrix.
+
+    Returns the integer overall scores and the (n_students, 4) company type
+    probabilities.
+    """
+    with span('scaler.transform'):
+        features_scaled = scaler.transform(features)
+    with span('placement.predict'):
+        scores = placement_model.predict(features_scaled).astype(int)
+    with span('company.predict_proba'):
+        company_probs = company_model.predict_proba(features_scaled)
+    return scores, company_probs
+
+
+def prediction_payload(
+    profile: UserProfile,
+    platform_data: PlatformData,
+    overall_score: int,
+    company_type_prob: Iterable[float],
+    mask: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Turn model outputs for one student into a response document.
+
+    The result has the JSON shape of PredictionResponse (or, with ``compact``,
+    CompactPredictionResponse) and is built without validation, to be
+    serialized as-is. Everything but the match percentages comes from the
+    precompiled rule table; pass ``mask`` when it was already computed for a
+    whole batch.
+    """
+    if mask is None:
+        mask = rules.student_mask(profile, platform_data, overall_score)
+    fragments = rules.TABLE[mask]
+
+    if compact:
+        company_matches = [
+            {'type': company_type, 'match_percentage': int(prob * 100)}
+            for company_type, prob in zip(COMPANY_TYPES, company_type_prob)
+        ]
+    else:
+        company_matches = [
+            {
+                'type': company_type,
+                'match_percentage': int(prob * 100),
+                'description': rules.COMPANY_DESCRIPTIONS[company_type],
+                'requirements': rules.COMPANY_REQUIREMENTS[company_type],
+                'suggestions': fragments.suggestions,
+            }
+            for company_type, prob in zip(COMPANY_TYPES, company_type_prob)
+        ]
+    # Sort by match percentage
+    company_matches.sort(key=lambda x: x['match_percentage'], reverse=True)
+
+    if compact:
+        return {
+            'catalog_version': rules.CATALOG_VERSION,
+            'overall_score': overall_score,
+            'company_matches': company_matches,
+            'suggestions': fragments.suggestion_ids,
+            'focus_areas': fragments.focus_area_ids,
+            'strengths': fragments.strength_ids,
+            'course_recommendations': fragments.course_ids,
+            'international_opportunities': rules.international_opportunities(overall_score, compact=True),
+            'linkedin_insights': rules.LINKEDIN_INSIGHTS_ID if profile.linkedin_profile else None,
+        }
+    return {
+        'overall_score': overall_score,
+        'company_matches': company_matches,
+        'focus_areas': fragments.focus_areas,
+        'strengths': fragments.strengths,
+        'course_recommendations': fragments.course_recommendations,
+        'international_opportunities': rules.international_opportunities(overall_score),
+        'linkedin_insights': rules.LINKEDIN_INSIGHTS if profile.linkedin_profile else None,
+    }
+
+
+def build_prediction_response(
+    profile: UserProfile,
+    platform_data: PlatformData,
+    overall_score: int,
+    company_type_prob: Iterable[float],
+    mask: Optional[int] = None,
+) -> PredictionResponse:
+    """Model outputs for one student as a validated PredictionResponse"""
+    return PredictionResponse.model_validate(
+        prediction_payload(profile, platform_data, overall_score, company_type_prob, mask)
+    )
+
+
+def iter_batch_payloads(
+    profiles: Sequence[UserProfile],
+    platform_data: Sequence[PlatformData],
+    score_fn: ScoreFn,
+    features: Optional[np.ndarray] = None,
+    on_scored: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+    compact: bool = False,
+) -> Iterator[dict]:
+    """Score every student in one vectorized pass, then build response
+    documents (see prediction_payload) lazily.
+
+    Inference runs eagerly, so model errors surface here rather than midway
+    through a streamed response. ``on_scored`` receives the raw scores and
+    company probabilities once inference is done.
+    """
+    if features is None:
+        features = build_feature_matrix(profiles, platform_data)
+    if len(features) == 0:
+        return iter(())
+    scores, company_probs = score_fn(features)
+    if on_scored is not None:
+        on_scored(scores, company_probs)
+    has_linkedin = np.fromiter((bool(profile.linkedin_profile) for profile in profiles), dtype=bool, count=len(profiles))
+    masks = rules.batch_masks(features, FEATURE_NAMES, has_linkedin, scores)
+    return (
+        prediction_payload(profile, data, int(score), probs, int(mask), compact)
+        for profile, data, score, probs, mask in zip(profiles, platform_data, scores, company_probs, masks)
+    )
+
+
+def iter_batch_predictions(
+    profiles: Sequence[UserProfile],
+    platform_data: Sequence[PlatformData],
+    score_fn: ScoreFn,
+    features: Optional[np.ndarray] = None,
+    on_scored: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+) -> Iterator[PredictionResponse]:
+    """iter_batch_payloads, validated into PredictionResponse objects"""
+    payloads = iter_batch_payloads(profiles, platform_data, score_fn, features, on_scored)
+    return (PredictionResponse.model_validate(payload) for payload in payloads)
+
+
+def analysis_user_id(profile: UserProfile) -> Optional[str]:
+    """Who an analysis belongs to: the explicit user_id, else a platform handle"""
+    return profile.user_id or profile.github_username or profile.leetcode_username \
+        or profile.codeforces_username or None
+
+
+def analysis_rows(
+    profiles: Sequence[UserProfile],
+    platform_data: Sequence[PlatformData],
+    scores: Sequence,
+    company_probs: np.ndarray,
+) -> List[dict]:
+    """UserAnalysis rows (as plain dicts, for bulk insert) for scored students"""
+    company_types = np.asarray(COMPANY_TYPES)[np.argmax(company_probs, axis=1)] if len(scores) else []
+    return [
+        {
+            'user_id': analysis_user_id(profile),
+            'cgpa': profile.cgpa,
+            'leetcode_problems': data.leetcode_problems,
+            'codeforces_rating': data.codeforces_rating,
+            'github_repos': data.github_repos,
+            'project_count': profile.project_count,
+            'skills_count': len(profile.skills),
+            'work_experience': profile.work_experience,
+            'overall_score': int(score),
+            'predicted_company_type': str(company_type),
+        }
+        for profile, data, score, company_type in zip(profiles, platform_data, scores, company_types)
+    ]
+
+
+def predict_batch(
+    profiles: Sequence[UserProfile],
+    platform_data: Sequence[PlatformData],
+    score_fn: ScoreFn,
+) -> List[PredictionResponse]:
+    """Python API for batch scoring; see iter_batch_predictions"""
+    return list(iter_batch_predictions(profiles, platform_data, score_fn))
+
+
+def read_profile_table(content: bytes, filename: str):
+    """Read an uploaded CSV or Parquet file of student profiles"""
+    import pandas as pd
+
+    try:
+        if filename.lower().endswith('.parquet'):
+            return pd.read_parquet(io.BytesIO(content))
+        return pd.read_csv(io.BytesIO(content))
+    except Exception as e:
+        raise ValueError(f"could not read {filename or 'upload'}: {e}")
+
+
+def profiles_from_frame(frame):
+    """Convert a profile table into UserProfiles and, if present, PlatformData.
+
+    List columns (``skills``, ``preferred_countries``) are ``;``-separated.
+    PlatformData is only returned when the table has at least one of its
+    columns; otherwise the caller is expected to fetch it.
+    """
+    if 'cgpa' not in frame.columns:
+        raise ValueError("missing required column 'cgpa'")
+
+    profile_fields = set(UserProfile.model_fields)
+    platform_fields = [name for name in PlatformData.model_fields if name in frame.columns]
+    frame = frame.astype(object).where(frame.notna(), None)
+
+    profiles = []
+    for record in frame.to_dict('records'):
+        values = {k: v for k, v in record.items() if k in profile_fields and v is not None}
+        for list_field in ('skills', 'preferred_countries'):
+            if isinstance(values.get(list_field), str):
+                values[list_field] = [item.strip() for item in values[list_field].split(';') if item.strip()]
+        for text_field, field in UserProfile.model_fields.items():
+            if field.annotation is Optional[str] and text_field in values:
+                values[text_field] = str(values[text_field])
+        try:
+            profiles.append(UserProfile(**values))
+        except Exception as e:
+            raise ValueError(f"row {len(profiles)}: {e}")
+
+    if not platform_fields:
+        return profiles, None
+
+    platform_data = [
+        PlatformData(**{k: int(record[k] or 0) for k in platform_fields})
+        for record in frame[platform_fields].to_dict('records')
+    ]
+    return profiles, platform_data
@@ -0,0 +1,176 @@
+"""Opt-in sampling profiler for individual API requests.
+
+Off by default, and then not even installed as middleware. With
+PROFILE_SAMPLE_RATE > 0 that fraction of ``/api/`` requests is profiled;
+with PROFILE_HEADER=1 a request can ask for it with ``X-Profile: 1``. At
+most one request is profiled at a time.
+
+While a profiled request is in flight, a background thread samples every
+thread's stack each PROFILE_INTERVAL_MS. Samples are folded into the
+collapsed-stack format read by flamegraph.pl, speedscope and similar tools,
+with a root frame saying where the time went:
+
+- ``request``: the profiled request's own code, running on the event loop
+- ``event_loop``: other requests and tasks on the loop, or ``event_loop;idle``
+  while it waits for I/O (e.g. the profiled request awaiting upstream calls)
+- the thread name, for work on other threads (inference, database writes)
+
+Idle worker threads are left out. The last PROFILE_KEEP profiles are kept
+in memory; the response carries ``X-Profile-Id``.
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILING = PROFILE_SAMPLE_RATE > 0 or PROFILE_HEADER
+
+# Leaf frames of a thread blocked waiting for work or I/O (executor workers
+# block inside _worker, on a queue implemented in C)
+IDLE_FRAMES = {('threading.py', 'wait'), ('selectors.py', 'select'), ('queue.py', 'get'), ('thread.py', '_worker')}
+
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    started_at: datetime
+    seconds: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    def summary(self) -> dict:
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'started_at': self.started_at.isoformat(),
+            'seconds': round(self.seconds, 4),
+            'samples': self.samples,
+        }
+
+    def collapsed(self) -> str:
+        """One ``frame;frame;...;leaf count`` line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_profiles: "OrderedDict[str, Profile]" = OrderedDict()
+_active = threading.Lock()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    # co_qualname (Class.method) is Python 3.11+
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler(threading.Thread):
+    """Samples every thread's stack until stopped, attributing event loop
+    samples to the request while ``marker`` is on the stack"""
+
+    def __init__(self, profile: Profile, marker, loop_thread: int, interval: float = PROFILE_INTERVAL):
+        super().__init__(name="profiler", daemon=True)
+        self.profile = profile
+        self.marker = marker
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self.stopped.wait(self.interval):
+            self.profile.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own:
+                    self._record(thread_id, frame, names)
+        _store(self.profile)
+
+    def _record(self, thread_id: int, frame, names: dict):
+        leaf = frame
+        stack: List[str] = []
+        in_request = False
+        while frame is not None:
+            stack.append(_frame_name(frame))
+            in_request = in_request or frame is self.marker
+            frame = frame.f_back
+        code = leaf.f_code
+        idle = (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+        if thread_id == self.loop_thread:
+            if idle:
+                self.profile.stacks['event_loop;idle'] += 1
+                return
+            root = 'request' if in_request else 'event_loop'
+        else:
+            if idle:
+                return
+            if thread_id not in names:
+                names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            root = names.get(thread_id, str(thread_id))
+        stack.append(root)
+        self.profile.stacks[';'.join(reversed(stack))] += 1
+
+
+def _store(profile: Profile):
+    _profiles[profile.id] = profile
+    while len(_profiles) > PROFILE_KEEP:
+        _profiles.popitem(last=False)
+
+
+def list_profiles() -> List[dict]:
+    """Kept profiles, newest first"""
+    return [profile.summary() for profile in reversed(list(_profiles.values()))]
+
+
+def get_profile(profile_id: str) -> Optional[Profile]:
+    return _profiles.get(profile_id)
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling a sample of API requests (see module docs)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _wanted(self, scope) -> bool:
+        path = scope['path']
+        if not path.startswith('/api/') or path.startswith('/api/profiles'):
+            return False
+        if PROFILE_HEADER and (b'x-profile', b'1') in scope['headers']:
+            return True
+        return random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._wanted(scope) or not _active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(id=uuid.uuid4().hex[:12], method=scope['method'], path=scope['path'],
+                          started_at=datetime.utcnow())
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                message = {**message, 'headers': [*message.get('headers', []),
+                                                  (b'x-profile-id', profile.id.encode())]}
+            await send(message)
+
+        sampler = StackSampler(profile, sys._getframe(), threading.get_ident())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.seconds = time.perf_counter() - started
+            sampler.stopped.set()
+            _active.release()
@@ -0,0 +1,190 @@
+"""Background worker keeping PlatformCache warm for active users.
+
+Runs next to the API as its own process:
+
+    python -m app.refresher              # every REFRESH_INTERVAL seconds
+    python -m app.refresher --once
+
+Each cycle picks, per platform, the entries requested within
+REFRESH_ACTIVE_WINDOW that are older than REFRESH_AHEAD of their TTL, most
+recently requested first and oldest data first, and refreshes them before
+they expire, so the API finds them fresh in the database tier. Upstream
+calls go through this process's own guards, scaled to REFRESH_QUOTA_SHARE of
+each quota. Start the API with REFRESHER_ENABLED=1 so it keeps only the rest
+and both together stay within each quota.
+
+Unchanged profiles cost little. Codeforces users are refreshed 100 handles
+per user.info call, and GitHub requests are conditional on ETags (a 304
+when nothing changed). Entries whose data did not change only have their
+timestamp renewed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .platform_cache import CACHE_TTLS, _seconds
+from .platforms import GUARDS, LOADERS, PlatformUserNotFound, close_client, default_data, load_codeforces_users
+from .upstream import REFRESH_QUOTA_SHARE, UpstreamUnavailable, scale_guards
+
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "60"))
+# Entries are refreshed once this fraction of their TTL has passed
+REFRESH_AHEAD = float(os.getenv("REFRESH_AHEAD", "0.8"))
+REFRESH_ACTIVE_WINDOW = _seconds("REFRESH_ACTIVE_WINDOW", 7 * 24 * 3600)
+# Most entries refreshed per platform per cycle, and concurrent refreshes
+REFRESH_BATCH_SIZE = int(os.getenv("REFRESH_BATCH_SIZE", "500"))
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "8"))
+CODEFORCES_HANDLES_PER_CALL = 100
+
+# (username, stored data)
+DueEntry = Tuple[str, dict]
+
+
+def due_entries(platform: str, now: datetime, limit: int = REFRESH_BATCH_SIZE) -> List[DueEntry]:
+    """Recently requested entries due for a refresh, in priority order"""
+    from .models import PlatformCache, SessionLocal
+
+    refresh_before = now - CACHE_TTLS[platform] * REFRESH_AHEAD
+    with SessionLocal() as db:
+        rows = (
+            db.query(PlatformCache.username, PlatformCache.data)
+            .filter(
+                PlatformCache.platform == platform,
+                PlatformCache.last_requested >= now - REFRESH_ACTIVE_WINDOW,
+                PlatformCache.last_updated < refresh_before,
+                PlatformCache.is_valid.is_(True),
+            )
+            .order_by(PlatformCache.last_requested.desc(), PlatformCache.last_updated.asc())
+            .limit(limit)
+            .all()
+        )
+    return [(username, json.loads(data)) for username, data in rows]
+
+
+def save_results(platform: str, changed: Dict[str, Optional[dict]], unchanged: List[str], fetched_at: datetime):
+    """Store changed data (None: user no longer exists) and renew the rest"""
+    from .models import PlatformCache, SessionLocal
+
+    with SessionLocal() as db:
+        query = db.query(PlatformCache).filter(PlatformCache.platform == platform)
+        if unchanged:
+            query.filter(PlatformCache.username.in_(unchanged)).update(
+                {PlatformCache.last_updated: fetched_at}, synchronize_session=False,
+            )
+        for username, data in changed.items():
+            query.filter(PlatformCache.username == username).update({
+                PlatformCache.data: json.dumps(data if data is not None else default_data(platform)),
+                PlatformCache.last_updated: fetched_at,
+                PlatformCache.is_valid: data is not None,
+            }, synchronize_session=False)
+        db.commit()
+
+
+async def refresh_codeforces(entries: List[DueEntry]) -> Dict[str, Optional[dict]]:
+    """Fresh data for many handles, CODEFORCES_HANDLES_PER_CALL per call"""
+    results: Dict[str, Optional[dict]] = {}
+    for start in range(0, len(entries), CODEFORCES_HANDLES_PER_CALL):
+        handles = [username for username, _ in entries[start:start + CODEFORCES_HANDLES_PER_CALL]]
+        while handles:
+            try:
+                results.update(await load_codeforces_users(handles))
+                break
+            except PlatformUserNotFound as e:
+                # The whole call fails on one unknown handle; drop it and retry
+                missing = str(e).lower()
+                if missing not in handles:
+                    raise
+                results[missing] = None
+                handles.remove(missing)
+    return results
+
+
+async def refresh_each(platform: str, entries: List[DueEntry]) -> Dict[str, Optional[dict]]:
+    """Fresh data per user, REFRESH_CONCURRENCY at a time; stops early once
+    the platform is out of quota or failing"""
+    results: Dict[str, Optional[dict]] = {}
+    semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+    stopped = False
+
+    async def refresh(username: str):
+        nonlocal stopped
+        async with semaphore:
+            if stopped:
+                return
+            try:
+                results[username] = await LOADERS[platform](username)
+            except PlatformUserNotFound:
+                results[username] = None
+            except UpstreamUnavailable:
+                stopped = True
+            except Exception as e:
+                print(f"Error refreshing {platform} data for {username}: {e}")
+
+    await asyncio.gather(*(refresh(username) for username, _ in entries))
+    return results
+
+
+async def refresh_platform(platform: str, now: datetime) -> dict:
+    entries = await asyncio.to_thread(due_entries, platform, now)
+    if not entries:
+        return {'due': 0, 'changed': 0, 'unchanged': 0}
+    try:
+        if platform == 'codeforces':
+            results = await refresh_codeforces(entries)
+        else:
+            results = await refresh_each(platform, entries)
+    except UpstreamUnavailable as e:
+        print(f"Skipped refreshing {platform}: {e}")
+        results = {}
+    except Exception as e:
+        print(f"Error refreshing {platform} data: {e}")
+        results = {}
+
+    stored = dict(entries)
+    changed = {username: data for username, data in results.items() if data != stored.get(username)}
+    unchanged = [username for username in results if username not in changed]
+    await asyncio.to_thread(save_results, platform, changed, unchanged, datetime.utcnow())
+    return {'due': len(entries), 'changed': len(changed), 'unchanged': len(unchanged)}
+
+
+async def run_cycle() -> Dict[str, dict]:
+    """Refresh every platform once, concurrently"""
+    now = datetime.utcnow()
+    stats = await asyncio.gather(*(refresh_platform(platform, now) for platform in LOADERS))
+    return dict(zip(LOADERS, stats))
+
+
+async def run(interval: float = REFRESH_INTERVAL, once: bool = False):
+    from .models import init_db
+
+    init_db()
+    scale_guards(GUARDS, REFRESH_QUOTA_SHARE)
+    try:
+        while True:
+            started = time.perf_counter()
+            stats = await run_cycle()
+            seconds = time.perf_counter() - started
+            print(f"Refresh cycle in {seconds:.1f}s: " + ", ".join(
+                f"{platform} {s['changed']} changed / {s['unchanged']} unchanged of {s['due']} due"
+                for platform, s in stats.items()
+            ))
+            if once:
+                return
+            await asyncio.sleep(max(0.0, interval - seconds))
+    finally:
+        await close_client()
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Keep PlatformCache warm for active users")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL, help="seconds between cycles")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.interval, args.once))
+
+
+if __name__ == "__main__":
+    main()
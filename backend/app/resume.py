@@ -0,0 +1,407 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from .resume_cache import ResumeCache
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", Path(__file__).resolve().parent.parent / "uploads"))
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", 5 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+RESUME_PARSE_WORKERS = int(os.getenv("RESUME_PARSE_WORKERS", "2"))
+# Finished jobs kept for polling before the oldest are forgotten
+MAX_TRACKED_JOBS = int(os.getenv("MAX_TRACKED_JOBS", "10000"))
+# Old jobs are trimmed once every this many new jobs
+JOB_TRIM_INTERVAL = 100
+# Optional newline-separated skill list replacing SKILL_VOCABULARY
+SKILL_VOCABULARY_PATH = os.getenv("SKILL_VOCABULARY_PATH")
+
+ALLOWED_EXTENSIONS = {'.pdf', '.docx', '.txt'}
+
+SKILL_VOCABULARY = [
+    'Python', 'Java', 'C++', 'C', 'C#', 'Go', 'Rust', 'Kotlin', 'Swift',
+    'JavaScript', 'TypeScript', 'HTML', 'CSS', 'React', 'Angular', 'Vue',
+    'Node.js', 'Express', 'Django', 'Flask', 'FastAPI', 'Spring', 'SQL',
+    'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Docker', 'Kubernetes', 'AWS',
+    'Azure', 'GCP', 'Git', 'Linux', 'Machine Learning', 'Deep Learning',
+    'TensorFlow', 'PyTorch', 'scikit-learn', 'Pandas', 'NumPy', 'Data Structures',
+    'Algorithms', 'System Design', 'REST', 'GraphQL', 'Microservices',
+]
+
+# Skills that are also everyday words ("go to class", "rest of the day",
+# "express delivery"). These match case-sensitively, as written in the
+# vocabulary or in capitals, and not as the first word of a sentence that
+# reads on in lowercase ("Swift decision.").
+AMBIGUOUS_SKILLS = {
+    'c', 'go', 'rust', 'swift', 'express', 'spring', 'git', 'rest', 'flask',
+    'react', 'angular', 'azure', 'pandas',
+}
+
+# Matched case-sensitively: abbreviations only in their dotted or capital
+# forms, and words only before "of", "in" or "degree", so "be", "it",
+# "MS Office" or "Scrum Master" are not degrees or fields
+DEGREES = [
+    ('Ph.D', r'\bPh\.?\s?D\b|\bPHD\b|(?i:\bdoctorate\b)'),
+    ('Master', r"\bM\.?\s?(?:Tech|TECH|Sc|SC)\b|\bM\.\s?S\b|\bMS\b(?=\s+(?:in|of)\b)|\bM\.\s?E\.|\bMCA\b"
+               r"|(?i:\bmaster'?s?\s+(?:of|in|degree)\b)"),
+    ('Bachelor', r"\bB\.?\s?(?:Tech|TECH|Sc|SC)\b|\bB\.\s?E\b|\bBE\b(?=\s+(?:in\b|\())|\bBCA\b"
+                 r"|(?i:\bbachelor'?s?\s+(?:of|in|degree)\b)"),
+]
+FIELDS = [
+    ('Computer Science', r'(?i:computer science)|\bCSE\b|\bCS\b'),
+    ('Information Technology', r'(?i:information technology)|\bIT\b'),
+    ('Electronics', r'(?i:electronics)|\bECE\b'),
+    ('Electrical', r'(?i:electrical)|\bEEE\b'),
+    ('Mechanical', r'(?i:mechanical)'),
+]
+YEARS_PATTERN = re.compile(r'(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)', re.IGNORECASE)
+YEAR_RANGE_PATTERN = re.compile(r'\b((?:19|20)\d{2})\s*(?:-|–|to)\s*((?:19|20)\d{2}|present|current)\b', re.IGNORECASE)
+# Year ranges on these lines, or under an education heading, are studies
+# rather than work experience
+EDUCATION_LINE_PATTERN = re.compile(r'\b(?:university|college|institute|school|academy|cgpa|gpa)\b', re.IGNORECASE)
+EDUCATION_HEADINGS = {'education', 'academics', 'academic background', 'academic qualifications', 'qualifications'}
+SECTION_HEADINGS = EDUCATION_HEADINGS | {
+    'experience', 'work experience', 'professional experience', 'employment', 'employment history',
+    'work history', 'internships', 'projects', 'skills', 'technical skills', 'certifications',
+    'achievements', 'awards', 'publications', 'summary', 'activities',
+}
+
+
+class ResumeTooLarge(Exception):
+    pass
+
+
+class UnsupportedResume(Exception):
+    pass
+
+
+@dataclass
+class StoredResume:
+    sha256: str
+    path: Path
+    size: int
+
+
+@dataclass
+class ResumeJob:
+    id: str
+    resume_id: str
+    status: str = 'queued'  # queued | running | done | failed
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.id,
+            'resume_id': self.resume_id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+async def store_upload(file, upload_dir: Path = UPLOAD_DIR, max_bytes: int = MAX_RESUME_BYTES) -> StoredResume:
+    """Stream an upload to disk in chunks, content-addressed by SHA-256.
+
+    Identical files map to the same path, so a re-uploaded resume is stored
+    once. Raises ResumeTooLarge past max_bytes.
+    """
+    extension = Path(file.filename or '').suffix.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise UnsupportedResume(f"unsupported file type '{extension or file.filename}'")
+
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    temp_path = upload_dir / f".upload-{uuid.uuid4().hex}"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, 'wb') as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResumeTooLarge(f"resume exceeds {max_bytes // (1024 * 1024)} MB")
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+
+        sha256 = digest.hexdigest()
+        path = upload_dir / f"{sha256}{extension}"
+        if path.exists():
+            temp_path.unlink()
+        else:
+            os.replace(temp_path, path)
+        return StoredResume(sha256=sha256, path=path, size=size)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def load_skill_vocabulary() -> list:
+    if SKILL_VOCABULARY_PATH:
+        with open(SKILL_VOCABULARY_PATH) as f:
+            return [line.strip() for line in f if line.strip()]
+    return SKILL_VOCABULARY
+
+
+# Parsing runs in worker processes; these are per-process globals
+
+_nlp = None
+_skill_matcher = None
+_exact_skill_matcher = None
+
+
+def _init_parser_process():
+    """Build the tokenizer and skill phrase matchers once per worker process.
+
+    Skills are found by PhraseMatchers over tokenizer output, so parsing a
+    resume never runs a statistical pipeline. Unambiguous skills match in any
+    case; AMBIGUOUS_SKILLS only as written or in capitals.
+    """
+    global _nlp, _skill_matcher, _exact_skill_matcher
+    import spacy
+    from spacy.matcher import PhraseMatcher
+
+    _nlp = spacy.blank('en')
+    _skill_matcher = PhraseMatcher(_nlp.vocab, attr='LOWER')
+    _exact_skill_matcher = PhraseMatcher(_nlp.vocab, attr='ORTH')
+    for skill in load_skill_vocabulary():
+        if skill.lower() in AMBIGUOUS_SKILLS:
+            spellings = {skill, skill.upper()}
+            _exact_skill_matcher.add(skill, [_nlp.make_doc(spelling) for spelling in spellings])
+        else:
+            _skill_matcher.add(skill, [_nlp.make_doc(skill)])
+
+
+def extract_text(path: Path) -> str:
+    """Plain text of a PDF, DOCX or text resume"""
+    path = Path(path)
+    if path.suffix == '.pdf':
+        import fitz  # PyMuPDF
+        with fitz.open(path) as document:
+            return '\n'.join(page.get_text() for page in document)
+    if path.suffix == '.docx':
+        import docx2txt
+        return docx2txt.process(str(path))
+    return path.read_text(errors='ignore')
+
+
+def _experience_years(text: str) -> float:
+    stated = [float(m.group(1)) for m in YEARS_PATTERN.finditer(text)]
+    if stated:
+        return min(max(stated), 40.0)
+
+    # Otherwise sum year ranges such as "2019 - 2021" or "2022 - Present"
+    current_year = time.gmtime().tm_year
+    total = 0
+    for line in _work_lines(text):
+        for start, end in YEAR_RANGE_PATTERN.findall(line):
+            end_year = current_year if not end[0].isdigit() else int(end)
+            total += max(0, end_year - int(start))
+    return float(min(total, 40))
+
+
+def _work_lines(text: str):
+    """Lines outside the education section that name no degree or school"""
+    in_education = False
+    for line in text.splitlines():
+        heading = line.strip().rstrip(':').lower()
+        if heading in SECTION_HEADINGS:
+            in_education = heading in EDUCATION_HEADINGS
+            continue
+        if in_education or EDUCATION_LINE_PATTERN.search(line):
+            continue
+        if any(re.search(pattern, line) for _, pattern in DEGREES):
+            continue
+        yield line
+
+
+def _education(text: str) -> str:
+    degree = next((name for name, pattern in DEGREES if re.search(pattern, text)), None)
+    subject = next((name for name, pattern in FIELDS if re.search(pattern, text)), None)
+    if degree and subject:
+        return f"{degree} in {subject}"
+    return degree or subject or 'Not specified'
+
+
+def _starts_prose(doc, start: int, end: int) -> bool:
+    """Whether doc[start:end] opens a sentence that continues in lowercase"""
+    opens_sentence = start == 0 or doc[start - 1].is_space or doc[start - 1].text in '.!?'
+    return opens_sentence and end < len(doc) and doc[end].is_alpha and doc[end].is_lower
+
+
+def _keywords(doc) -> list:
+    matches = list(_skill_matcher(doc))
+    matches += [
+        (match_id, start, end) for match_id, start, end in _exact_skill_matcher(doc)
+        if not _starts_prose(doc, start, end)
+    ]
+    found = {}
+    for match_id, _, _ in sorted(matches, key=lambda match: match[1]):
+        found[_nlp.vocab.strings[match_id]] = True
+    return list(found)
+
+
+def _score(keywords: list, experience_years: float, education: str, text: str) -> int:
+    score = 40
+    score += min(len(keywords), 12) * 3
+    score += min(experience_years, 5) * 3
+    score += 5 if education != 'Not specified' else 0
+    score += 5 if 300 <= len(text.split()) <= 1200 else 0
+    return int(min(score, 100))
+
+
+def parse_resume(path: str) -> dict:
+    """Extract keywords, experience and education from a resume file.
+
+    Runs inside the parser process pool.
+    """
+    if _nlp is None:
+        _init_parser_process()
+    text = extract_text(Path(path))
+    doc = _nlp.make_doc(text)
+
+    keywords = _keywords(doc)
+    experience_years = _experience_years(text)
+    education = _education(text)
+    return {
+        'score': _score(keywords, experience_years, education, text),
+        'keywords': keywords,
+        'experience_years': experience_years,
+        'education': education,
+    }
+
+
+class ResumeJobQueue:
+    """Runs resume parsing jobs in a process pool and tracks their status.
+
+    Job status is kept in the resume_jobs table, so a poll can be answered by
+    any worker process, not only the one that accepted the upload. Results
+    are cached by content hash, so a resume that was parsed before completes
+    immediately, and concurrent uploads of the same file to one worker share
+    one job.
+    """
+
+    def __init__(self, workers: int = RESUME_PARSE_WORKERS, cache: Optional[ResumeCache] = None):
+        self.workers = workers
+        self.cache = cache or ResumeCache()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, ResumeJob] = {}
+        self._tasks = set()
+        self._created = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_parser_process)
+        return self._pool
+
+    def _save(self, job: ResumeJob):
+        from .models import ResumeJobRecord, SessionLocal
+
+        with SessionLocal() as db:
+            row = db.get(ResumeJobRecord, job.id)
+            if row is None:
+                row = ResumeJobRecord(id=job.id, resume_id=job.resume_id)
+                db.add(row)
+                self._created += 1
+            row.status = job.status
+            row.result = None if job.result is None else json.dumps(job.result)
+            row.error = job.error
+            if job.status in ('done', 'failed'):
+                row.finished_at = datetime.utcnow()
+            db.commit()
+
+            if self._created % JOB_TRIM_INTERVAL == 0:
+                self._forget_old_jobs(db)
+
+    def _load(self, job_id: str) -> Optional[ResumeJob]:
+        from .models import ResumeJobRecord, SessionLocal
+
+        with SessionLocal() as db:
+            row = db.get(ResumeJobRecord, job_id)
+            if row is None:
+                return None
+            return ResumeJob(
+                id=row.id,
+                resume_id=row.resume_id,
+                status=row.status,
+                result=None if row.result is None else json.loads(row.result),
+                error=row.error,
+            )
+
+    def _forget_old_jobs(self, db):
+        """Delete finished jobs older than the newest MAX_TRACKED_JOBS"""
+        from .models import ResumeJobRecord
+
+        cutoff = (
+            db.query(ResumeJobRecord.created_at)
+            .order_by(ResumeJobRecord.created_at.desc())
+            .offset(MAX_TRACKED_JOBS)
+            .limit(1)
+            .scalar()
+        )
+        if cutoff is not None:
+            db.query(ResumeJobRecord).filter(
+                ResumeJobRecord.created_at <= cutoff,
+                ResumeJobRecord.finished_at.isnot(None),
+            ).delete()
+            db.commit()
+
+    async def _store(self, job: ResumeJob):
+        try:
+            await asyncio.to_thread(self._save, job)
+        except Exception as e:
+            print(f"Error saving resume job {job.id}: {e}")
+
+    async def submit(self, resume: StoredResume) -> ResumeJob:
+        inflight = self._inflight.get(resume.sha256)
+        if inflight is not None:
+            return inflight
+
+        job = ResumeJob(id=uuid.uuid4().hex, resume_id=resume.sha256)
+        cached = await self.cache.get(resume.sha256)
+        if cached is not None:
+            job.result, job.status = cached, 'done'
+        # Saved before answering, so the first poll finds it on any worker
+        await asyncio.to_thread(self._save, job)
+        if cached is not None:
+            return job
+
+        self._inflight[resume.sha256] = job
+        task = asyncio.create_task(self._run(job, resume.path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: ResumeJob, path: Path):
+        job.status = 'running'
+        await self._store(job)
+        try:
+            loop = asyncio.get_running_loop()
+            job.result = await loop.run_in_executor(self._get_pool(), parse_resume, str(path))
+            await self.cache.put(job.resume_id, job.result)
+            job.status = 'done'
+        except Exception as e:
+            print(f"Error parsing resume {job.resume_id}: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            self._inflight.pop(job.resume_id, None)
+        await self._store(job)
+
+    async def get(self, job_id: str) -> Optional[ResumeJob]:
+        return await asyncio.to_thread(self._load, job_id)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
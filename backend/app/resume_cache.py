@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from .platform_cache import LRUCache
+
+# Bump whenever extraction changes so stale results are not served
+PARSER_VERSION = "4"
+
+RESUME_CACHE_MEMORY_SIZE = int(os.getenv("RESUME_CACHE_MEMORY_SIZE", "2048"))
+# Least recently used rows beyond this are deleted from the database
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "50000"))
+# Eviction runs once every this many inserts
+EVICTION_INTERVAL = 100
+
+
+class ResumeCache:
+    """Parsed resume results keyed by (content hash, parser version).
+
+    An in-process LRU sits in front of the ParsedResume table; the table is
+    trimmed to RESUME_CACHE_MAX_ENTRIES by last access.
+    """
+
+    def __init__(self, parser_version: str = PARSER_VERSION,
+                 memory_size: int = RESUME_CACHE_MEMORY_SIZE,
+                 max_entries: int = RESUME_CACHE_MAX_ENTRIES):
+        self.parser_version = parser_version
+        self.max_entries = max_entries
+        self._memory = LRUCache(memory_size)
+        self._inserts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, content_hash: str):
+        return content_hash, self.parser_version
+
+    def _read_db(self, content_hash: str) -> Optional[dict]:
+        from .models import ParsedResume, SessionLocal
+
+        with SessionLocal() as db:
+            row = (
+                db.query(ParsedResume)
+                .filter(ParsedResume.content_hash == content_hash,
+                        ParsedResume.parser_version == self.parser_version)
+                .first()
+            )
+            if row is None:
+                return None
+            row.last_accessed = datetime.utcnow()
+            db.commit()
+            return json.loads(row.result)
+
+    def _write_db(self, content_hash: str, result: dict):
+        from .models import ParsedResume, SessionLocal
+
+        with SessionLocal() as db:
+            row = (
+                db.query(ParsedResume)
+                .filter(ParsedResume.content_hash == content_hash,
+                        ParsedResume.parser_version == self.parser_version)
+                .first()
+            )
+            if row is None:
+                row = ParsedResume(content_hash=content_hash, parser_version=self.parser_version)
+                db.add(row)
+            row.result = json.dumps(result)
+            row.last_accessed = datetime.utcnow()
+            db.commit()
+
+            self._inserts += 1
+            if self._inserts % EVICTION_INTERVAL == 0:
+                self._evict(db)
+
+    def _evict(self, db):
+        """Delete least recently used rows past max_entries, and other parser versions"""
+        from .models import ParsedResume
+
+        db.query(ParsedResume).filter(ParsedResume.parser_version != self.parser_version).delete()
+        cutoff = (
+            db.query(ParsedResume.last_accessed)
+            .order_by(ParsedResume.last_accessed.desc())
+            .offset(self.max_entries)
+            .limit(1)
+            .scalar()
+        )
+        if cutoff is not None:
+            db.query(ParsedResume).filter(ParsedResume.last_accessed <= cutoff).delete()
+        db.commit()
+
+    async def get(self, content_hash: str) -> Optional[dict]:
+        result = self._memory.get(self._key(content_hash))
+        if result is None:
+            try:
+                result = await asyncio.to_thread(self._read_db, content_hash)
+            except Exception as e:
+                print(f"Error reading resume cache: {e}")
+            if result is not None:
+                self._memory.put(self._key(content_hash), result)
+
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def put(self, content_hash: str, result: dict):
+        self._memory.put(self._key(content_hash), result)
+        try:
+            await asyncio.to_thread(self._write_db, content_hash, result)
+        except Exception as e:
+            print(f"Error writing resume cache: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'parser_version': self.parser_version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(self._memory),
+        }
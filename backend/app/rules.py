@@ -0,0 +1,283 @@
+"""Rule-based parts of the prediction response, compiled into lookup tables.
+
+Every threshold rule is one bit of a per-student mask. At import, each of
+the 2 ** len(RULES) masks is resolved once into a RuleFragments; those are
+shared and read-only. Building a response is then a table lookup, and the masks
+for a whole batch are computed with NumPy over the feature matrix.
+
+Every static text also has an id. Compact responses carry the ids, and
+CATALOG (served by /api/catalog) maps them back to text.
+"""
+import hashlib
+import json
+import operator
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+
+class Rule(NamedTuple):
+    name: str
+    input: str  # a feature column, 'has_linkedin' or 'overall_score'
+    op: object
+    threshold: float
+
+
+RULES = (
+    Rule('few_leetcode', 'leetcode_problems', operator.lt, 100),
+    Rule('low_codeforces', 'codeforces_rating', operator.lt, 1200),
+    Rule('few_projects', 'project_count', operator.lt, 3),
+    Rule('few_skills', 'skills_count', operator.lt, 5),
+    Rule('no_linkedin', 'has_linkedin', operator.eq, 0),
+    Rule('high_score', 'overall_score', operator.gt, 70),
+    Rule('high_cgpa', 'cgpa', operator.ge, 8.0),
+    Rule('many_leetcode', 'leetcode_problems', operator.ge, 200),
+    Rule('many_projects', 'project_count', operator.ge, 5),
+    Rule('many_skills', 'skills_count', operator.ge, 8),
+    Rule('has_experience', 'work_experience', operator.gt, 0),
+)
+BITS = {rule.name: 1 << i for i, rule in enumerate(RULES)}
+
+# (id, text) in response order; ids are rule names, and the catalog's keys
+SUGGESTIONS = (
+    ('few_leetcode', 'Solve more LeetCode problems daily'),
+    ('low_codeforces', 'Participate in Codeforces contests'),
+    ('few_projects', 'Build more projects to showcase skills'),
+    ('few_skills', 'Learn more relevant technologies'),
+    ('no_linkedin', 'Create a professional LinkedIn profile'),
+)
+FOCUS_AREAS = (
+    ('few_leetcode', 'Data Structures & Algorithms'),
+    ('few_projects', 'Project Development'),
+    ('few_skills', 'Technical Skills'),
+    ('high_score', 'System Design'),
+    ('no_linkedin', 'Professional Networking'),
+)
+STRENGTHS = (
+    ('high_cgpa', 'Strong Academic Performance'),
+    ('many_leetcode', 'Excellent Problem Solving'),
+    ('many_projects', 'Strong Project Portfolio'),
+    ('many_skills', 'Diverse Technical Skills'),
+    ('has_experience', 'Relevant Work Experience'),
+)
+# Used when no rule matches
+DEFAULT_FOCUS_AREA = ('default', 'Continue building on strengths')
+DEFAULT_STRENGTH = ('default', 'Dedicated to learning')
+
+COMPANY_REQUIREMENTS = MappingProxyType({
+    'FAANG': (
+        'Strong DSA skills (500+ problems)',
+        'System design knowledge',
+        'Previous internship experience',
+        'High CGPA (8.5+)',
+    ),
+    'Product-based': (
+        'Good DSA skills (200+ problems)',
+        'Project experience',
+        'Technology stack expertise',
+        'Problem-solving ability',
+    ),
+    'Startup': (
+        'Versatile skill set',
+        'Quick learning ability',
+        'Hands-on project experience',
+        'Adaptability',
+    ),
+    'Service-based': (
+        'Basic programming skills',
+        'Good communication',
+        'Willingness to learn',
+        'Team collaboration',
+    ),
+})
+COMPANY_DESCRIPTIONS = MappingProxyType({
+    company_type: f'Match probability for {company_type} companies' for company_type in COMPANY_REQUIREMENTS
+})
+
+# Fragments are shared by every response and must never be mutated. Dicts
+# stay plain dicts (pydantic copies them while validating the response, and
+# a read-only proxy costs a slower conversion per response)
+
+# This would typically come from a course database; for now one mock course
+# is recommended for every set of focus areas
+COURSES = MappingProxyType({
+    'dsa-interview-udemy': {
+        'title': 'Master the Coding Interview: Data Structures + Algorithms',
+        'provider': 'Udemy',
+        'duration': '19 hours',
+        'difficulty': 'Intermediate',
+        'rating': 4.6,
+        'price': '$84.99',
+        'url': 'https://www.udemy.com/course/master-the-coding-interview-data-structures-algorithms/',
+    },
+})
+
+# Static part of each international opportunity, by country
+COUNTRIES = MappingProxyType({
+    'United States': {
+        'visa_type': 'H1-B',
+        'average_salary': '$120,000 - $200,000',
+        'top_companies': ('Google', 'Microsoft', 'Amazon'),
+    },
+})
+
+LINKEDIN_INSIGHTS_ID = 'default'
+LINKEDIN_INSIGHTS = {
+    'profile_strength': 75,
+    'network_quality': 80,
+    'industry_alignment': 70,
+    'suggestions': (
+        'Add more technical skills',
+        'Get recommendations from colleagues',
+        'Share technical articles',
+    ),
+}
+
+
+@dataclass(frozen=True)
+class RuleFragments:
+    """Everything in a response that depends only on the rule mask, as
+    texts (full responses) and as catalog ids (compact responses)"""
+    suggestions: Tuple[str, ...]
+    focus_areas: Tuple[str, ...]
+    strengths: Tuple[str, ...]
+    course_recommendations: Tuple[dict, ...]
+    suggestion_ids: Tuple[str, ...]
+    focus_area_ids: Tuple[str, ...]
+    strength_ids: Tuple[str, ...]
+    course_ids: Tuple[str, ...]
+
+
+def _matches(mask: int, rules: Sequence[Tuple[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    return tuple((name, text) for name, text in rules if mask & BITS[name])
+
+
+def recommend_courses(focus_area_ids: Sequence[str]) -> Tuple[str, ...]:
+    """Course ids for a set of focus areas"""
+    return tuple(COURSES)
+
+
+def compile_table() -> List[RuleFragments]:
+    """Resolve every mask once; equal fragments (and tuples) are shared"""
+    interned: Dict[tuple, tuple] = {}
+
+    def intern(value: tuple) -> tuple:
+        return interned.setdefault(value, value)
+
+    fragments: Dict[tuple, RuleFragments] = {}
+    courses: Dict[tuple, Tuple[dict, ...]] = {}
+    table = []
+    for mask in range(1 << len(RULES)):
+        suggestions = _matches(mask, SUGGESTIONS)
+        focus_areas = _matches(mask, FOCUS_AREAS) or (DEFAULT_FOCUS_AREA,)
+        strengths = _matches(mask, STRENGTHS) or (DEFAULT_STRENGTH,)
+        key = (suggestions, focus_areas, strengths)
+        if key not in fragments:
+            focus_area_ids = intern(tuple(name for name, _ in focus_areas))
+            course_ids = intern(recommend_courses(focus_area_ids))
+            fragments[key] = RuleFragments(
+                suggestions=intern(tuple(text for _, text in suggestions)),
+                focus_areas=intern(tuple(text for _, text in focus_areas)),
+                strengths=intern(tuple(text for _, text in strengths)),
+                course_recommendations=courses.setdefault(
+                    course_ids, tuple(COURSES[course_id] for course_id in course_ids)
+                ),
+                suggestion_ids=intern(tuple(name for name, _ in suggestions)),
+                focus_area_ids=focus_area_ids,
+                strength_ids=intern(tuple(name for name, _ in strengths)),
+                course_ids=course_ids,
+            )
+        table.append(fragments[key])
+    return table
+
+
+TABLE = compile_table()
+
+
+def rule_inputs(profile, platform_data, overall_score) -> Dict[str, float]:
+    """Rule inputs of one student, named like the batch columns"""
+    return {
+        'cgpa': profile.cgpa,
+        'leetcode_problems': platform_data.leetcode_problems,
+        'codeforces_rating': platform_data.codeforces_rating,
+        'project_count': profile.project_count,
+        'skills_count': len(profile.skills),
+        'work_experience': profile.work_experience,
+        'has_linkedin': 1 if profile.linkedin_profile else 0,
+        'overall_score': overall_score,
+    }
+
+
+_CHECKS = tuple((rule.input, rule.op, rule.threshold, 1 << bit) for bit, rule in enumerate(RULES))
+
+
+def student_mask(profile, platform_data, overall_score: int) -> int:
+    values = rule_inputs(profile, platform_data, overall_score)
+    mask = 0
+    for name, op, threshold, bit in _CHECKS:
+        if op(values[name], threshold):
+            mask |= bit
+    return mask
+
+
+def batch_masks(features: np.ndarray, feature_names: Sequence[str],
+                has_linkedin: np.ndarray, overall_scores: np.ndarray) -> np.ndarray:
+    """Rule masks for every row of a feature matrix, vectorized"""
+    columns = {name: features[:, i] for i, name in enumerate(feature_names)}
+    columns['has_linkedin'] = np.asarray(has_linkedin)
+    columns['overall_score'] = np.asarray(overall_scores)
+    masks = np.zeros(len(features), dtype=np.int64)
+    for bit, rule in enumerate(RULES):
+        masks |= rule.op(columns[rule.input], rule.threshold).astype(np.int64) << bit
+    return masks
+
+
+# Scores with precomputed international opportunities fragments
+SCORE_RANGE = (0, 100)
+
+
+def international_opportunities(overall_score: int, compact: bool = False) -> Tuple[dict, ...]:
+    """Mock international opportunities; one shared fragment per score.
+
+    Compact fragments keep only what depends on the score; the rest is in
+    the catalog under ``countries``.
+    """
+    if SCORE_RANGE[0] <= overall_score <= SCORE_RANGE[1]:
+        table = _COMPACT_OPPORTUNITIES if compact else _OPPORTUNITIES
+        return table[overall_score - SCORE_RANGE[0]]
+    return _opportunities(overall_score, compact)
+
+
+def _opportunities(overall_score: int, compact: bool = False) -> Tuple[dict, ...]:
+    return tuple(
+        {'country': country, 'match_score': min(overall_score + 10, 100), **({} if compact else details)}
+        for country, details in COUNTRIES.items()
+    )
+
+
+_OPPORTUNITIES = [_opportunities(score) for score in range(SCORE_RANGE[0], SCORE_RANGE[1] + 1)]
+_COMPACT_OPPORTUNITIES = [_opportunities(score, True) for score in range(SCORE_RANGE[0], SCORE_RANGE[1] + 1)]
+
+
+def build_catalog() -> dict:
+    """Static response text by id, for clients of compact responses"""
+    return {
+        'companies': {
+            company_type: {'description': COMPANY_DESCRIPTIONS[company_type], 'requirements': requirements}
+            for company_type, requirements in COMPANY_REQUIREMENTS.items()
+        },
+        'suggestions': dict(SUGGESTIONS),
+        'focus_areas': dict(FOCUS_AREAS + (DEFAULT_FOCUS_AREA,)),
+        'strengths': dict(STRENGTHS + (DEFAULT_STRENGTH,)),
+        'courses': dict(COURSES),
+        'countries': dict(COUNTRIES),
+        'linkedin_insights': {LINKEDIN_INSIGHTS_ID: LINKEDIN_INSIGHTS},
+    }
+
+
+CATALOG = build_catalog()
+# Changes whenever any catalog text does; compact responses carry it so
+# clients know when to refetch the catalog
+CATALOG_VERSION = hashlib.sha256(json.dumps(CATALOG, sort_keys=True).encode()).hexdigest()[:16]
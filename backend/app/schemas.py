@@ -0,0 +1,110 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+# Pydantic models
+class UserProfile(BaseModel):
+    # Stored with each analysis; defaults to a platform username
+    user_id: Optional[str] = None
+    leetcode_username: Optional[str] = ""
+    codeforces_username: Optional[str] = ""
+    codechef_username: Optional[str] = ""
+    github_username: Optional[str] = ""
+    hackerrank_username: Optional[str] = ""
+    linkedin_profile: Optional[str] = ""
+    cgpa: float
+    skills: List[str] = []
+    project_count: int = 0
+    preferred_countries: List[str] = []
+    work_experience: float = 0
+    english_proficiency: str = "Intermediate"
+
+class PlatformData(BaseModel):
+    leetcode_problems: int = 0
+    leetcode_rating: int = 0
+    codeforces_rating: int = 0
+    codeforces_contests: int = 0
+    codechef_rating: int = 0
+    codechef_stars: int = 0
+    github_repos: int = 0
+    github_contributions: int = 0
+    github_followers: int = 0
+    hackerrank_problems: int = 0
+    hackerrank_badges: int = 0
+    linkedin_connections: int = 0
+
+class CompanyMatch(BaseModel):
+    type: str
+    match_percentage: int
+    description: str
+    requirements: List[str]
+    suggestions: List[str]
+
+class CourseRecommendation(BaseModel):
+    title: str
+    provider: str
+    duration: str
+    difficulty: str
+    rating: float
+    price: str
+    url: str
+
+class InternationalOpportunity(BaseModel):
+    country: str
+    match_score: int
+    visa_type: str
+    average_salary: str
+    top_companies: List[str]
+
+class LinkedInInsights(BaseModel):
+    profile_strength: int
+    network_quality: int
+    industry_alignment: int
+    suggestions: List[str]
+
+class PredictionResponse(BaseModel):
+    overall_score: int
+    company_matches: List[CompanyMatch]
+    focus_areas: List[str]
+    strengths: List[str]
+    course_recommendations: List[CourseRecommendation]
+    international_opportunities: List[InternationalOpportunity]
+    linkedin_insights: Optional[LinkedInInsights] = None
+
+# Compact responses (?compact=true): static text is replaced by ids into the
+# catalog served at /api/catalog, and the suggestions shared by every company
+# match are listed once
+class CompactCompanyMatch(BaseModel):
+    type: str
+    match_percentage: int
+
+class CompactOpportunity(BaseModel):
+    country: str
+    match_score: int
+
+class CompactPredictionResponse(BaseModel):
+    catalog_version: str
+    overall_score: int
+    company_matches: List[CompactCompanyMatch]
+    suggestions: List[str]
+    focus_areas: List[str]
+    strengths: List[str]
+    course_recommendations: List[str]
+    international_opportunities: List[CompactOpportunity]
+    linkedin_insights: Optional[str] = None
+
+# A student's actual placement, reported after the fact; recorded against
+# their latest analysis and used by the online model refresh
+class OutcomeReport(BaseModel):
+    user_id: str
+    # One of the company types in company_matches
+    company_type: str
+    # Assessed placement score (0-100), if there is one
+    placement_score: Optional[int] = None
+
+# What-if analysis: increases to try per model feature (app.whatif
+# FEATURE_NAMES, e.g. {"leetcode_problems": [50, 100]}); unlisted features
+# use the defaults. costs overrides the effort per unit of a feature.
+class WhatIfRequest(BaseModel):
+    profile: UserProfile
+    deltas: Dict[str, List[float]] = {}
+    costs: Dict[str, float] = {}
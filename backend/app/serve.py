@@ -0,0 +1,171 @@
+"""Pre-fork launcher: one model bundle in memory, one worker per core.
+
+    python -m app.serve                     # SERVE_WORKERS, else one per usable CPU
+    python -m app.serve --workers 4 --port 8000
+
+Inference is CPU-bound and holds the GIL, so a single uvicorn process uses
+one core. ``uvicorn --workers N`` would have every worker import the app and
+load its own copy of the models. Instead, this launcher imports the app,
+creates the database tables and loads and warms up the bundle once. It then
+binds the listening socket and forks the workers. The workers inherit the
+loaded models and share their pages copy-on-write (the compiled tree arrays
+are memory-mapped and shared in any case), and the kernel spreads incoming
+connections across them. A worker that dies is replaced.
+
+Each worker runs the app's usual lifespan (minus the database and model
+startup the launcher already did) against its inherited bundle, with its own
+event loop, inference batcher and in-memory caches. Metrics are per
+worker, and so are the upstream rate limiters: each keeps 1/workers of every
+quota.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+# More threads per worker than cores would only contend. Set before numpy,
+# sklearn or OpenMP are loaded; OpenMP thread pools also do not survive fork.
+for _name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_name, "1")
+
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_BACKLOG = int(os.getenv("SERVE_BACKLOG", "2048"))
+# Workers that exit this soon after starting are not restarted; the error is
+# in the app or its configuration, not transient
+RESTART_MIN_UPTIME = 5.0
+
+
+def default_workers() -> int:
+    """SERVE_WORKERS, else the CPUs this process may run on"""
+    if os.getenv("SERVE_WORKERS"):
+        return int(os.environ["SERVE_WORKERS"])
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def preload(workers: int = 1):
+    """Everything workers should inherit rather than redo"""
+    import gc
+
+    from . import main
+    from .models import engine
+
+    # Each worker's lifespan scales its rate limiters to 1/workers of the
+    # API's quotas, so together they stay within them
+    main.WORKER_PROCESSES = workers
+    main.init_db()
+    main.warm_up()
+    # Workers inherit the tables and the warm bundle; their lifespan skips both
+    main.STARTUP_MODE = "preloaded"
+    # Connections must not be shared across processes
+    engine.dispose()
+    # Objects allocated so far are never collected, so the collector never
+    # writes to (and un-shares) their pages in the workers
+    gc.freeze()
+    return main.app
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(SERVE_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on", timeout_graceful_shutdown=30)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks the workers and replaces any that die until told to stop"""
+
+    def __init__(self, app, sock: socket.socket, workers: int, log_level: str):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.log_level)
+            except BaseException as e:
+                print(f"Worker {os.getpid()} failed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        print(f"Serving on {self.sock.getsockname()[:2]} with {self.workers} workers "
+              f"(pids {', '.join(map(str, self.children))})")
+
+        status = 0
+        while self.children:
+            try:
+                pid, code = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            if time.monotonic() - started < RESTART_MIN_UPTIME:
+                print(f"Worker {pid} exited with code {os.waitstatus_to_exitcode(code)} right after starting; "
+                      "shutting down")
+                status = 1
+                self.stop()
+                continue
+            print(f"Worker {pid} exited with code {os.waitstatus_to_exitcode(code)}; starting a new one")
+            self.spawn()
+        return status
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one model bundle")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=default_workers(), help="worker processes")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    started = time.perf_counter()
+    app = preload(workers)
+    print(f"Preloaded the app in {time.perf_counter() - started:.2f}s")
+    sock = bind(args.host, args.port)
+    sys.exit(Supervisor(app, sock, workers, args.log_level).run())
+
+
+if __name__ == "__main__":
+    main()
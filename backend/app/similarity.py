@@ -0,0 +1,395 @@
+"""Nearest-neighbor search over the analysis history ("students like you").
+
+Every UserAnalysis row is kept as a float32 vector of its features, scaled
+by the served bundle's scaler, in an append-only file that every API worker
+memory-maps. A query returns the analysis ids of the closest vectors; their
+scores and reported outcomes are then read from the database.
+
+Up to SIMILARITY_EXACT_MAX_ROWS rows, a query scans every vector. Larger
+indexes are partitioned IVF-style: k-means centroids (SIMILARITY_LISTS, by
+default the square root of the row count) split the rows into lists, and a
+query scans only the SIMILARITY_NPROBE lists with the closest centroids.
+That makes results approximate: a neighbor in a list that was not probed is
+missed.
+
+SIMILARITY_DIR/current.json names the generation directory being served and
+how many of its rows are complete:
+
+    <generation>/vectors.f32     scaled features, (rows, 6) float32
+    <generation>/ids.i64         UserAnalysis id of each row
+    <generation>/lists.i32       IVF list of each row (IVF generations only)
+    <generation>/centroids.npy
+
+``sync()`` appends the rows added since the last sync. One process at a time
+holds SIMILARITY_DIR/.lock to do so; readers see the new rows once
+current.json counts them. A new generation is built from scratch when the
+scaler changes, when the index outgrows the exact scan, and when it has
+doubled in size since its centroids were fitted. A large existing history
+is best indexed before starting the API:
+
+    python -m app.similarity --rebuild
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .metrics import span
+from .predictor import FEATURE_NAMES
+
+SIMILARITY_DIR = Path(os.getenv("SIMILARITY_DIR", Path(__file__).resolve().parent.parent / "similarity"))
+# Seconds between syncs with UserAnalysis in the API; 0 disables the index
+SIMILARITY_SYNC_INTERVAL = float(os.getenv("SIMILARITY_SYNC_INTERVAL", "30"))
+SIMILARITY_EXACT_MAX_ROWS = int(os.getenv("SIMILARITY_EXACT_MAX_ROWS", "50000"))
+# IVF lists (0: square root of the row count) and lists scanned per query
+SIMILARITY_LISTS = int(os.getenv("SIMILARITY_LISTS", "0"))
+SIMILARITY_NPROBE = int(os.getenv("SIMILARITY_NPROBE", "8"))
+SIMILARITY_MAX_K = int(os.getenv("SIMILARITY_MAX_K", "50"))
+
+DIM = len(FEATURE_NAMES)
+CURRENT_NAME = "current.json"
+# Rows read from the database per query while syncing
+READ_CHUNK_ROWS = 50_000
+# Rows per list the centroids are fitted on
+KMEANS_SAMPLE_PER_LIST = 64
+# Neighbors fetched per one returned, so that rows of the asking user and
+# repeat analyses of one user can be skipped
+OVERFETCH = 4
+
+
+@lru_cache(maxsize=8)
+def scaler_checksum(scaler) -> str:
+    """Identifies the scaling stored vectors were made with"""
+    digest = hashlib.sha256(type(scaler).__name__.encode())
+    for name, value in sorted(vars(scaler).items()):
+        if name.endswith('_') and isinstance(value, np.ndarray):
+            digest.update(name.encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def scale(scaler, features: np.ndarray) -> np.ndarray:
+    return scaler.transform(features).astype(np.float32)
+
+
+def read_state(directory: Path = SIMILARITY_DIR) -> Optional[dict]:
+    try:
+        return json.loads((Path(directory) / CURRENT_NAME).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_state(directory: Path, state: dict):
+    staging = directory / f".current-{os.getpid()}"
+    staging.write_text(json.dumps(state, indent=2))
+    os.replace(staging, directory / CURRENT_NAME)
+
+
+def iter_analyses(after_id: int = 0, chunk_rows: int = READ_CHUNK_ROWS) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(ids, raw features) of UserAnalysis rows with id > after_id, in id order"""
+    from sqlalchemy import select
+
+    from .models import SessionLocal, UserAnalysis
+
+    columns = [getattr(UserAnalysis, name) for name in FEATURE_NAMES]
+    while True:
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(UserAnalysis.id, *columns)
+                .where(UserAnalysis.id > after_id)
+                .order_by(UserAnalysis.id)
+                .limit(chunk_rows)
+            ).all()
+        if not rows:
+            return
+        data = np.array([[value or 0 for value in row] for row in rows], dtype=np.float64)
+        ids = data[:, 0].astype(np.int64)
+        yield ids, data[:, 1:]
+        after_id = int(ids[-1])
+
+
+def fit_centroids(vectors: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    """k-means centroids fitted on a sample of the vectors"""
+    from sklearn.cluster import KMeans
+
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(len(vectors), min(len(vectors), n_lists * KMEANS_SAMPLE_PER_LIST), replace=False))
+    kmeans = KMeans(n_clusters=n_lists, n_init=1, max_iter=25, random_state=seed).fit(vectors[sample])
+    return kmeans.cluster_centers_.astype(np.float32)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, chunk_rows: int = 8192) -> np.ndarray:
+    """Nearest centroid of every vector"""
+    # |v - c|^2 = |v|^2 - 2 v.c + |c|^2, and |v|^2 does not change the argmin
+    norms = (centroids ** 2).sum(axis=1)
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_rows):
+        block = np.asarray(vectors[start:start + chunk_rows])
+        lists[start:start + len(block)] = (norms - 2 * block @ centroids.T).argmin(axis=1)
+    return lists
+
+
+def write_generation(chunks: Iterable[Tuple[np.ndarray, np.ndarray]], scaler: str,
+                     directory: Path = SIMILARITY_DIR) -> dict:
+    """Write (ids, scaled vectors) chunks as a new generation, partition it if
+    it is large, make it current and remove the previous ones"""
+    directory = Path(directory)
+    generation = f"gen-{time.time_ns()}"
+    path = directory / generation
+    path.mkdir(parents=True)
+
+    rows, last_id = 0, 0
+    with open(path / "vectors.f32", 'wb') as vectors_file, open(path / "ids.i64", 'wb') as ids_file:
+        for ids, vectors in chunks:
+            vectors_file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            ids_file.write(np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+            rows += len(ids)
+            last_id = int(ids[-1]) if len(ids) else last_id
+
+    n_lists = 0
+    if rows > SIMILARITY_EXACT_MAX_ROWS:
+        vectors = np.memmap(path / "vectors.f32", dtype=np.float32, mode='r', shape=(rows, DIM))
+        n_lists = min(rows, SIMILARITY_LISTS or int(np.sqrt(rows)))
+        centroids = fit_centroids(vectors, n_lists)
+        np.save(path / "centroids.npy", centroids)
+        assign_lists(vectors, centroids).tofile(path / "lists.i32")
+
+    state = {
+        'generation': generation,
+        'rows': rows,
+        'last_id': last_id,
+        'scaler': scaler,
+        'lists': n_lists,
+        'fitted_rows': rows,
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    _write_state(directory, state)
+    # Readers that still map an old generation keep its pages
+    for old in directory.glob("gen-*"):
+        if old.name != generation:
+            shutil.rmtree(old, ignore_errors=True)
+    return state
+
+
+def build(scaler, directory: Path = SIMILARITY_DIR) -> dict:
+    """Index every UserAnalysis row from scratch"""
+    chunks = ((ids, scale(scaler, features)) for ids, features in iter_analyses())
+    return write_generation(chunks, scaler_checksum(scaler), directory)
+
+
+def _append(path: Path, rows: int, array: np.ndarray):
+    # Bytes past the last complete row are left over from a failed append
+    with open(path, 'ab') as f:
+        f.truncate(rows * array.itemsize * (array.shape[1] if array.ndim > 1 else 1))
+        f.write(np.ascontiguousarray(array).tobytes())
+
+
+def sync(scaler, directory: Path = SIMILARITY_DIR, rebuild: bool = False) -> Optional[dict]:
+    """Index UserAnalysis rows added since the last sync, rebuilding when due.
+
+    Returns the current state. If another process is syncing, returns at
+    once without waiting for it.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return read_state(directory)
+
+        state = read_state(directory)
+        if rebuild or state is None or state['scaler'] != scaler_checksum(scaler):
+            return build(scaler, directory)
+
+        path = directory / state['generation']
+        centroids = np.load(path / "centroids.npy") if state['lists'] else None
+        rows, last_id = state['rows'], state['last_id']
+        for ids, features in iter_analyses(last_id):
+            vectors = scale(scaler, features)
+            _append(path / "vectors.f32", rows, vectors)
+            _append(path / "ids.i64", rows, ids)
+            if centroids is not None:
+                _append(path / "lists.i32", rows, assign_lists(vectors, centroids))
+            rows, last_id = rows + len(ids), int(ids[-1])
+            state = dict(state, rows=rows, last_id=last_id)
+            _write_state(directory, state)
+
+        if rows > SIMILARITY_EXACT_MAX_ROWS and (not state['lists'] or rows >= 2 * state['fitted_rows']):
+            return build(scaler, directory)
+        return state
+
+
+@dataclass
+class _Snapshot:
+    generation: str
+    rows: int
+    scaler: str
+    vectors: np.ndarray
+    ids: np.ndarray
+    centroids: Optional[np.ndarray] = None
+    # Row numbers grouped by list; list i is order[offsets[i]:offsets[i + 1]]
+    order: Optional[np.ndarray] = None
+    offsets: Optional[np.ndarray] = None
+
+
+class SimilarityIndex:
+    """Read side of the index: maps the current generation and answers
+    top-k queries. ``refresh()`` picks up appended rows and new generations;
+    queries in flight keep the snapshot they started with."""
+
+    def __init__(self, directory: Path = SIMILARITY_DIR, nprobe: int = SIMILARITY_NPROBE):
+        self.directory = Path(directory)
+        self.nprobe = nprobe
+        self._snapshot: Optional[_Snapshot] = None
+        self.refreshes = 0
+
+    def refresh(self) -> bool:
+        """Remap if current.json changed; returns whether it did"""
+        state = read_state(self.directory)
+        snapshot = self._snapshot
+        if state is None or (snapshot is not None and snapshot.generation == state['generation']
+                             and snapshot.rows == state['rows']):
+            return False
+        self._snapshot = self._open(state)
+        self.refreshes += 1
+        return True
+
+    def _open(self, state: dict) -> _Snapshot:
+        path = self.directory / state['generation']
+        rows = state['rows']
+        if not rows:
+            return _Snapshot(state['generation'], 0, state['scaler'],
+                             np.empty((0, DIM), dtype=np.float32), np.empty(0, dtype=np.int64))
+        snapshot = _Snapshot(
+            state['generation'], rows, state['scaler'],
+            np.memmap(path / "vectors.f32", dtype=np.float32, mode='r', shape=(rows, DIM)),
+            np.memmap(path / "ids.i64", dtype=np.int64, mode='r', shape=(rows,)),
+        )
+        if state['lists']:
+            lists = np.memmap(path / "lists.i32", dtype=np.int32, mode='r', shape=(rows,))
+            snapshot.centroids = np.load(path / "centroids.npy")
+            snapshot.order = np.argsort(lists, kind='stable').astype(np.int64)
+            snapshot.offsets = np.concatenate(([0], np.cumsum(np.bincount(lists, minlength=state['lists']))))
+        return snapshot
+
+    def search(self, vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(analysis ids, distances) of the k nearest indexed rows to one
+        scaled feature vector, nearest first"""
+        snapshot = self._snapshot
+        if snapshot is None or not snapshot.rows or k < 1:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(vector, dtype=np.float32).reshape(DIM)
+
+        candidates = None
+        vectors = snapshot.vectors
+        if snapshot.order is not None:
+            probe_count = min(self.nprobe, len(snapshot.centroids))
+            probe = np.argpartition(((snapshot.centroids - query) ** 2).sum(axis=1), probe_count - 1)[:probe_count]
+            # Sorted, so the gather reads the mapped file front to back
+            candidates = np.sort(np.concatenate([
+                snapshot.order[snapshot.offsets[i]:snapshot.offsets[i + 1]] for i in probe
+            ]))
+            vectors = vectors[candidates]
+
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        k = min(k, len(distances))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        rows = top if candidates is None else candidates[top]
+        return np.asarray(snapshot.ids[rows]), np.sqrt(distances[top])
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            'generation': snapshot.generation if snapshot is not None else None,
+            'rows': snapshot.rows if snapshot is not None else 0,
+            'mode': 'ivf' if snapshot is not None and snapshot.order is not None else 'exact',
+            'lists': len(snapshot.centroids) if snapshot is not None and snapshot.centroids is not None else 0,
+            'nprobe': self.nprobe,
+            'refreshes': self.refreshes,
+        }
+
+
+def similar_students(index: SimilarityIndex, scaler, features: np.ndarray, k: int,
+                     exclude_user: Optional[str] = None) -> dict:
+    """The k most similar past analyses of other students, one per student,
+    with their scores and reported outcomes"""
+    from sqlalchemy import select
+
+    from .models import SessionLocal, UserAnalysis
+
+    with span('similarity.search'):
+        ids, distances = index.search(scale(scaler, features.reshape(1, DIM))[0], k * OVERFETCH)
+    with span('similarity.lookup'):
+        with SessionLocal() as db:
+            rows = {row.id: row for row in db.execute(
+                select(UserAnalysis.id, UserAnalysis.user_id, UserAnalysis.overall_score,
+                       UserAnalysis.predicted_company_type, UserAnalysis.outcome_company_type,
+                       UserAnalysis.outcome_score, UserAnalysis.created_at)
+                .where(UserAnalysis.id.in_(ids.tolist()))
+            )}
+
+    neighbors, seen = [], set()
+    for analysis_id, distance in zip(ids.tolist(), distances.tolist()):
+        row = rows.get(analysis_id)
+        if row is None or (row.user_id is not None and (row.user_id == exclude_user or row.user_id in seen)):
+            continue
+        seen.add(row.user_id)
+        neighbors.append({
+            'distance': round(distance, 4),
+            'overall_score': row.overall_score,
+            'predicted_company_type': row.predicted_company_type,
+            'outcome_company_type': row.outcome_company_type,
+            'outcome_score': row.outcome_score,
+            'analysed_at': row.created_at.isoformat() if row.created_at else None,
+        })
+        if len(neighbors) == k:
+            break
+
+    outcomes = Counter(n['outcome_company_type'] for n in neighbors if n['outcome_company_type'])
+    stats = index.stats()
+    return {
+        'neighbors': neighbors,
+        # Reported placements among the neighbors, by company type
+        'outcomes': dict(outcomes),
+        'index': {
+            'rows': stats['rows'],
+            'mode': stats['mode'],
+            # Built with another scaler; resynced shortly
+            'stale': index._snapshot is not None and index._snapshot.scaler != scaler_checksum(scaler),
+        },
+    }
+
+
+def main(argv: Optional[list] = None):
+    from .model_bundle import load_bundle
+    from .models import init_db
+
+    parser = argparse.ArgumentParser(description="Build or update the similar-students index")
+    parser.add_argument("--rebuild", action="store_true", help="index every analysis from scratch")
+    args = parser.parse_args(argv)
+
+    init_db()
+    started = time.perf_counter()
+    state = sync(load_bundle().scaler, rebuild=args.rebuild)
+    if state is None:
+        raise SystemExit("Another process is updating the index")
+    print(f"Indexed {state['rows']} analyses in {state['generation']} "
+          f"({state['lists'] or 'no'} lists) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
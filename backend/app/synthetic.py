@@ -0,0 +1,234 @@
+"""Chunked synthetic student generator for training and load tests.
+
+Rows are produced in float32 blocks of STREAM_BLOCK_ROWS, each drawn from
+its own RNG stream derived from (seed, block index), so any row's values
+depend only on the seed and the row's position: the output is identical
+whatever chunk size it is read, written or generated in parallel with.
+Datasets are written straight to disk, either as a directory of ``.npy``
+files (memory-mappable) or as one Parquet file, and read back chunk by chunk:
+
+    python -m app.synthetic --rows 50000000 --out data/students --format npy
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from .predictor import FEATURE_NAMES
+
+# Bump when the generated distribution changes
+GENERATOR_VERSION = 1
+STREAM_BLOCK_ROWS = 65_536
+TARGET_NAMES = ['placement_score', 'company_type']
+COLUMNS = FEATURE_NAMES + TARGET_NAMES
+
+# (features float32 (n, 6), placement_score float32 (n,), company_type int8 (n,))
+Chunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def block_rng(seed: int, block_index: int) -> np.random.Generator:
+    """Independent stream for one block of rows"""
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(block_index,))))
+
+
+def generate_block(seed: int, block_index: int, n_rows: int = STREAM_BLOCK_ROWS) -> np.ndarray:
+    """One (n_rows, len(COLUMNS)) float32 block in COLUMNS order"""
+    rng = block_rng(seed, block_index)
+    f32 = np.float32
+    block = np.empty((n_rows, len(COLUMNS)), dtype=f32)
+
+    cgpa = np.clip(rng.standard_normal(n_rows, dtype=f32) * f32(1.2) + f32(7.5), 5.0, 10.0)
+    leetcode = np.minimum(rng.standard_exponential(n_rows, dtype=f32) * f32(150), 2000)
+    codeforces = np.clip(rng.standard_normal(n_rows, dtype=f32) * f32(400) + f32(1400), 800, 3500)
+    projects = np.minimum(rng.poisson(4, n_rows), 25).astype(f32)
+    skills = np.clip(rng.poisson(8, n_rows), 1, 30).astype(f32)
+    experience = np.minimum(rng.standard_exponential(n_rows, dtype=f32) * f32(1.2), 8)
+
+    # Unobserved factors: drive the targets but are not model inputs
+    github_repos = np.minimum(rng.poisson(12, n_rows), 100).astype(f32)
+    contests = np.minimum(rng.poisson(15, n_rows), 100).astype(f32)
+    open_source = np.minimum(rng.poisson(5, n_rows), 50).astype(f32)
+    internship = rng.random(n_rows, dtype=f32) < 0.6
+
+    score = (
+        cgpa * 8 + leetcode * f32(0.08) + codeforces * f32(0.04) + projects * 4
+        + skills * f32(2.5) + experience * 6 + github_repos * f32(1.5)
+        + contests * f32(0.8) + open_source * 2 + internship * f32(15)
+    )
+    score = np.clip(score / f32(2.5), 0, 100)
+
+    # 0: Service-based, 1: Product-based, 2: Startup, 3: FAANG, with noise
+    company = np.digitize(score, [50, 70, 85]).astype(f32)
+    company = np.clip(company + rng.standard_normal(n_rows, dtype=f32) * f32(0.1), 0, 3).astype(np.int8)
+
+    for i, column in enumerate((cgpa, leetcode, codeforces, projects, skills, experience, score, company)):
+        block[:, i] = column
+    return block
+
+
+def iter_synthetic(n_rows: int, chunk_rows: int = STREAM_BLOCK_ROWS, seed: int = 42) -> Iterator[np.ndarray]:
+    """Yield float32 (rows, len(COLUMNS)) chunks covering rows [0, n_rows)"""
+    pending, pending_rows, produced = [], 0, 0
+    for block_index in range(-(-n_rows // STREAM_BLOCK_ROWS)):
+        rows = min(STREAM_BLOCK_ROWS, n_rows - block_index * STREAM_BLOCK_ROWS)
+        pending.append(generate_block(seed, block_index, STREAM_BLOCK_ROWS)[:rows])
+        pending_rows += rows
+        while pending_rows >= chunk_rows or (pending_rows and produced + pending_rows == n_rows):
+            merged = pending[0] if len(pending) == 1 else np.concatenate(pending)
+            take = min(chunk_rows, len(merged))
+            yield merged[:take]
+            produced += take
+            pending = [merged[take:]] if take < len(merged) else []
+            pending_rows = len(merged) - take
+
+
+def split_chunk(chunk: np.ndarray) -> Chunk:
+    n = len(FEATURE_NAMES)
+    return chunk[:, :n], chunk[:, n], chunk[:, n + 1].astype(np.int8)
+
+
+def generate(n_rows: int, seed: int = 42) -> Chunk:
+    """Whole dataset in memory; for small row counts"""
+    chunks = list(iter_synthetic(n_rows, seed=seed))
+    data = np.concatenate(chunks) if chunks else np.empty((0, len(COLUMNS)), dtype=np.float32)
+    return split_chunk(data)
+
+
+def generate_training_data(n_samples=10000, random_state=42):
+    """Synthetic training data as a DataFrame with FEATURE_NAMES and target columns"""
+    import pandas as pd
+
+    X, y_score, y_company = generate(n_samples, random_state)
+    df = pd.DataFrame(X, columns=FEATURE_NAMES)
+    df['placement_score'] = y_score
+    df['company_type'] = y_company
+    return df
+
+
+def _metadata(n_rows: int, seed: int, data_format: str) -> dict:
+    return {
+        'generator_version': GENERATOR_VERSION,
+        'rows': n_rows,
+        'seed': seed,
+        'format': data_format,
+        'feature_names': FEATURE_NAMES,
+        'target_names': TARGET_NAMES,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def _fill_npy_blocks(path: Path, n_rows: int, seed: int, block_indices):
+    """Generate some blocks straight into the dataset's memmaps; runs in a worker"""
+    features = np.load(path / 'features.npy', mmap_mode='r+')
+    placement = np.load(path / 'placement_score.npy', mmap_mode='r+')
+    company = np.load(path / 'company_type.npy', mmap_mode='r+')
+    for block_index in block_indices:
+        start = block_index * STREAM_BLOCK_ROWS
+        stop = min(start + STREAM_BLOCK_ROWS, n_rows)
+        X, y_score, y_company = split_chunk(generate_block(seed, block_index)[:stop - start])
+        features[start:stop], placement[start:stop], company[start:stop] = X, y_score, y_company
+    features.flush(), placement.flush(), company.flush()
+
+
+def write_npy(path, n_rows: int, seed: int = 42, n_jobs: int = 1) -> Path:
+    """Write a dataset as .npy files (features, placement_score, company_type)"""
+    from joblib import Parallel, delayed
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    # Allocate the files (header + sparse data); workers then fill them
+    for name, dtype, shape in (('features', np.float32, (n_rows, len(FEATURE_NAMES))),
+                               ('placement_score', np.float32, (n_rows,)),
+                               ('company_type', np.int8, (n_rows,))):
+        np.lib.format.open_memmap(path / f'{name}.npy', mode='w+', dtype=dtype, shape=shape).flush()
+
+    # Blocks are independent streams, so workers fill disjoint slices
+    n_blocks = -(-n_rows // STREAM_BLOCK_ROWS)
+    n_jobs = max(1, min(n_jobs, n_blocks))
+    Parallel(n_jobs=n_jobs)(
+        delayed(_fill_npy_blocks)(path, n_rows, seed, range(worker, n_blocks, n_jobs))
+        for worker in range(n_jobs)
+    )
+    with open(path / 'meta.json', 'w') as f:
+        json.dump(_metadata(n_rows, seed, 'npy'), f, indent=2)
+    return path
+
+
+def write_parquet(path, n_rows: int, seed: int = 42, chunk_rows: int = 1 << 20) -> Path:
+    """Write a dataset as one Parquet file, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    schema = pa.schema(
+        [(name, pa.float32()) for name in FEATURE_NAMES]
+        + [('placement_score', pa.float32()), ('company_type', pa.int8())],
+        metadata={'synthetic': json.dumps(_metadata(n_rows, seed, 'parquet'))},
+    )
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in iter_synthetic(n_rows, chunk_rows, seed):
+            X, y_score, y_company = split_chunk(chunk)
+            arrays = [pa.array(X[:, i]) for i in range(X.shape[1])] + [pa.array(y_score), pa.array(y_company)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return path
+
+
+def open_npy(path) -> Chunk:
+    """Memory-mapped (features, placement_score, company_type) of an npy dataset"""
+    path = Path(path)
+    return (
+        np.load(path / 'features.npy', mmap_mode='r'),
+        np.load(path / 'placement_score.npy', mmap_mode='r'),
+        np.load(path / 'company_type.npy', mmap_mode='r'),
+    )
+
+
+def dataset_rows(path) -> int:
+    path = Path(path)
+    if path.is_dir():
+        return int(np.load(path / 'placement_score.npy', mmap_mode='r').shape[0])
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def iter_dataset(path, chunk_rows: int = 1 << 20) -> Iterator[Chunk]:
+    """Read an npy directory or Parquet file back in (features, score, company) chunks"""
+    path = Path(path)
+    if path.is_dir():
+        features, placement, company = open_npy(path)
+        for start in range(0, len(placement), chunk_rows):
+            stop = start + chunk_rows
+            yield np.asarray(features[start:stop]), np.asarray(placement[start:stop]), np.asarray(company[start:stop])
+        return
+
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=COLUMNS):
+        X = np.column_stack([batch.column(name).to_numpy() for name in FEATURE_NAMES]).astype(np.float32)
+        yield X, batch.column('placement_score').to_numpy(), batch.column('company_type').to_numpy()
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Write a synthetic student dataset to disk")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", required=True, help="directory (npy) or file (parquet)")
+    parser.add_argument("--format", choices=("npy", "parquet"), default="npy")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="writer processes (npy only)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.format == "npy":
+        path = write_npy(args.out, args.rows, args.seed, args.jobs)
+    else:
+        path = write_parquet(args.out, args.rows, args.seed)
+    seconds = time.perf_counter() - started
+    print(f"Wrote {args.rows} rows to {path} in {seconds:.1f}s ({args.rows / seconds:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""Model training pipeline: data, split, scaling, fitting, evaluation, bundling.
+
+train_model.py is the command-line entry point. Data is generated in memory
+by app.synthetic, or streamed from a dataset it wrote to disk: one pass fits
+the scaler on every training row with ``partial_fit`` and keeps a bounded,
+reproducible sample for the tree learners, which bin features into
+histograms anyway. The placement and company
+models are fitted in parallel worker processes, each with half of the cores.
+The placement model is a histogram-based gradient booster by default, and can
+be GradientBoostingRegressor or xgboost instead; boosting always stops early
+on a validation split. Hyperparameter search uses successive halving with
+cross-validation, so most candidates are discarded after seeing only a
+fraction of the rows. ``warm_start`` continues fitting served models on new
+data for app.online_training.
+"""
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+
+from . import synthetic
+
+LEARNERS = ('hist', 'gbr', 'xgboost')
+
+
+@dataclass
+class TrainingConfig:
+    n_samples: int = 10000
+    test_size: float = 0.2
+    random_state: int = 42
+    # Placement model: "hist" (HistGradientBoostingRegressor), "gbr"
+    # (GradientBoostingRegressor) or "xgboost"
+    learner: str = 'hist'
+    # Upper bound on boosting rounds; early stopping usually ends sooner
+    max_iter: int = 1000
+    early_stopping_rounds: int = 20
+    validation_fraction: float = 0.1
+    forest_trees: int = 200
+    # Bootstrap sample per forest tree, capped so large datasets stay fast
+    forest_max_samples: Optional[int] = 250_000
+    search: bool = False
+    search_candidates: int = 24
+    cv_folds: int = 3
+    n_jobs: int = field(default_factory=lambda: os.cpu_count() or 1)
+    # Train from an app.synthetic dataset on disk (npy directory or Parquet
+    # file) instead of generating n_samples rows in memory
+    data_path: Optional[str] = None
+    # Rows of an on-disk dataset kept in memory for fitting and evaluation
+    max_train_rows: int = 2_000_000
+    max_test_rows: int = 500_000
+    read_chunk_rows: int = 1 << 20
+
+
+class StageTimer:
+    """Wall-clock seconds per named pipeline stage"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def report(self) -> str:
+        # Indented stages break down the one above them and are not summed
+        total = sum(seconds for name, seconds in self.stages.items() if not name.startswith(' '))
+        lines = [f"{'stage':<22} {'seconds':>9} {'share':>7}"]
+        for name, seconds in self.stages.items():
+            lines.append(f"{name:<22} {seconds:>9.2f} {seconds / total if total else 0:>7.1%}")
+        lines.append(f"{'total':<22} {total:>9.2f}")
+        return '\n'.join(lines)
+
+
+# Search spaces, sampled by HalvingRandomSearchCV
+
+def _placement_search_space(learner: str) -> dict:
+    from scipy.stats import loguniform, randint
+
+    if learner == 'hist':
+        return {
+            'learning_rate': loguniform(0.02, 0.3),
+            'max_leaf_nodes': [15, 31, 63, 127],
+            'min_samples_leaf': randint(5, 200),
+            'l2_regularization': loguniform(1e-4, 10),
+        }
+    if learner == 'gbr':
+        return {
+            'learning_rate': loguniform(0.02, 0.3),
+            'max_depth': randint(3, 9),
+            'min_samples_leaf': randint(1, 100),
+            'subsample': [0.6, 0.8, 1.0],
+        }
+    return {
+        'learning_rate': loguniform(0.02, 0.3),
+        'max_depth': randint(3, 10),
+        'min_child_weight': loguniform(0.5, 20),
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+    }
+
+
+COMPANY_SEARCH_SPACE = {
+    'max_depth': [8, 10, 14, 20, None],
+    'min_samples_leaf': [1, 2, 5, 10, 20],
+    'max_features': ['sqrt', 0.5, 1.0],
+}
+
+
+def placement_estimator(config: TrainingConfig, threads: int):
+    """Unfitted placement score regressor with early stopping"""
+    if config.learner == 'hist':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        return HistGradientBoostingRegressor(
+            max_iter=config.max_iter,
+            learning_rate=0.1,
+            early_stopping=True,
+            validation_fraction=config.validation_fraction,
+            n_iter_no_change=config.early_stopping_rounds,
+            random_state=config.random_state,
+        )
+    if config.learner == 'gbr':
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(
+            n_estimators=config.max_iter,
+            learning_rate=0.1,
+            max_depth=6,
+            validation_fraction=config.validation_fraction,
+            n_iter_no_change=config.early_stopping_rounds,
+            random_state=config.random_state,
+        )
+    if config.learner == 'xgboost':
+        from xgboost import XGBRegressor
+        return XGBRegressor(
+            n_estimators=config.max_iter,
+            learning_rate=0.1,
+            max_depth=6,
+            tree_method='hist',
+            early_stopping_rounds=config.early_stopping_rounds,
+            n_jobs=threads,
+            random_state=config.random_state,
+        )
+    raise ValueError(f"unknown learner '{config.learner}', expected one of {LEARNERS}")
+
+
+def company_estimator(config: TrainingConfig, threads: int, n_rows: int):
+    """Unfitted company type classifier"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    max_samples = None
+    if config.forest_max_samples is not None and n_rows > config.forest_max_samples:
+        max_samples = config.forest_max_samples
+    return RandomForestClassifier(
+        n_estimators=config.forest_trees,
+        max_depth=10,
+        max_samples=max_samples,
+        n_jobs=threads,
+        random_state=config.random_state,
+    )
+
+
+def _search(estimator, space: dict, X, y, config: TrainingConfig, threads: int, scoring=None, **fit_params):
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingRandomSearchCV
+
+    search = HalvingRandomSearchCV(
+        estimator,
+        space,
+        n_candidates=config.search_candidates,
+        cv=config.cv_folds,
+        factor=3,
+        # Start as small as lets the last round use (nearly) every row
+        min_resources='exhaust',
+        scoring=scoring,
+        n_jobs=threads,
+        random_state=config.random_state,
+        refit=True,
+    )
+    search.fit(X, y, **fit_params)
+    summary = {
+        'best_params': {k: _plain(v) for k, v in search.best_params_.items()},
+        'best_cv_score': float(search.best_score_),
+        'candidates': int(search.n_candidates_[0]),
+        'iterations': int(search.n_iterations_),
+        'resources': [int(r) for r in search.n_resources_],
+    }
+    return search.best_estimator_, summary
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def fit_placement_model(X, y, config: TrainingConfig, threads: int):
+    """Fit (optionally search) the placement model; runs in a worker process"""
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    fit_params = {}
+    if config.learner == 'xgboost':
+        # xgboost stops early against an explicit validation split
+        from sklearn.model_selection import train_test_split
+        X, X_val, y, y_val = train_test_split(
+            X, y, test_size=config.validation_fraction, random_state=config.random_state
+        )
+        fit_params = {'eval_set': [(X_val, y_val)], 'verbose': False}
+
+    with threadpool_limits(threads):
+        estimator = placement_estimator(config, threads)
+        if config.search:
+            model, search = _search(estimator, _placement_search_space(config.learner), X, y,
+                                    config, threads, scoring='neg_mean_squared_error', **fit_params)
+        else:
+            model, search = estimator.fit(X, y, **fit_params), None
+    return model, time.perf_counter() - started, search
+
+
+def fit_company_model(X, y, config: TrainingConfig, threads: int):
+    """Fit (optionally search) the company model; runs in a worker process"""
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    with threadpool_limits(threads):
+        estimator = company_estimator(config, threads, len(X))
+        if config.search:
+            model, search = _search(estimator, COMPANY_SEARCH_SPACE, X, y, config, threads)
+        else:
+            model, search = estimator.fit(X, y), None
+    return model, time.perf_counter() - started, search
+
+
+def warm_start(model, X, y, extra: int):
+    """Continue fitting a fitted model on (X, y) with up to ``extra`` more
+    boosting rounds or forest trees; what it learned so far is kept"""
+    name = type(model).__name__
+    if name.startswith('HistGradientBoosting'):
+        model.set_params(warm_start=True, max_iter=model.n_iter_ + extra)
+        model.fit(X, y)
+    elif name.startswith('GradientBoosting'):
+        model.set_params(warm_start=True, n_estimators=model.n_estimators_ + extra)
+        model.fit(X, y)
+    elif name.startswith('RandomForest'):
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + extra)
+        model.fit(X, y)
+    elif name.startswith('XGB'):
+        # Boosting continues from the fitted booster; there is no validation
+        # split to stop early against
+        booster = model.get_booster()
+        model.set_params(n_estimators=extra, early_stopping_rounds=None)
+        model.fit(X, y, xgb_model=booster, verbose=False)
+    else:
+        raise TypeError(f"cannot warm-start a {name}")
+    if 'warm_start' in model.get_params():
+        model.set_params(warm_start=False)
+    return model
+
+
+def boosting_rounds(model) -> Optional[int]:
+    """Rounds the placement model kept after early stopping"""
+    for attribute in ('n_iter_', 'n_estimators_', 'best_iteration'):
+        value = getattr(model, attribute, None)
+        if value is not None:
+            return int(value) + (1 if attribute == 'best_iteration' else 0)
+    return None
+
+
+def data_fingerprint(*arrays) -> str:
+    digest = hashlib.sha256()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class TrainingResult:
+    placement_model: object
+    company_model: object
+    scaler: object
+    metrics: dict
+    timings: Dict[str, float]
+    search: Optional[dict]
+    metadata: dict
+
+
+def train(X: np.ndarray, y_score: np.ndarray, y_company: np.ndarray,
+          config: TrainingConfig, timer: Optional[StageTimer] = None) -> TrainingResult:
+    """Split, scale, fit both models in parallel and evaluate on the holdout"""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    timer = timer or StageTimer()
+
+    with timer.stage('split'):
+        X_train, X_test, y_score_train, y_score_test, y_company_train, y_company_test = train_test_split(
+            X, y_score, y_company, test_size=config.test_size, random_state=config.random_state
+        )
+
+    with timer.stage('scale'):
+        scaler = StandardScaler().fit(X_train)
+
+    return fit_and_evaluate(
+        (X_train, y_score_train, y_company_train), (X_test, y_score_test, y_company_test), scaler,
+        config, timer, data={'n_samples': int(len(X)), 'fingerprint': data_fingerprint(X, y_score, y_company)},
+    )
+
+
+def load_sample(path, config: TrainingConfig, timer: Optional[StageTimer] = None):
+    """Stream an on-disk dataset once: split, fit the scaler, and sample.
+
+    Every row is assigned to train or test by a uniform draw from an RNG
+    stream per read chunk. The scaler sees all training rows via
+    ``partial_fit``; at most max_train_rows / max_test_rows rows are kept.
+    Returns (train, test, scaler, data info).
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    timer = timer or StageTimer()
+    n_rows = synthetic.dataset_rows(path)
+    keep_train = min(1.0, config.max_train_rows / max(1.0, n_rows * (1 - config.test_size)))
+    keep_test = min(1.0, config.max_test_rows / max(1.0, n_rows * config.test_size))
+
+    scaler = StandardScaler()
+    train_parts, test_parts = [], []
+    with timer.stage('stream + sample'):
+        chunks = synthetic.iter_dataset(path, config.read_chunk_rows)
+        for index, (X, y_score, y_company) in enumerate(chunks):
+            draw = np.random.default_rng([config.random_state, index]).random(len(X))
+            is_test = draw < config.test_size
+            if (~is_test).any():
+                scaler.partial_fit(X[~is_test])
+            # Reuse the same draw, rescaled to [0, 1) within each side
+            train_rows = ~is_test & ((draw - config.test_size) < keep_train * (1 - config.test_size))
+            test_rows = is_test & (draw < keep_test * config.test_size)
+            train_parts.append((X[train_rows], y_score[train_rows], y_company[train_rows]))
+            test_parts.append((X[test_rows], y_score[test_rows], y_company[test_rows]))
+
+    def stack(parts):
+        return tuple(np.concatenate([part[i] for part in parts]) for i in range(3))
+
+    data = {
+        'path': str(path),
+        'n_samples': int(n_rows),
+        'train_sample': int(sum(len(part[1]) for part in train_parts)),
+        'test_sample': int(sum(len(part[1]) for part in test_parts)),
+    }
+    return stack(train_parts), stack(test_parts), scaler, data
+
+
+def fit_and_evaluate(train_data, test_data, scaler, config: TrainingConfig,
+                     timer: StageTimer, data: dict) -> TrainingResult:
+    """Fit both models in parallel on scaled train data and score the holdout"""
+    import sklearn
+    from joblib import Parallel, delayed
+    from sklearn.metrics import accuracy_score, mean_squared_error
+
+    X_train, y_score_train, y_company_train = train_data
+    X_test, y_score_test, y_company_test = test_data
+    with timer.stage('scale'):
+        X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+
+    # Two worker processes with half the cores each; on a single core both
+    # models are fitted in this process one after the other
+    workers = min(2, config.n_jobs)
+    threads = max(1, config.n_jobs // workers)
+    with timer.stage('fit (wall)'):
+        (placement_model, placement_seconds, placement_search), \
+            (company_model, company_seconds, company_search) = Parallel(n_jobs=workers)([
+                delayed(fit_placement_model)(X_train_scaled, y_score_train, config, threads),
+                delayed(fit_company_model)(X_train_scaled, y_company_train, config, threads),
+            ])
+    timer.stages['  placement model'] = placement_seconds
+    timer.stages['  company model'] = company_seconds
+
+    with timer.stage('evaluate'):
+        score_mse = mean_squared_error(y_score_test, placement_model.predict(X_test_scaled))
+        company_acc = accuracy_score(y_company_test, company_model.predict(X_test_scaled))
+
+    metrics = {'placement_mse': float(score_mse), 'company_accuracy': float(company_acc)}
+    search = None
+    if config.search:
+        search = {'placement_model': placement_search, 'company_model': company_search}
+
+    metadata = {
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': asdict(config),
+        'n_samples': data['n_samples'],
+        'data': data,
+        'sklearn_version': sklearn.__version__,
+        'placement_model': {
+            'class': type(placement_model).__name__,
+            'params': {k: _plain(v) for k, v in placement_model.get_params().items()
+                       if v is None or isinstance(v, (bool, int, float, str, np.generic))},
+            'boosting_rounds': boosting_rounds(placement_model),
+        },
+        'company_model': {'class': type(company_model).__name__, 'params': company_model.get_params()},
+        'metrics': metrics,
+        'search': search,
+    }
+    return TrainingResult(placement_model, company_model, scaler, metrics, timer.stages, search, metadata)
+
+
+def run_pipeline(config: TrainingConfig, X=None, y_score=None, y_company=None, save: bool = True) -> TrainingResult:
+    """Generate data (unless given), train, save a bundle and print a timing report"""
+    from .model_bundle import save_bundle
+
+    timer = StageTimer()
+    mode = f"{config.n_jobs} cores{', with hyperparameter search' if config.search else ''}"
+    if X is None and config.data_path:
+        print(f"Streaming {config.data_path}...")
+        train_data, test_data, scaler, data = load_sample(config.data_path, config, timer)
+        print(f"Training {config.learner} placement model and random forest on a {data['train_sample']}-row "
+              f"sample of {data['n_samples']} rows ({mode})...")
+        result = fit_and_evaluate(train_data, test_data, scaler, config, timer, data)
+    else:
+        if X is None:
+            print(f"Generating {config.n_samples} training rows...")
+            with timer.stage('generate data'):
+                X, y_score, y_company = synthetic.generate(config.n_samples, config.random_state)
+        print(f"Training {config.learner} placement model and random forest on {len(X)} rows ({mode})...")
+        result = train(X, y_score, y_company, config, timer)
+
+    print(f"Placement Score Model - MSE: {result.metrics['placement_mse']:.2f} "
+          f"({result.metadata['placement_model']['boosting_rounds']} rounds)")
+    print(f"Company Type Model - Accuracy: {result.metrics['company_accuracy']:.3f}")
+    if result.search:
+        for name, summary in result.search.items():
+            print(f"Best {name} params: {summary['best_params']} (CV score {summary['best_cv_score']:.4f})")
+
+    if save:
+        with timer.stage('save bundle'):
+            bundle_path = save_bundle(result.placement_model, result.company_model, result.scaler,
+                                      training=dict(result.metadata, timings=timer.stages))
+        print(f"Models saved successfully to {bundle_path}")
+
+    print()
+    print(timer.report())
+    return result
@@ -0,0 +1,239 @@
+"""Vectorized NumPy inference for the sklearn tree ensembles.
+
+Every tree of an ensemble is flattened into shared contiguous node arrays
+(feature, threshold, left/right child, leaf value) and a batch is evaluated by
+advancing every (row, tree) pair one level per step; large batches walk one
+tree at a time over all rows instead. The StandardScaler is folded into the
+thresholds, so raw features go straight in:
+
+    (x - mean) / scale <= t   <=>   x <= t * scale + mean
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+
+def _fold_thresholds(threshold: np.ndarray, feature: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                     dtype=np.float32) -> np.ndarray:
+    """Map scaled-space split thresholds to raw feature space.
+
+    sklearn goes left when dtype((x - mean) / scale) <= threshold. With
+    float32 that holds exactly when the scaled value is below the midpoint
+    between the largest float32 not above the threshold and its successor,
+    so that midpoint is what gets unscaled. Unscaling is only accurate to a
+    few ulps; the test is monotone in x, so stepping one ulp at a time with
+    sklearn's own arithmetic then finds the largest raw x that goes left.
+    """
+    if dtype == np.float32:
+        t32 = threshold.astype(np.float32)
+        t32 = np.where(t32.astype(np.float64) > threshold, np.nextafter(t32, np.float32(-np.inf)), t32)
+        upper = np.nextafter(t32, np.float32(np.inf))
+        boundary = (t32.astype(np.float64) + upper.astype(np.float64)) / 2
+    else:
+        boundary = threshold
+    mean, scale = mean[feature], scale[feature]
+
+    def goes_left(x, nodes):
+        return ((x - mean[nodes]) / scale[nodes]).astype(dtype) <= threshold[nodes]
+
+    folded = boundary * scale + mean
+    # Nodes still moving; most settle within a step or two
+    nodes = np.arange(len(folded))
+    for _ in range(64):
+        x = folded[nodes]
+        # Too high: step down; the next value up also goes left: step up
+        down = ~goes_left(x, nodes)
+        up = ~down & goes_left(np.nextafter(x, np.inf), nodes)
+        moving = down | up
+        if not moving.any():
+            break
+        folded[nodes] = np.where(down, np.nextafter(x, -np.inf), np.where(up, np.nextafter(x, np.inf), x))
+        nodes = nodes[moving]
+    return folded
+
+
+class CompiledTrees:
+    """A list of sklearn decision trees packed into flat node arrays"""
+
+    # Above this many (row, tree) pairs, trees are walked one at a time over
+    # all rows so the working set stays cache-sized
+    breadth_first_limit = 32_768
+
+    def __init__(self, trees: List, mean: np.ndarray, scale: np.ndarray, leaf_values: List[np.ndarray],
+                 fold=None):
+        n_nodes = [tree.node_count for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(n_nodes)]).astype(np.intp)
+
+        if fold is None:
+            fold = lambda threshold, feature: _fold_thresholds(threshold, feature, mean, scale)
+        features, thresholds, leaves, children = [], [], [], []
+        for tree in trees:
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            leaves.append(is_leaf)
+            # Leaves point at themselves, so extra steps past a leaf are no-ops
+            children.append(np.column_stack([
+                np.where(is_leaf, node_ids, tree.children_left),
+                np.where(is_leaf, node_ids, tree.children_right),
+            ]))
+
+        # Child indices are local to their tree; roots[i] is tree i's offset
+        self.roots = offsets[:-1]
+        self.bounds = offsets
+        self.feature = np.concatenate(features).astype(np.intp)
+        # Folded for every tree at once
+        is_leaf = np.concatenate(leaves)
+        self.threshold = np.where(is_leaf, 0.0, fold(np.concatenate(thresholds).astype(np.float64), self.feature))
+        # children[2 * node + went_right]
+        self.children = np.concatenate(children).astype(np.intp).ravel()
+        self.value = np.concatenate(leaf_values).astype(np.float64)
+        self.depths = np.array([tree.max_depth for tree in trees])
+        self.n_trees = len(trees)
+        # Same children, as global node indices, for walking all trees at once
+        self.global_children = self.children + np.repeat(self.roots, 2 * np.diff(offsets))
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf node index reached in every tree, shape (n_rows, n_trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.shape[0] * self.n_trees <= self.breadth_first_limit:
+            return self._apply_all_trees(X)
+        return self._apply_tree_by_tree(X)
+
+    def _apply_all_trees(self, X: np.ndarray) -> np.ndarray:
+        """Every (row, tree) pair advances one level per step"""
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_base = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        nodes = np.tile(self.roots, n_rows)
+        for _ in range(self.depths.max()):
+            went_right = flat[row_base + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.global_children[2 * nodes + went_right]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def _apply_tree_by_tree(self, X: np.ndarray) -> np.ndarray:
+        """All rows advance through one tree at a time (column-major features)"""
+        n_rows = X.shape[0]
+        columns = np.ascontiguousarray(X.T).ravel()
+        rows = np.arange(n_rows, dtype=np.intp)
+        leaves = np.empty((self.n_trees, n_rows), dtype=np.intp)
+        for i in range(self.n_trees):
+            lo, hi = self.bounds[i], self.bounds[i + 1]
+            feature = self.feature[lo:hi]
+            threshold = self.threshold[lo:hi]
+            children = self.children[2 * lo:2 * hi]
+            nodes = np.zeros(n_rows, dtype=np.intp)
+            for _ in range(self.depths[i]):
+                went_right = columns[feature[nodes] * n_rows + rows] > threshold[nodes]
+                nodes = children[2 * nodes + went_right]
+            leaves[i] = nodes + lo
+        return leaves.T
+
+
+def _scaler_params(scaler, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return mean, scale
+
+
+class CompiledGradientBoosting:
+    """GradientBoostingRegressor (squared error) with the scaler folded in"""
+
+    def __init__(self, model, scaler):
+        n_features = model.n_features_in_
+        mean, scale = _scaler_params(scaler, n_features)
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        self.trees = CompiledTrees(
+            trees, mean, scale, [tree.value[:, 0, 0] for tree in trees]
+        )
+        self.learning_rate = model.learning_rate
+        if model.init_ == 'zero':
+            self.init = 0.0
+        else:
+            self.init = float(np.ravel(model.init_.predict(np.zeros((1, n_features))))[0])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.trees.apply(X)
+        return self.init + self.learning_rate * self.trees.value[leaves].sum(axis=1)
+
+
+class _HistTree:
+    """The parts of a sklearn tree_ that CompiledTrees reads, for one
+    HistGradientBoosting predictor"""
+
+    def __init__(self, nodes: np.ndarray):
+        is_leaf = nodes['is_leaf'].astype(bool)
+        self.node_count = len(nodes)
+        self.children_left = np.where(is_leaf, -1, nodes['left'].astype(np.intp))
+        self.children_right = np.where(is_leaf, -1, nodes['right'].astype(np.intp))
+        self.feature = nodes['feature_idx'].astype(np.intp)
+        self.threshold = nodes['num_threshold'].astype(np.float64)
+        self.max_depth = int(nodes['depth'].max())
+
+
+class CompiledHistGradientBoosting:
+    """HistGradientBoostingRegressor (squared error, numeric features) with the
+    scaler folded in; leaf values already include the learning rate"""
+
+    def __init__(self, model, scaler):
+        if model.loss != 'squared_error' or model.is_categorical_ is not None:
+            raise TypeError("only squared-error models on numeric features can be compiled")
+        mean, scale = _scaler_params(scaler, model.n_features_in_)
+        nodes = [predictors[0].nodes for predictors in model._predictors]
+        trees = [_HistTree(tree_nodes) for tree_nodes in nodes]
+        # HistGradientBoosting compares the float64 scaled values directly
+        self.trees = CompiledTrees(trees, mean, scale, [tree_nodes['value'] for tree_nodes in nodes],
+                                   fold=lambda threshold, feature: _fold_thresholds(threshold, feature, mean, scale,
+                                                                                    np.float64))
+        self.init = float(np.ravel(model._baseline_prediction)[0])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.trees.apply(X)
+        return self.init + self.trees.value[leaves].sum(axis=1)
+
+
+def compile_regressor(model, scaler):
+    """Compiled equivalent of a placement model; TypeError if unsupported"""
+    from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+    if isinstance(model, GradientBoostingRegressor):
+        return CompiledGradientBoosting(model, scaler)
+    if isinstance(model, HistGradientBoostingRegressor):
+        return CompiledHistGradientBoosting(model, scaler)
+    raise TypeError(f"no compiled engine for {type(model).__name__}")
+
+
+class CompiledRandomForest:
+    """RandomForestClassifier.predict_proba with the scaler folded in"""
+
+    def __init__(self, model, scaler):
+        mean, scale = _scaler_params(scaler, model.n_features_in_)
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        leaf_probs = []
+        for tree in trees:
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1, keepdims=True)
+            leaf_probs.append(counts / np.where(totals == 0, 1, totals))
+        self.trees = CompiledTrees(trees, mean, scale, leaf_probs)
+        self.classes_ = model.classes_
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.trees.apply(X)
+        return self.trees.value[leaves].mean(axis=1)
+
+
+class CompiledModels:
+    """Drop-in replacement for scaler.transform + predict + predict_proba"""
+
+    def __init__(self, placement_model, company_model, scaler):
+        self.placement = compile_regressor(placement_model, scaler)
+        self.company = CompiledRandomForest(company_model, scaler)
+
+    def score(self, features: np.ndarray):
+        """Same contract as predictor.score_features, on unscaled features"""
+        scores = self.placement.predict(features).astype(int)
+        company_probs = self.company.predict_proba(features)
+        return scores, company_probs
@@ -0,0 +1,318 @@
+"""Rate limiting and circuit breaking for calls to the coding platforms.
+
+Every upstream call goes through the platform's UpstreamGuard:
+
+- a token bucket per credential enforces the platform's quota. Callers wait
+  up to UPSTREAM_MAX_WAIT seconds for a token and fail fast with
+  RateLimited after that. With several GitHub tokens, each call uses the
+  token with the most quota left.
+- a circuit breaker opens after CIRCUIT_FAILURE_THRESHOLD consecutive
+  failures and rejects calls with CircuitOpen for CIRCUIT_RESET_SECONDS.
+  After that a single trial call decides whether it closes again.
+
+Both errors are UpstreamUnavailable. Callers treat them like any other
+transient failure, so they are never cached. Call durations and failures
+are recorded per platform in app.metrics.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS
+
+
+def _quota(name: str, default: str) -> Tuple[int, float]:
+    """Parse a '<requests>/<seconds>' quota"""
+    requests, seconds = os.getenv(name, default).split('/')
+    return int(requests), float(seconds)
+
+
+# Quotas as '<requests>/<seconds>'. GitHub allows 60 unauthenticated
+# requests per hour per IP and 5000 per hour per token; Codeforces documents
+# one call per two seconds (bursts of 5 are allowed here, at that average);
+# LeetCode publishes no limit.
+LEETCODE_RATE_LIMIT = _quota('LEETCODE_RATE_LIMIT', '5/1')
+CODEFORCES_RATE_LIMIT = _quota('CODEFORCES_RATE_LIMIT', '5/10')
+GITHUB_RATE_LIMIT = _quota('GITHUB_RATE_LIMIT', '60/3600')
+GITHUB_TOKEN_RATE_LIMIT = _quota('GITHUB_TOKEN_RATE_LIMIT', '5000/3600')
+# Comma-separated GitHub tokens, rotated by remaining quota
+GITHUB_TOKENS = [token.strip() for token in os.getenv('GITHUB_TOKENS', os.getenv('GITHUB_TOKEN', '')).split(',')
+                 if token.strip()]
+
+# Longest a call waits for quota before failing fast
+UPSTREAM_MAX_WAIT = float(os.getenv('UPSTREAM_MAX_WAIT', '5'))
+
+# app.refresher keeps REFRESH_QUOTA_SHARE of every quota. Run the API with
+# REFRESHER_ENABLED=1 when a refresher shares its credentials, so the API
+# keeps only the rest and the two together stay within the quota
+REFRESH_QUOTA_SHARE = float(os.getenv('REFRESH_QUOTA_SHARE', '0.5'))
+REFRESHER_ENABLED = os.getenv('REFRESHER_ENABLED', '0') == '1'
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+
+
+class UpstreamUnavailable(Exception):
+    """The call was not made: no quota left, or the platform is failing"""
+
+
+class RateLimited(UpstreamUnavailable):
+    pass
+
+
+class CircuitOpen(UpstreamUnavailable):
+    pass
+
+
+class TokenBucket:
+    """``capacity`` requests, refilled evenly over ``per_seconds``"""
+
+    def __init__(self, capacity: int, per_seconds: float, token: Optional[str] = None):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        # As configured, before any RateLimiter.scale
+        self.full_capacity = capacity
+        self.full_rate = self.rate
+        self.token = token
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        # Set when the platform reports the quota exhausted
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: int, now: float) -> float:
+        """Seconds until ``cost`` tokens are available"""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if cost > self.capacity:
+            return float('inf')
+        # Tokens go negative while calls wait for reserved ones
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def take(self, cost: int):
+        self.tokens -= cost
+
+    def sync(self, remaining: int, reset_at: float, now: float):
+        """Adopt the platform's own count (``reset_at`` on the monotonic clock)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, remaining)
+        if remaining <= 0:
+            self.blocked_until = max(self.blocked_until, reset_at)
+
+
+class RateLimiter:
+    """Token buckets for one platform, one per credential"""
+
+    def __init__(self, buckets: Sequence[TokenBucket], max_wait: float = UPSTREAM_MAX_WAIT):
+        self.buckets: List[TokenBucket] = list(buckets)
+        self.max_wait = max_wait
+        self.waited = 0
+        self.rejected = 0
+
+    async def acquire(self, cost: int = 1) -> Optional[str]:
+        """Take ``cost`` tokens from the best bucket; returns its credential.
+
+        Tokens are reserved before waiting (the bucket goes negative), so
+        concurrent waiters queue up behind each other instead of all waking
+        for the same refill.
+        """
+        now = time.monotonic()
+        bucket = min(self.buckets, key=lambda b: (b.wait_time(cost, now), -b.tokens))
+        wait = bucket.wait_time(cost, now)
+        if wait > self.max_wait:
+            self.rejected += 1
+            raise RateLimited(f"no quota for {wait:.1f}s")
+        bucket.take(cost)
+        if wait > 0:
+            self.waited += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                bucket.take(-cost)
+                raise
+        return bucket.token
+
+    def scale(self, fraction: float):
+        """Keep only ``fraction`` of every configured quota, e.g. for another
+        process sharing the same credentials; scaling again replaces it"""
+        for bucket in self.buckets:
+            bucket.capacity = max(1, int(bucket.full_capacity * fraction))
+            bucket.rate = bucket.full_rate * fraction
+            bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def refund(self, token: Optional[str], cost: int = 1):
+        """Return tokens for a call the platform did not count (e.g. a 304)"""
+        for bucket in self.buckets:
+            if bucket.token == token:
+                bucket.take(-cost)
+                bucket.tokens = min(bucket.tokens, bucket.capacity)
+                return
+
+    def sync(self, token: Optional[str], remaining: int, reset_epoch: float):
+        """Adopt a quota reported by the platform for one credential"""
+        now = time.monotonic()
+        for bucket in self.buckets:
+            if bucket.token == token:
+                bucket.sync(remaining, now + max(0.0, reset_epoch - time.time()), now)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            'credentials': len(self.buckets),
+            'tokens_available': [round(b.tokens, 1) for b in self.buckets],
+            'blocked_credentials': sum(1 for b in self.buckets if b.blocked_until > now),
+            'waited': self.waited,
+            'rejected': self.rejected,
+        }
+
+
+class CircuitBreaker:
+    """closed -> open after ``failure_threshold`` consecutive failures;
+    open -> half-open after ``reset_seconds``, letting one trial call through"""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return 'open'
+        return 'half_open'
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go through now"""
+        state = self.state
+        if state == 'open' or (state == 'half_open' and self.trial_in_flight):
+            self.rejected += 1
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            raise CircuitOpen(f"platform failing, next trial call in {retry_in:.0f}s")
+        if state == 'half_open':
+            self.trial_in_flight = True
+
+    def cancel(self):
+        """The permitted call was never made"""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.opened += 1
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.opened,
+            'rejected': self.rejected,
+        }
+
+
+def _never(error: BaseException) -> bool:
+    return False
+
+
+class UpstreamGuard:
+    """Rate limiter and circuit breaker of one platform"""
+
+    def __init__(self, limiter: RateLimiter, breaker: Optional[CircuitBreaker] = None,
+                 expected: Tuple[type, ...] = (), name: str = 'upstream',
+                 is_timeout: Callable[[BaseException], bool] = _never):
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        # Exceptions that are answers, not failures (e.g. unknown user)
+        self.expected = expected
+        self.name = name
+        # Tells timeouts apart from other failures in the error counts
+        self.is_timeout = is_timeout
+        self._seconds = UPSTREAM_SECONDS.labels(name)
+
+    def _count_error(self, reason: str):
+        UPSTREAM_ERRORS.labels(self.name, reason).inc()
+
+    @asynccontextmanager
+    async def call(self, cost: int = 1):
+        """Guard ``cost`` upstream requests; yields the credential to use"""
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            self._count_error('circuit_open')
+            raise
+        try:
+            token = await self.limiter.acquire(cost)
+        except BaseException as e:
+            self.breaker.cancel()
+            if isinstance(e, RateLimited):
+                self._count_error('rate_limited')
+            raise
+        started = time.perf_counter()
+        try:
+            yield token
+        except RateLimited:
+            # The platform's own limit; it is not down
+            self.breaker.cancel()
+            self._count_error('rate_limited')
+            raise
+        except asyncio.CancelledError:
+            self.breaker.cancel()
+            raise
+        except self.expected:
+            self.breaker.record_success()
+            self._seconds.observe(time.perf_counter() - started)
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            self._seconds.observe(time.perf_counter() - started)
+            self._count_error('timeout' if self.is_timeout(e) else 'error')
+            raise
+        self.breaker.record_success()
+        self._seconds.observe(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {'rate_limit': self.limiter.stats(), 'circuit': self.breaker.stats()}
+
+
+def api_quota_share() -> float:
+    """Fraction of every quota the API may use"""
+    return 1.0 - REFRESH_QUOTA_SHARE if REFRESHER_ENABLED else 1.0
+
+
+def scale_guards(guards: Dict[str, UpstreamGuard], fraction: float):
+    for guard in guards.values():
+        guard.limiter.scale(fraction)
+
+
+def build_guards(expected: Tuple[type, ...] = (),
+                 is_timeout: Callable[[BaseException], bool] = _never) -> Dict[str, UpstreamGuard]:
+    github_buckets = [TokenBucket(*GITHUB_TOKEN_RATE_LIMIT, token=token) for token in GITHUB_TOKENS]
+    limiters = {
+        'leetcode': RateLimiter([TokenBucket(*LEETCODE_RATE_LIMIT)]),
+        'codeforces': RateLimiter([TokenBucket(*CODEFORCES_RATE_LIMIT)]),
+        'github': RateLimiter(github_buckets or [TokenBucket(*GITHUB_RATE_LIMIT)]),
+    }
+    return {
+        platform: UpstreamGuard(limiter, expected=expected, name=platform, is_timeout=is_timeout)
+        for platform, limiter in limiters.items()
+    }
@@ -0,0 +1,174 @@
+"""What-if analysis: how one student's predictions move as features improve.
+
+A request names increases to try per model feature (or takes
+DEFAULT_DELTAS). Every combination of them is one scenario, and the whole
+grid is scored in a single scaler/model pass. From the scores the response
+reads off:
+
+- a gain curve per feature: that feature raised step by step, the others
+  left as they are;
+- the cheapest scenario predicted to reach the next company tier. Cost is
+  the sum of each increase times its feature's effort per unit
+  (DEFAULT_COSTS, rough hours, or the request's own).
+
+The default grid is 3^6 = 729 scenarios. On one core they score in ~30 ms,
+against ~11 ms for a single student through the same sklearn models; most of
+a model call's cost is per call, not per row.
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .predictor import COMPANY_TYPES, FEATURE_NAMES
+
+WHATIF_MAX_SCENARIOS = int(os.getenv("WHATIF_MAX_SCENARIOS", "5000"))
+
+# Increases tried when a request does not list a feature
+DEFAULT_DELTAS = {
+    'cgpa': [0.5, 1.0],
+    'leetcode_problems': [100, 300],
+    'codeforces_rating': [150, 300],
+    'project_count': [1, 3],
+    'skills_count': [3, 6],
+    'work_experience': [0.5, 1.0],
+}
+# Rough hours of effort per unit of each feature
+DEFAULT_COSTS = {
+    'cgpa': 400.0,
+    'leetcode_problems': 1.0,
+    'codeforces_rating': 0.5,
+    'project_count': 40.0,
+    'skills_count': 15.0,
+    'work_experience': 1500.0,
+}
+# Increased values are clipped into these ranges
+FEATURE_LIMITS = {
+    'cgpa': (0.0, 10.0),
+    'leetcode_problems': (0.0, None),
+    'codeforces_rating': (0.0, 4000.0),
+    'project_count': (0.0, None),
+    'skills_count': (0.0, None),
+    'work_experience': (0.0, None),
+}
+
+
+class InvalidWhatIf(ValueError):
+    pass
+
+
+def resolve_grid(deltas: Dict[str, List[float]]) -> List[np.ndarray]:
+    """Increases per feature in FEATURE_NAMES order, each starting at 0"""
+    unknown = set(deltas) - set(FEATURE_NAMES)
+    if unknown:
+        raise InvalidWhatIf(f"unknown features {sorted(unknown)}; expected some of {FEATURE_NAMES}")
+    grid = []
+    for name in FEATURE_NAMES:
+        steps = deltas.get(name, DEFAULT_DELTAS[name])
+        if any(not np.isfinite(step) or step <= 0 for step in steps):
+            raise InvalidWhatIf(f"{name}: increases must be positive")
+        grid.append(np.array([0.0, *sorted(set(steps))]))
+    n_scenarios = int(np.prod([len(steps) for steps in grid]))
+    if n_scenarios > WHATIF_MAX_SCENARIOS:
+        raise InvalidWhatIf(f"{n_scenarios} scenarios; at most {WHATIF_MAX_SCENARIOS} are scored per request")
+    return grid
+
+
+def resolve_costs(costs: Dict[str, float]) -> np.ndarray:
+    unknown = set(costs) - set(FEATURE_NAMES)
+    if unknown:
+        raise InvalidWhatIf(f"unknown features {sorted(unknown)}; expected some of {FEATURE_NAMES}")
+    if any(not np.isfinite(cost) or cost < 0 for cost in costs.values()):
+        raise InvalidWhatIf("costs must not be negative")
+    return np.array([costs.get(name, DEFAULT_COSTS[name]) for name in FEATURE_NAMES])
+
+
+def scenario_matrix(base: np.ndarray, grid: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(step indices, increases, features) of every scenario; row 0 is the
+    student as they are.
+
+    Features are clipped into FEATURE_LIMITS and the increases are what is
+    left after clipping. Scenarios that clip to the same features are kept
+    once, with their smallest steps, so a feature already at its limit shows
+    no gain and costs nothing.
+    """
+    steps = np.indices([len(g) for g in grid]).reshape(len(grid), -1).T
+    features = base + np.column_stack([g[steps[:, j]] for j, g in enumerate(grid)])
+    for j, name in enumerate(FEATURE_NAMES):
+        low, high = FEATURE_LIMITS[name]
+        # A student already past a limit stays as they are, never lowered
+        features[:, j] = np.clip(features[:, j], min(low, base[j]), None if high is None else max(high, base[j]))
+    # Rows are in increasing step order, so each first occurrence has the
+    # smallest steps (and row 0 stays first)
+    _, first = np.unique(features, axis=0, return_index=True)
+    keep = np.sort(first)
+    steps, features = steps[keep], features[keep]
+    return steps, features - base, features
+
+
+def _round(value: float) -> float:
+    return round(float(value), 2)
+
+
+def analyse(base: np.ndarray, scenarios: Tuple[np.ndarray, np.ndarray, np.ndarray], costs: np.ndarray,
+            scores: np.ndarray, company_probs: np.ndarray) -> dict:
+    """Gain curves and the cheapest path to the next tier from the scored
+    output of scenario_matrix"""
+    steps, deltas, features = scenarios
+    scores = np.asarray(scores)
+    tiers = np.argmax(company_probs, axis=1)
+    base_score, base_tier = int(scores[0]), int(tiers[0])
+
+    changed = steps != 0
+    curves = {}
+    for j, name in enumerate(FEATURE_NAMES):
+        # Scenarios changing only this feature, in step order
+        rows = np.flatnonzero(~np.delete(changed, j, axis=1).any(axis=1))
+        rows = rows[np.argsort(steps[rows, j])]
+        curve, previous = [], base_score
+        for row in rows[1:]:
+            score = int(scores[row])
+            curve.append({
+                'increase': _round(deltas[row, j]),
+                'value': _round(features[row, j]),
+                'overall_score': score,
+                'gain': score - base_score,
+                'marginal_gain': score - previous,
+                'company_type': COMPANY_TYPES[tiers[row]],
+            })
+            previous = score
+        curves[name] = {'value': _round(base[j]), 'curve': curve}
+
+    return {
+        'scenarios': len(scores),
+        'baseline': {
+            'overall_score': base_score,
+            'company_type': COMPANY_TYPES[base_tier],
+            'company_probabilities': {t: _round(p) for t, p in zip(COMPANY_TYPES, company_probs[0])},
+        },
+        'features': curves,
+        'next_tier': _cheapest_path(base_tier, deltas, features, costs, scores, tiers, company_probs),
+    }
+
+
+def _cheapest_path(base_tier: int, deltas, features, costs, scores, tiers, company_probs) -> Optional[dict]:
+    if base_tier + 1 >= len(COMPANY_TYPES):
+        return None
+    target = base_tier + 1
+    reaching = np.flatnonzero(tiers >= target)
+    result = {'company_type': COMPANY_TYPES[target], 'reachable': bool(len(reaching))}
+    if not len(reaching):
+        return result
+    cost = deltas[reaching] @ costs
+    # Cheapest first; among equally cheap, the highest score
+    best = reaching[np.lexsort((-scores[reaching], cost))[0]]
+    result.update({
+        'cost': _round(deltas[best] @ costs),
+        'changes': {
+            name: {'increase': _round(deltas[best, j]), 'value': _round(features[best, j])}
+            for j, name in enumerate(FEATURE_NAMES) if deltas[best, j]
+        },
+        'overall_score': int(scores[best]),
+        'probability': _round(company_probs[best, target]),
+    })
+    return result
@@ -0,0 +1,105 @@
+"""Sustained UserAnalysis insert throughput under concurrent prediction load.
+
+Simulates CONCURRENCY request handlers that each persist one analysis per
+prediction, either committing it on the request path (one transaction per
+row) or handing it to the write-behind AnalysisWriter. Runs against a fresh
+SQLite database in a temporary directory unless DATABASE_URL is set:
+
+    python -m benchmarks.bench_analysis_writes
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_analyses.db"
+
+import numpy as np
+
+from app.analysis_writer import AnalysisWriter
+from app.models import SessionLocal, UserAnalysis, init_db
+from app.predictor import COMPANY_TYPES, analysis_rows
+from app.schemas import PlatformData, UserProfile
+
+CONCURRENCY = 64
+PREDICTIONS_PER_HANDLER = 80
+
+
+def sample_rows(n: int) -> list:
+    rng = np.random.default_rng(0)
+    profiles = [
+        UserProfile(user_id=f"student-{i}", cgpa=float(rng.uniform(6, 10)), skills=['Python'] * int(rng.integers(0, 10)))
+        for i in range(n)
+    ]
+    platform_data = [PlatformData(leetcode_problems=int(rng.integers(0, 500))) for _ in range(n)]
+    scores = rng.integers(30, 100, n)
+    probs = rng.dirichlet(np.ones(len(COMPANY_TYPES)), n)
+    return analysis_rows(profiles, platform_data, scores, probs)
+
+
+def insert_one(row: dict):
+    with SessionLocal() as db:
+        db.add(UserAnalysis(**row))
+        db.commit()
+
+
+def count_rows() -> int:
+    with SessionLocal() as db:
+        return db.query(UserAnalysis).count()
+
+
+def reset():
+    with SessionLocal() as db:
+        db.query(UserAnalysis).delete()
+        db.commit()
+
+
+async def run(mode: str, rows: list) -> dict:
+    reset()
+    latencies = []
+    writer = AnalysisWriter()
+    if mode == "write-behind":
+        writer.start()
+
+    async def handler(chunk):
+        for row in chunk:
+            started = time.perf_counter()
+            if mode == "write-behind":
+                writer.record(dict(row))
+            else:
+                await asyncio.to_thread(insert_one, dict(row))
+            latencies.append(time.perf_counter() - started)
+            # Stand-in for the rest of the request
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(rows[i::CONCURRENCY]) for i in range(CONCURRENCY)))
+    served = time.perf_counter()
+    await writer.stop()
+    durable = time.perf_counter()
+
+    written = count_rows()
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'rows': written,
+        'requests_per_s': len(rows) / (served - started),
+        'rows_per_s': written / (durable - started),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def main():
+    init_db()
+    rows = sample_rows(CONCURRENCY * PREDICTIONS_PER_HANDLER)
+    print(f"{len(rows)} predictions from {CONCURRENCY} concurrent handlers on {os.environ['DATABASE_URL']}")
+    print(f"{'mode':<14} {'rows':>6} {'req/s':>9} {'rows/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ("per-request", "write-behind"):
+        r = await run(mode, rows)
+        print(f"{mode:<14} {r['rows']:>6} {r['requests_per_s']:>9.0f} {r['rows_per_s']:>9.0f} "
+              f"{r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""Microbenchmarks for the prediction hot path, stage by stage.
+
+Times feature assembly, ``scaler.transform``, ``predict``/``predict_proba``
+(and the compiled engine, when the bundle has one) at batch sizes from 1 to
+10k, and the response builders for one student and for a batch. Run from the
+backend directory against the current model bundle:
+
+    python -m benchmarks.bench_hot_paths
+    python -m benchmarks.bench_hot_paths --baseline benchmarks/results/baseline.json
+
+Every case reports per-call p50/p95/p99 and throughput; results are written
+as JSON (see benchmarks/results.py).
+"""
+import argparse
+
+import numpy as np
+import orjson
+
+from app.model_bundle import load_bundle
+from app.predictor import (
+    build_feature_matrix,
+    build_prediction_response,
+    iter_batch_payloads,
+    prediction_payload,
+    score_features,
+)
+from app.schemas import PlatformData, UserProfile
+
+from .results import add_arguments, finish, latency_summary, time_calls
+
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000)
+# Calls per case, fewer for the larger batches
+MIN_CALLS = {1: 2000, 10: 1000, 100: 300, 1_000: 50, 10_000: 10}
+MIN_SECONDS = 0.5
+
+
+def sample_students(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    profiles = [
+        UserProfile(
+            cgpa=float(rng.uniform(5, 10)),
+            skills=['Python', 'SQL', 'React', 'Docker', 'AWS'][:int(rng.integers(0, 6))],
+            project_count=int(rng.poisson(4)),
+            work_experience=float(rng.exponential(1.2)),
+            linkedin_profile='https://linkedin.com/in/student' if rng.random() < 0.5 else None,
+        )
+        for _ in range(n)
+    ]
+    platform_data = [
+        PlatformData(
+            leetcode_problems=int(rng.exponential(150)),
+            codeforces_rating=int(np.clip(rng.normal(1400, 300), 0, 3500)),
+        )
+        for _ in range(n)
+    ]
+    return profiles, platform_data
+
+
+def case(latencies, rows: int) -> dict:
+    summary = latency_summary(latencies)
+    summary['rows_per_s'] = round(rows / (summary['p50_ms'] / 1000), 1)
+    return summary
+
+
+def run(quick: bool = False) -> dict:
+    bundle = load_bundle()
+    placement_model, company_model, scaler = bundle.placement_model, bundle.company_model, bundle.scaler
+    profiles, platform_data = sample_students(max(BATCH_SIZES))
+    features = build_feature_matrix(profiles, platform_data)
+    scaled = scaler.transform(features)
+    scale = 0.1 if quick else 1.0
+
+    cases = {}
+
+    def measure(name: str, fn, rows: int):
+        calls = max(3, int(MIN_CALLS[rows] * scale))
+        cases[f"{name}/{rows}"] = case(time_calls(fn, calls, MIN_SECONDS * scale), rows)
+
+    for n in BATCH_SIZES:
+        measure("features", lambda: build_feature_matrix(profiles[:n], platform_data[:n]), n)
+        measure("scaler.transform", lambda: scaler.transform(features[:n]), n)
+        measure("placement.predict", lambda: placement_model.predict(scaled[:n]), n)
+        measure("company.predict_proba", lambda: company_model.predict_proba(scaled[:n]), n)
+        measure("score_features", lambda: score_features(features[:n], placement_model, company_model, scaler), n)
+        if bundle.compiled is not None:
+            measure("compiled.score", lambda: bundle.compiled.score(features[:n]), n)
+
+    scores, probs = score_features(features, placement_model, company_model, scaler)
+    one = (profiles[0], platform_data[0], int(scores[0]), tuple(float(p) for p in probs[0]))
+    measure("prediction_payload", lambda: prediction_payload(*one), 1)
+    measure("prediction_payload.compact", lambda: prediction_payload(*one, compact=True), 1)
+    measure("build_prediction_response", lambda: build_prediction_response(*one), 1)
+    measure("payload+orjson", lambda: orjson.dumps(prediction_payload(*one)), 1)
+
+    def score(batch):
+        return score_features(batch, placement_model, company_model, scaler)
+
+    for n in (100, 1_000, 10_000):
+        measure("batch_payloads", lambda: list(iter_batch_payloads(
+            profiles[:n], platform_data[:n], score, features[:n],
+        )), n)
+    return {'model_version': bundle.version, 'cases': cases}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the prediction hot path")
+    parser.add_argument("--quick", action="store_true", help="a tenth of the calls, for a smoke run")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    result = run(args.quick)
+    cases = result['cases']
+    print(f"model bundle {result['model_version']}")
+    print(f"{'case':<34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rows/s':>12}")
+    for name, r in cases.items():
+        print(f"{name:<34} {r['p50_ms']:>9.4f} {r['p95_ms']:>9.4f} {r['p99_ms']:>9.4f} {r['rows_per_s']:>12,.0f}")
+    finish("hot_paths", cases, args, model_version=result['model_version'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare sklearn and compiled NumPy inference latency.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_inference
+"""
+import time
+
+import numpy as np
+
+from app.model_bundle import load_bundle
+from app.predictor import score_features
+
+
+def random_features(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(5, 10, n),
+        rng.exponential(150, n),
+        rng.normal(1400, 300, n).clip(0, 3500),
+        rng.poisson(4, n),
+        rng.poisson(8, n),
+        rng.exponential(1.2, n),
+    ])
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    bundle = load_bundle()
+    placement_model, company_model, scaler = bundle.placement_model, bundle.company_model, bundle.scaler
+    compiled = bundle.compiled
+    if compiled is None:
+        raise SystemExit(f"bundle {bundle.version} has no compiled engine ({type(placement_model).__name__})")
+
+    def sklearn_score(X):
+        return score_features(X, placement_model, company_model, scaler)
+
+    X = random_features(10_000)
+    ref_scores, ref_probs = sklearn_score(X)
+    scores, probs = compiled.score(X)
+    ref_raw = placement_model.predict(scaler.transform(X))
+    raw = compiled.placement.predict(X)
+    print(f"max |score diff|       {np.abs(raw - ref_raw).max():.2e}")
+    print(f"max |proba diff|       {np.abs(probs - ref_probs).max():.2e}")
+    print(f"int score mismatches   {(scores != ref_scores).sum()} / {len(X)}")
+    print()
+
+    print(f"{'rows':>6} {'sklearn ms':>11} {'numpy ms':>9} {'speedup':>8}")
+    for n, repeat in ((1, 200), (16, 100), (64, 50), (256, 20), (1_000, 10), (10_000, 5)):
+        batch = X[:n]
+        sk = best_of(lambda: sklearn_score(batch), repeat) * 1000
+        nb = best_of(lambda: compiled.score(batch), repeat) * 1000
+        print(f"{n:>6} {sk:>11.3f} {nb:>9.3f} {sk / nb:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
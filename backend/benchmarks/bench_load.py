@@ -0,0 +1,186 @@
+"""In-process load test of the API against stub coding platforms.
+
+Starts benchmarks/stub_platforms.py in a child process (its latency and
+error rate are configurable), points the platform fetchers at it, then
+drives the FastAPI app in this process through httpx's ASGI transport with
+CONCURRENCY closed-loop clients, one scenario after another:
+
+    python -m benchmarks.bench_load
+    python -m benchmarks.bench_load --concurrency 64 --duration 30 --latency-ms 80 --error-rate 0.02
+    python -m benchmarks.bench_load --baseline benchmarks/results/load-baseline.json
+
+Each scenario draws students from its own pool of --users handles, so every
+run starts with cold caches and a larger pool means more upstream calls.
+Runs against a fresh SQLite database unless DATABASE_URL is set. Upstream
+quotas are lifted unless set explicitly, so the stubs, not the rate
+limiters, decide throughput.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .results import add_arguments, finish, latency_summary
+from .stub_platforms import stub_urls
+
+SCENARIOS = ('predict', 'predict-compact', 'batch')
+STUB_STARTUP_TIMEOUT = 15.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stubs(latency_ms: float, error_rate: float) -> (subprocess.Popen, str):
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.stub_platforms", "--port", str(port),
+        "--latency-ms", str(latency_ms), "--error-rate", str(error_rate),
+    ])
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STUB_STARTUP_TIMEOUT
+    while True:
+        try:
+            httpx.get(f"{base}/stats").raise_for_status()
+            return process, base
+        except httpx.HTTPError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise SystemExit("stub platforms failed to start")
+            time.sleep(0.1)
+
+
+def configure(base: str):
+    """Environment for the app; must run before app.main is imported"""
+    os.environ.update(stub_urls(base))
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_load.db"
+    for name in ("LEETCODE_RATE_LIMIT", "CODEFORCES_RATE_LIMIT", "GITHUB_RATE_LIMIT"):
+        os.environ.setdefault(name, "1000000/1")
+
+
+def student(scenario: str, user: int, rng: random.Random) -> dict:
+    handle = f"{scenario}-{user}"
+    return {
+        'cgpa': round(rng.uniform(5, 10), 2),
+        'skills': ['Python', 'SQL', 'React', 'Docker', 'AWS'][:rng.randint(0, 5)],
+        'project_count': rng.randint(0, 10),
+        'work_experience': round(rng.uniform(0, 4), 1),
+        'leetcode_username': handle,
+        'codeforces_username': handle,
+        'github_username': handle,
+    }
+
+
+def upstream_calls(stats_before: dict, stats_after: dict, key: str) -> int:
+    return sum(stats_after[key].values()) - sum(stats_before[key].values())
+
+
+async def run_scenario(client: httpx.AsyncClient, stubs: httpx.AsyncClient, scenario: str,
+                       args: argparse.Namespace) -> dict:
+    rng = random.Random(f"{args.seed}-{scenario}")
+
+    def request():
+        if scenario == 'batch':
+            body = [student(scenario, rng.randrange(args.users), rng) for _ in range(args.batch_size)]
+            return client.post("/api/predict-placement/batch", json=body)
+        params = {'compact': 'true'} if scenario == 'predict-compact' else None
+        return client.post("/api/predict-placement", json=student(scenario, rng.randrange(args.users), rng),
+                           params=params)
+
+    latencies, failures = [], 0
+    warm_until = time.perf_counter() + args.warmup
+    stop_at = warm_until + args.duration
+    last_finished = warm_until
+    # A batch request carries --batch-size students' worth of upstream calls
+    concurrency = args.batch_concurrency if scenario == 'batch' else args.concurrency
+
+    async def worker():
+        nonlocal failures, last_finished
+        while True:
+            started = time.perf_counter()
+            if started >= stop_at:
+                return
+            response = await request()
+            finished = time.perf_counter()
+            if started >= warm_until:
+                latencies.append(finished - started)
+                failures += response.status_code >= 400
+                last_finished = max(last_finished, finished)
+
+    before = (await stubs.get("/stats")).json()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    after = (await stubs.get("/stats")).json()
+
+    # Requests still in flight at the deadline are waited for and counted
+    elapsed = max(last_finished - warm_until, 1e-9)
+    result = latency_summary(latencies)
+    result['rps'] = round(len(latencies) / elapsed, 1)
+    if scenario == 'batch':
+        result['students_per_s'] = round(len(latencies) * args.batch_size / elapsed, 1)
+    result['errors'] = failures
+    result['upstream_calls'] = upstream_calls(before, after, 'requests')
+    result['upstream_errors'] = upstream_calls(before, after, 'errors')
+    return result
+
+
+async def run(args: argparse.Namespace, base: str) -> dict:
+    from app.main import app
+
+    cases = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client, \
+                httpx.AsyncClient(base_url=base) as stubs:
+            for scenario in args.scenarios:
+                cases[scenario] = await run_scenario(client, stubs, scenario, args)
+                r = cases[scenario]
+                print(f"{scenario:<16} {r['rps']:>8.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                      f"{r['p99_ms']:>9.2f} {r['errors']:>7} {r['upstream_calls']:>9}")
+    return cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the API against stub coding platforms")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent closed-loop clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--users", type=int, default=2000, help="distinct students per scenario")
+    parser.add_argument("--batch-size", type=int, default=100, help="students per batch request")
+    parser.add_argument("--batch-concurrency", type=int, default=2, help="concurrent clients in the batch scenario")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median stub latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls failing")
+    parser.add_argument("--seed", type=int, default=0)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    stub_process, base = start_stubs(args.latency_ms, args.error_rate)
+    try:
+        configure(base)
+        print(f"{args.concurrency} clients, {args.duration:.0f}s per scenario, stub latency "
+              f"{args.latency_ms:.0f} ms, error rate {args.error_rate:.1%}")
+        print(f"{'scenario':<16} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'upstream':>9}")
+        cases = asyncio.run(run(args, base))
+    finally:
+        stub_process.terminate()
+        stub_process.wait()
+
+    config = {name: getattr(args, name) for name in (
+        'concurrency', 'duration', 'warmup', 'users', 'batch_size', 'batch_concurrency', 'latency_ms',
+        'error_rate', 'seed',
+    )}
+    finish("load", cases, args, config=config)
+
+
+if __name__ == "__main__":
+    main()
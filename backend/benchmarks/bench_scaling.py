@@ -0,0 +1,182 @@
+"""Throughput of the pre-fork server (app/serve.py) from 1 to N workers.
+
+For each worker count, starts ``python -m app.serve`` pinned to that many
+CPUs. Load client processes run pinned to the remaining CPUs, so they do not
+compete with the workers. The clients send single predictions without
+platform handles, with the prediction cache and analysis persistence off, so
+every request is pure CPU: parsing, the models and the response. Reports
+RPS, latency percentiles, speedup over one worker and the memory the
+workers share:
+
+    python -m benchmarks.bench_scaling
+    python -m benchmarks.bench_scaling --workers 1 2 4 --client-cpus 2 --duration 20
+
+Scaling is near-linear when speedup/workers stays close to 1. On a host with
+fewer CPUs than workers plus clients, everything shares the available CPUs
+and the numbers show contention, not scaling.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from .bench_load import free_port
+from .results import add_arguments, finish, latency_summary
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SERVER_STARTUP_TIMEOUT = 60.0
+
+
+def usable_cpus() -> List[int]:
+    return sorted(os.sched_getaffinity(0))
+
+
+def split_cpus(client_cpus: int) -> (List[int], List[int]):
+    """(CPUs for workers, CPUs for clients); shared when there are too few"""
+    cpus = usable_cpus()
+    if len(cpus) <= client_cpus:
+        return cpus, cpus
+    return cpus[client_cpus:], cpus[:client_cpus]
+
+
+def start_server(workers: int, cpus: List[int], port: int) -> subprocess.Popen:
+    env = dict(os.environ, PREDICTION_CACHE="0", PERSIST_ANALYSES="0")
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_scaling.db")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, preexec_fn=lambda: os.sched_setaffinity(0, cpus),
+    )
+    deadline = time.monotonic() + SERVER_STARTUP_TIMEOUT
+    while True:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise SystemExit(f"server with {workers} workers failed to start")
+        time.sleep(0.2)
+
+
+def memory(process: subprocess.Popen) -> dict:
+    """Proportional and private memory of the launcher and its workers (Linux)"""
+    children = subprocess.run(["pgrep", "-P", str(process.pid)], capture_output=True, text=True).stdout.split()
+    totals = {'pss_mb': 0.0, 'private_mb': 0.0}
+    for pid in [str(process.pid), *children]:
+        try:
+            fields = dict(
+                (line.split(':')[0], int(line.split()[1]))
+                for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]
+            )
+        except (OSError, ValueError):
+            continue
+        totals['pss_mb'] += fields.get('Pss', 0) / 1024
+        totals['private_mb'] += (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024
+    return {name: round(value, 1) for name, value in totals.items()}
+
+
+async def client_loop(url: str, concurrency: int, duration: float, warmup: float, seed: int) -> List[float]:
+    rng = random.Random(seed)
+    latencies = []
+    warm_until = time.perf_counter() + warmup
+    stop_at = warm_until + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        async def worker():
+            while True:
+                started = time.perf_counter()
+                if started >= stop_at:
+                    return
+                response = await client.post("/api/predict-placement", json={
+                    'cgpa': round(rng.uniform(5, 10), 2),
+                    'skills': ['Python', 'SQL', 'React'][:rng.randint(0, 3)],
+                    'project_count': rng.randint(0, 8),
+                })
+                response.raise_for_status()
+                if started >= warm_until:
+                    latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def client_process(url, concurrency, duration, warmup, seed, cpus, results):
+    os.sched_setaffinity(0, cpus)
+    results.put(asyncio.run(client_loop(url, concurrency, duration, warmup, seed)))
+
+
+def measure(workers: int, args: argparse.Namespace) -> dict:
+    server_cpus, client_cpus = split_cpus(args.client_cpus)
+    server_cpus = server_cpus[:workers]
+    port = free_port()
+    server = start_server(workers, server_cpus, port)
+    try:
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process, args=(
+                f"http://127.0.0.1:{port}", args.concurrency, args.duration, args.warmup, seed, client_cpus, results,
+            ))
+            for seed in range(len(client_cpus))
+        ]
+        for client in clients:
+            client.start()
+        latencies = [latency for _ in clients for latency in results.get()]
+        for client in clients:
+            client.join()
+        shared = memory(server)
+    finally:
+        server.terminate()
+        server.wait()
+
+    result = latency_summary(latencies)
+    result['rps'] = round(len(latencies) / args.duration, 1)
+    result['server_cpus'] = len(server_cpus)
+    result.update(shared)
+    return result
+
+
+def main(argv=None):
+    cpus = usable_cpus()
+    parser = argparse.ArgumentParser(description="RPS of the pre-fork server from 1 to N workers")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default 1, 2, 4, ... up to the "
+                                                               "CPUs left after the clients)")
+    parser.add_argument("--client-cpus", type=int, default=max(1, len(cpus) // 4),
+                        help="CPUs reserved for load clients, one client process each")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per client process")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not args.workers:
+        available = len(split_cpus(args.client_cpus)[0])
+        args.workers = sorted({min(2 ** i, available) for i in range(available.bit_length() + 1)})
+
+    print(f"{len(cpus)} CPUs, {args.client_cpus} for clients")
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'per worker':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'PSS MB':>8} {'private MB':>10}")
+    cases = {}
+    for workers in args.workers:
+        r = measure(workers, args)
+        baseline = cases.get('workers=1', r)['rps']
+        r['speedup'] = round(r['rps'] / baseline, 2) if baseline else 0.0
+        r['efficiency'] = round(r['speedup'] / min(workers, r['server_cpus']), 2)
+        cases[f"workers={workers}"] = r
+        print(f"{workers:>7} {r['rps']:>9.1f} {r['speedup']:>7.2f}x {r['efficiency']:>10.2f} {r['p50_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['pss_mb']:>8.1f} {r['private_mb']:>10.1f}")
+    finish("scaling", cases, args, cpus=len(cpus), client_cpus=args.client_cpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Latency and recall of the similar-students index (app/similarity.py).
+
+Builds an index of synthetic students scaled by the current bundle's scaler
+in a temporary directory, without a database. It then times top-k queries,
+first by exact scan and then IVF with several ``nprobe`` values. Recall@k
+is measured against the exact answer:
+
+    python -m benchmarks.bench_similarity
+    python -m benchmarks.bench_similarity --rows 5000000 --nprobe 4 8 16
+
+Queries are real rows plus a little noise, like a returning student whose
+stats moved.
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app import similarity, synthetic
+from app.model_bundle import load_bundle
+
+from .results import add_arguments, finish, latency_summary
+
+
+def synthetic_chunks(scaler, rows: int, chunk_rows: int = 1 << 18):
+    produced = 0
+    for chunk in synthetic.iter_synthetic(rows, chunk_rows, seed=7):
+        features, _, _ = synthetic.split_chunk(chunk)
+        yield np.arange(produced + 1, produced + len(features) + 1, dtype=np.int64), similarity.scale(scaler, features)
+        produced += len(features)
+
+
+def measure(index: similarity.SimilarityIndex, queries: np.ndarray, exact: list, k: int) -> dict:
+    latencies, hits = [], 0
+    for query, truth in zip(queries, exact):
+        started = time.perf_counter()
+        ids, _ = index.search(query, k)
+        latencies.append(time.perf_counter() - started)
+        hits += len(set(ids.tolist()) & truth)
+    result = latency_summary(latencies)
+    result['recall'] = round(hits / (k * len(queries)), 4)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Top-k latency and recall of the similar-students index")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scaler = load_bundle().scaler
+    directory = tempfile.mkdtemp(prefix="bench_similarity-")
+    started = time.perf_counter()
+    state = similarity.write_generation(synthetic_chunks(scaler, args.rows), similarity.scaler_checksum(scaler),
+                                        directory)
+    build_seconds = time.perf_counter() - started
+    print(f"Indexed {state['rows']} rows into {state['lists'] or 'no'} lists in {build_seconds:.1f}s")
+
+    index = similarity.SimilarityIndex(directory)
+    index.refresh()
+    snapshot = index._snapshot
+    rng = np.random.default_rng(0)
+    rows = rng.choice(snapshot.rows, args.queries, replace=False)
+    queries = np.asarray(snapshot.vectors[np.sort(rows)]) + rng.normal(0, 0.05, (args.queries, similarity.DIM))
+
+    # Exact answers by a full scan: the baseline the IVF lists approximate
+    exact_index = similarity.SimilarityIndex(directory)
+    exact_index._snapshot = similarity._Snapshot(snapshot.generation, snapshot.rows, snapshot.scaler,
+                                                 snapshot.vectors, snapshot.ids)
+    exact = [set(exact_index.search(query, args.k)[0].tolist()) for query in queries]
+
+    cases = {'exact': measure(exact_index, queries, exact, args.k)}
+    if snapshot.order is not None:
+        for nprobe in args.nprobe:
+            index.nprobe = nprobe
+            cases[f"ivf nprobe={nprobe}"] = measure(index, queries, exact, args.k)
+
+    print(f"{'case':<16} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7}")
+    for name, r in cases.items():
+        print(f"{name:<16} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['recall']:>7.3f}")
+    finish("similarity", cases, args, rows=state['rows'], lists=state['lists'], k=args.k,
+           build_seconds=round(build_seconds, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Import-time and cold-start budget for the API.
+
+Each measurement runs in a fresh interpreter so nothing is already imported
+or in memory. Run from the backend directory:
+
+    python -m benchmarks.bench_startup
+
+Exits non-zero when a budget is exceeded. Budgets can be overridden with
+STARTUP_IMPORT_BUDGET_MS and STARTUP_READY_BUDGET_MS.
+"""
+import json
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1200"))
+READY_BUDGET_MS = float(os.getenv("STARTUP_READY_BUDGET_MS", "3500"))
+
+# Runs in the child interpreter: import the app, start its lifespan, poll
+# /ready, then time the first prediction.
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+from app.main import app
+imported = time.perf_counter()
+
+async def main():
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        serving = time.perf_counter()
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.005)
+            ready = time.perf_counter()
+            response = await client.post("/api/predict-placement", json={"cgpa": 8.0, "skills": ["Python"]})
+            response.raise_for_status()
+            first = time.perf_counter()
+    ms = lambda t: round((t - started) * 1000, 1)
+    print(json.dumps({"import_ms": ms(imported), "serving_ms": ms(serving),
+                      "ready_ms": ms(ready), "first_prediction_ms": ms(first)}))
+
+asyncio.run(main())
+"""
+
+
+def measure(mode: str) -> dict:
+    env = dict(os.environ, STARTUP_MODE=mode)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    results = {mode: measure(mode) for mode in ("eager", "background", "lazy")}
+
+    print(f"{'mode':<11} {'import':>8} {'serving':>8} {'ready':>8} {'1st pred':>9}  (ms)")
+    for mode, r in results.items():
+        print(f"{mode:<11} {r['import_ms']:>8} {r['serving_ms']:>8} {r['ready_ms']:>8} {r['first_prediction_ms']:>9}")
+
+    worst_import = max(r['import_ms'] for r in results.values())
+    worst_ready = max(r['ready_ms'] for r in results.values())
+    print(f"\nimport budget {IMPORT_BUDGET_MS:.0f} ms: worst {worst_import} ms")
+    print(f"ready budget  {READY_BUDGET_MS:.0f} ms: worst {worst_ready} ms")
+    if worst_import > IMPORT_BUDGET_MS or worst_ready > READY_BUDGET_MS:
+        print("OVER BUDGET")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Latency summaries and JSON result files shared by the benchmarks.
+
+A result file holds the run's environment and one entry per measured case:
+
+    {"benchmark": "hot_paths", "environment": {...},
+     "cases": {"predict/1000": {"p50_ms": ..., "rows_per_s": ...}, ...}}
+
+``compare`` checks a run against a baseline file written the same way.
+Metrics ending in ``_ms`` are better lower, those ending in ``_per_s`` or
+``rps`` better higher; anything else (and ``max_ms``, a single sample) is
+reported but never compared.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# A run regresses when a metric is this much worse than the baseline
+DEFAULT_TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.10"))
+
+
+def latency_summary(seconds: Sequence[float]) -> dict:
+    """Count, mean, p50/p95/p99 and max of per-call latencies, in ms"""
+    if len(seconds) == 0:
+        return {'count': 0}
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'count': int(len(ms)),
+        'mean_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'max_ms': round(float(ms.max()), 4),
+    }
+
+
+def time_calls(fn, repeat: int, min_seconds: float = 0.0) -> List[float]:
+    """Per-call latencies of ``fn()`` over at least ``repeat`` calls (and at
+    least ``min_seconds``), after one untimed warm-up call"""
+    fn()
+    latencies = []
+    deadline = time.perf_counter() + min_seconds
+    while len(latencies) < repeat or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def environment() -> dict:
+    """Where the numbers come from; compare runs from like environments only"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save(benchmark: str, cases: Dict[str, dict], path: Optional[str] = None, **extra) -> Path:
+    """Write a result file (default benchmarks/results/<benchmark>.json)"""
+    path = Path(path) if path else RESULTS_DIR / f"{benchmark}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {'benchmark': benchmark, 'environment': environment(), **extra, 'cases': cases}
+    path.write_text(json.dumps(document, indent=2) + "\n")
+    return path
+
+
+def _direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if not compared"""
+    if metric == 'max_ms':
+        return 0
+    if metric.endswith('_ms'):
+        return -1
+    if metric.endswith('_per_s') or metric in ('rps', 'recall'):
+        return 1
+    return 0
+
+
+def compare(cases: Dict[str, dict], baseline: Dict[str, dict], tolerance: float = DEFAULT_TOLERANCE) -> List[dict]:
+    """Every compared metric present in both runs, with its relative change
+    (positive is better) and whether it regressed past ``tolerance``"""
+    rows = []
+    for case, metrics in cases.items():
+        for metric, value in metrics.items():
+            direction = _direction(metric)
+            before = baseline.get(case, {}).get(metric)
+            if not direction or not isinstance(value, (int, float)) or not before:
+                continue
+            change = direction * (value - before) / before
+            rows.append({
+                'case': case, 'metric': metric, 'baseline': before, 'current': value,
+                'change': change, 'regressed': change < -tolerance,
+            })
+    return rows
+
+
+def report(cases: Dict[str, dict], baseline_path: Optional[str], tolerance: float = DEFAULT_TOLERANCE) -> bool:
+    """Print the comparison with a baseline file; False if anything regressed"""
+    if not baseline_path:
+        return True
+    baseline = json.loads(Path(baseline_path).read_text())
+    rows = compare(cases, baseline['cases'], tolerance)
+    print(f"\nagainst {baseline_path} ({baseline['environment'].get('git_commit')}, "
+          f"tolerance {tolerance:.0%})")
+    print(f"{'case':<34} {'metric':<12} {'baseline':>11} {'current':>11} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSED" if row['regressed'] else ""
+        print(f"{row['case']:<34} {row['metric']:<12} {row['baseline']:>11.4g} {row['current']:>11.4g} "
+              f"{row['change']:>+7.1%}{flag}")
+    regressed = sum(row['regressed'] for row in rows)
+    print(f"{regressed} of {len(rows)} metrics regressed")
+    return regressed == 0
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """--output, --baseline and --tolerance, shared by every benchmark"""
+    parser.add_argument("--output", help="result file (default benchmarks/results/<benchmark>.json)")
+    parser.add_argument("--baseline", help="result file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown tolerated before a metric counts as regressed")
+
+
+def finish(benchmark: str, cases: Dict[str, dict], args: argparse.Namespace, **extra):
+    """Save the run, compare it with the baseline, exit non-zero on regressions"""
+    path = save(benchmark, cases, args.output, **extra)
+    print(f"\nresults written to {path}")
+    if not report(cases, args.baseline, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,158 @@
+"""Local stand-ins for the LeetCode, Codeforces and GitHub APIs.
+
+Serves the endpoints app/platforms.py calls, under one prefix per platform,
+with a configurable latency (log-normal around the median) and error rate:
+
+    python -m benchmarks.stub_platforms --port 8901 --latency-ms 50 --error-rate 0.01
+
+then point the API at it:
+
+    LEETCODE_GRAPHQL_URL=http://127.0.0.1:8901/leetcode/graphql
+    CODEFORCES_API_URL=http://127.0.0.1:8901/codeforces/api
+    GITHUB_API_URL=http://127.0.0.1:8901/github
+
+Stats are derived from the handle, so repeated lookups agree and GitHub
+resources keep their ETags. Handles starting with "ghost" do not exist.
+``GET /stats`` returns request and error counts per platform.
+"""
+import argparse
+import asyncio
+import math
+import random
+import zlib
+from collections import Counter
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Spread of the log-normal latency around its median
+LATENCY_SIGMA = 0.5
+
+
+def stub_urls(base: str) -> dict:
+    """Environment pointing app/platforms.py at a stub server at ``base``"""
+    return {
+        'LEETCODE_GRAPHQL_URL': f"{base}/leetcode/graphql",
+        'CODEFORCES_API_URL': f"{base}/codeforces/api",
+        'GITHUB_API_URL': f"{base}/github",
+    }
+
+
+def _seed(handle: str) -> int:
+    return zlib.crc32(handle.lower().encode())
+
+
+def leetcode_user(handle: str) -> dict:
+    seed = _seed(handle)
+    return {
+        'submitStats': {'acSubmissionNum': [
+            {'difficulty': 'Easy', 'count': seed % 200},
+            {'difficulty': 'Medium', 'count': seed % 150},
+            {'difficulty': 'Hard', 'count': seed % 40},
+        ]},
+        'profile': {'ranking': seed % 500_000},
+    }
+
+
+def codeforces_user(handle: str) -> dict:
+    rating = 800 + _seed(handle) % 2000
+    return {'handle': handle, 'rating': rating, 'maxRating': rating + 50, 'rank': 'specialist'}
+
+
+def github_user(handle: str) -> dict:
+    seed = _seed(handle)
+    return {'login': handle, 'public_repos': seed % 60, 'followers': seed % 300, 'following': seed % 50}
+
+
+def github_repos(handle: str, page: int, per_page: int) -> list:
+    total = github_user(handle)['public_repos']
+    first = (page - 1) * per_page
+    return [
+        {'id': i, 'name': f"repo-{i}", 'stargazers_count': (_seed(handle) + i) % 25}
+        for i in range(first, min(total, first + per_page))
+    ]
+
+
+def create_app(latency_ms: float, error_rate: float, seed: int = 0) -> Starlette:
+    rng = random.Random(seed)
+    requests, errors = Counter(), Counter()
+
+    async def upstream(platform: str):
+        """Latency and injected failure of one upstream call; True to fail"""
+        requests[platform] += 1
+        if latency_ms > 0:
+            await asyncio.sleep(rng.lognormvariate(math.log(latency_ms / 1000), LATENCY_SIGMA))
+        if rng.random() < error_rate:
+            errors[platform] += 1
+            return True
+        return False
+
+    def failure():
+        return JSONResponse({'message': 'injected failure'}, status_code=500)
+
+    async def leetcode(request: Request):
+        if await upstream('leetcode'):
+            return failure()
+        handle = (await request.json())['variables']['username']
+        user = None if handle.lower().startswith('ghost') else leetcode_user(handle)
+        return JSONResponse({'data': {'matchedUser': user}})
+
+    async def codeforces(request: Request):
+        if await upstream('codeforces'):
+            return failure()
+        handles = request.query_params['handles'].split(';')
+        for handle in handles:
+            if handle.lower().startswith('ghost'):
+                return JSONResponse({'status': 'FAILED', 'comment': f"handles: User with handle {handle} not found"},
+                                    status_code=400)
+        return JSONResponse({'status': 'OK', 'result': [codeforces_user(handle) for handle in handles]})
+
+    async def github(request: Request, body):
+        if await upstream('github'):
+            return failure()
+        handle = request.path_params['username']
+        if handle.lower().startswith('ghost'):
+            return JSONResponse({'message': 'Not Found'}, status_code=404)
+        etag = f'"{zlib.crc32(str(request.url).encode())}"'
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers={'ETag': etag})
+        return JSONResponse(body(handle), headers={'ETag': etag})
+
+    async def github_profile(request: Request):
+        return await github(request, github_user)
+
+    async def github_repo_page(request: Request):
+        page = int(request.query_params.get('page', 1))
+        per_page = int(request.query_params.get('per_page', 30))
+        return await github(request, lambda handle: github_repos(handle, page, per_page))
+
+    async def stats(request: Request):
+        return JSONResponse({'requests': dict(requests), 'errors': dict(errors)})
+
+    return Starlette(routes=[
+        Route('/leetcode/graphql', leetcode, methods=['POST']),
+        Route('/codeforces/api/user.info', codeforces),
+        Route('/github/users/{username}', github_profile),
+        Route('/github/users/{username}/repos', github_repo_page),
+        Route('/stats', stats),
+    ])
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub LeetCode, Codeforces and GitHub APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median latency per upstream call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answering 500")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(args.latency_ms, args.error_rate, args.seed), host=args.host, port=args.port,
+                log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
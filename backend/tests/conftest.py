@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read at import; keep tests off the local database and index
+_scratch = tempfile.mkdtemp(prefix='placement-tests-')
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/test.db")
+os.environ.setdefault("SIMILARITY_DIR", os.path.join(_scratch, "similarity"))
+
+
+def random_students(n: int, seed: int = 0):
+    """Students with values drawn around (and exactly on) every rule threshold"""
+    import numpy as np
+
+    from app.predictor import COMPANY_TYPES
+    from app.schemas import PlatformData, UserProfile
+
+    rng = np.random.default_rng(seed)
+    students = []
+    for _ in range(n):
+        profile = UserProfile(
+            cgpa=float(rng.choice([6.0, 7.99, 8.0, 9.5])),
+            skills=[f'skill{i}' for i in range(rng.choice([0, 4, 5, 7, 8, 12]))],
+            project_count=int(rng.choice([0, 2, 3, 4, 5, 9])),
+            work_experience=float(rng.choice([0, 0.5, 2])),
+            linkedin_profile=str(rng.choice(['', 'https://linkedin.com/in/x'])),
+        )
+        data = PlatformData(
+            leetcode_problems=int(rng.choice([0, 99, 100, 199, 200, 600])),
+            codeforces_rating=int(rng.choice([0, 1199, 1200, 2000])),
+        )
+        score = int(rng.choice([-5, 0, 45, 70, 71, 100, 130]))
+        probs = rng.dirichlet(np.ones(len(COMPANY_TYPES)))
+        students.append((profile, data, score, probs))
+    return students
+
+
+@pytest.fixture(scope="session")
+def students():
+    """(profile, platform data, score, probabilities) for 2000 students"""
+    return random_students(2000)
@@ -0,0 +1,75 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import analytics
+from app.analysis_writer import bulk_insert_analyses
+from app.models import SessionLocal, UserAnalysis, UserScoreSummary, init_db
+
+
+@pytest.fixture(scope="module")
+def history():
+    init_db()
+    with SessionLocal() as db:
+        db.query(UserAnalysis).delete()
+        db.query(UserScoreSummary).delete()
+        db.commit()
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1)
+    # Few distinct timestamps, so many analyses of a user tie on created_at
+    rows = [
+        {
+            'user_id': f"user-{rng.randrange(300)}" if rng.random() > 0.02 else None,
+            'overall_score': rng.randrange(101),
+            'created_at': start + timedelta(minutes=rng.randrange(20)),
+            'cgpa': 7.5,
+        }
+        for _ in range(3000)
+    ]
+    for i in range(0, len(rows), 250):
+        bulk_insert_analyses(rows[i:i + 250])
+
+
+def expected_improvements(min_delta: int) -> list:
+    """First and latest analysis per user by (created_at, id), from the raw rows"""
+    with SessionLocal() as db:
+        rows = db.query(UserAnalysis.id, UserAnalysis.user_id, UserAnalysis.created_at, UserAnalysis.overall_score).all()
+    by_user = {}
+    for row in rows:
+        if row.user_id is not None:
+            by_user.setdefault(row.user_id, []).append(row)
+    result = []
+    for user_id in sorted(by_user):
+        analyses = sorted(by_user[user_id], key=lambda row: (row.created_at, row.id))
+        first, latest = analyses[0], analyses[-1]
+        if len(analyses) > 1 and latest.overall_score - first.overall_score >= min_delta:
+            result.append((user_id, len(analyses), first.overall_score, latest.overall_score))
+    return result
+
+
+def all_pages(min_delta: int) -> list:
+    items, cursor = [], None
+    while True:
+        page = analytics.score_improvements(min_delta, cursor, limit=37)
+        items += [(i['user_id'], i['analyses'], i['first_score'], i['latest_score']) for i in page['items']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return items
+
+
+@pytest.mark.parametrize("min_delta", [-100, 1, 30])
+def test_improvements_match_history(history, min_delta):
+    assert all_pages(min_delta) == expected_improvements(min_delta)
+
+
+def test_rebuild_matches_incremental(history):
+    def snapshot():
+        with SessionLocal() as db:
+            return sorted(
+                (row.user_id, row.analyses, row.first_id, row.latest_id) for row in db.query(UserScoreSummary)
+            )
+
+    incremental = snapshot()
+    analytics.rebuild_score_summaries(chunk_rows=101)
+    assert snapshot() == incremental
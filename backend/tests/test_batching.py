@@ -0,0 +1,104 @@
+"""Micro-batched inference: every caller gets its own row, or the batch's error"""
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.batching import InferenceBatcher
+
+
+class Model:
+    """Scores a row as its sum; company probabilities are the row itself"""
+
+    def __init__(self):
+        self.batches = []
+        self.error = None
+
+    def __call__(self, features: np.ndarray):
+        assert threading.current_thread().name.startswith("inference")
+        self.batches.append(len(features))
+        if self.error is not None:
+            raise self.error
+        return features.sum(axis=1), features.copy()
+
+
+def test_results_fan_out_to_their_callers():
+    model = Model()
+    rows = [np.array([i, 2 * i, 0.5]) for i in range(40)]
+
+    async def scenario():
+        batcher = InferenceBatcher(model, max_batch_size=16, max_wait_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(row) for row in rows)), batcher.stats()
+        finally:
+            await batcher.stop()
+
+    results, stats = asyncio.run(scenario())
+    for row, (score, probs) in zip(rows, results):
+        assert score == int(row.sum())
+        assert np.array_equal(probs, row)
+    assert model.batches == [16, 16, 8]
+    assert (stats['batches'], stats['requests'], stats['mean_batch_size']) == (3, 40, 13.33)
+
+
+def test_lone_request_waits_at_most_max_wait():
+    model = Model()
+
+    async def scenario():
+        batcher = InferenceBatcher(model, max_batch_size=64, max_wait_ms=20)
+        batcher.start()
+        try:
+            return await asyncio.wait_for(batcher.submit([1.0, 2.0]), 2)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(scenario())[0] == 3
+    assert model.batches == [1]
+
+
+def test_errors_reach_every_waiter_and_the_worker_survives():
+    model = Model()
+    model.error = ValueError("bad batch")
+
+    async def scenario():
+        batcher = InferenceBatcher(model, max_batch_size=8, max_wait_ms=50)
+        batcher.start()
+        try:
+            # Bounded, so a waiter left hanging fails the test
+            failed = await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit([float(i)]) for i in range(5)), return_exceptions=True), 5,
+            )
+            model.error = None
+            return failed, await batcher.submit([7.0])
+        finally:
+            await batcher.stop()
+
+    failed, recovered = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) and str(result) == "bad batch" for result in failed)
+    assert model.batches == [5, 1]
+    assert recovered[0] == 7
+
+
+def test_cancelled_caller_does_not_break_the_batch():
+    model = Model()
+
+    async def scenario():
+        batcher = InferenceBatcher(model, max_batch_size=8, max_wait_ms=50)
+        batcher.start()
+        try:
+            waiters = [asyncio.create_task(batcher.submit([float(i)])) for i in range(4)]
+            await asyncio.sleep(0.01)
+            waiters[0].cancel()
+            return await asyncio.gather(*waiters[1:])
+        finally:
+            await batcher.stop()
+
+    assert [score for score, _ in asyncio.run(scenario())] == [1, 2, 3]
+
+
+def test_submit_needs_a_running_batcher():
+    batcher = InferenceBatcher(Model())
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.submit([1.0]))
@@ -0,0 +1,71 @@
+"""Compact responses expand through the catalog to the full response"""
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app import rules
+from app.main import CATALOG_ETAG, app
+from app.predictor import prediction_payload
+
+
+def expand(compact: dict, catalog: dict) -> dict:
+    """Rebuild a full response from a compact one, as a client would"""
+    suggestions = [catalog['suggestions'][i] for i in compact['suggestions']]
+    return {
+        'overall_score': compact['overall_score'],
+        'company_matches': [
+            {**match, **catalog['companies'][match['type']], 'suggestions': suggestions}
+            for match in compact['company_matches']
+        ],
+        'focus_areas': [catalog['focus_areas'][i] for i in compact['focus_areas']],
+        'strengths': [catalog['strengths'][i] for i in compact['strengths']],
+        'course_recommendations': [catalog['courses'][i] for i in compact['course_recommendations']],
+        'international_opportunities': [
+            {**opportunity, **catalog['countries'][opportunity['country']]}
+            for opportunity in compact['international_opportunities']
+        ],
+        'linkedin_insights': (
+            None if compact['linkedin_insights'] is None else catalog['linkedin_insights'][compact['linkedin_insights']]
+        ),
+    }
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Without the context manager the lifespan (database, model warm-up)
+    # does not run; the catalog needs neither
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def catalog(client):
+    return client.get("/api/catalog").json()
+
+
+def test_compact_expands_to_full(catalog, students):
+    for profile, data, score, probs in students:
+        compact = orjson.loads(orjson.dumps(prediction_payload(profile, data, score, probs, compact=True)))
+        full = orjson.loads(orjson.dumps(prediction_payload(profile, data, score, probs)))
+        assert compact['catalog_version'] == catalog['version']
+        assert expand(compact, catalog) == full
+
+
+def test_catalog_etag(client):
+    response = client.get("/api/catalog")
+    assert response.status_code == 200
+    assert response.headers["etag"] == CATALOG_ETAG == f'"{rules.CATALOG_VERSION}"'
+    assert response.json()['version'] == rules.CATALOG_VERSION
+
+
+@pytest.mark.parametrize("header", [CATALOG_ETAG, f'"stale", {CATALOG_ETAG}'])
+def test_catalog_not_modified(client, header):
+    response = client.get("/api/catalog", headers={"If-None-Match": header})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == CATALOG_ETAG
+
+
+def test_catalog_stale_etag(client):
+    response = client.get("/api/catalog", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json()['version'] == rules.CATALOG_VERSION
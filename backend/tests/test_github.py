@@ -0,0 +1,132 @@
+"""GitHub REST loading: conditional requests and star sums over many pages"""
+import asyncio
+import json
+from collections import OrderedDict
+
+import httpx
+import pytest
+
+from app import platforms
+from app.upstream import CircuitBreaker, RateLimiter, TokenBucket, UpstreamGuard
+
+
+class FakeGitHub:
+    """Users with numbered repositories (repository i has i stars), served
+    with ETags, 304s and GitHub's per_page/page pagination"""
+
+    def __init__(self, repos: dict):
+        self.repos = repos
+        self.requests = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        parts = request.url.path.strip('/').split('/')
+        username = parts[1]
+        if username not in self.repos:
+            return httpx.Response(404, json={'message': 'Not Found'})
+        count = self.repos[username]
+        if parts[-1] == 'repos':
+            per_page = int(request.url.params.get('per_page', 30))
+            page = int(request.url.params.get('page', 1))
+            numbers = range((page - 1) * per_page, min(count, page * per_page))
+            body = json.dumps([
+                # Stars mentioned in a description are not stars
+                {'name': f'repo{i}', 'description': 'the "stargazers_count": 1000 field', 'stargazers_count': i}
+                for i in numbers
+            ]).encode()
+        else:
+            body = json.dumps({'login': username, 'public_repos': count, 'followers': 3, 'following': 1}).encode()
+
+        etag = f'"{hash((str(request.url), count)) & 0xffffffff:x}"'
+        if request.headers.get('If-None-Match') == etag:
+            return httpx.Response(304, headers={'ETag': etag})
+        # Small chunks, so keys are split across chunk boundaries
+        chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+        return httpx.Response(200, headers={'ETag': etag}, stream=ByteStream(chunks))
+
+
+class ByteStream(httpx.AsyncByteStream):
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.fixture
+def github(monkeypatch):
+    server = FakeGitHub({'octo': 250, 'small': 4})
+    monkeypatch.setattr(platforms, "_client", httpx.AsyncClient(transport=httpx.MockTransport(server.handle)))
+    monkeypatch.setattr(platforms, "_github_etags", OrderedDict())
+    return server
+
+
+def use_credential(monkeypatch, token):
+    """Replace the GitHub guard with one generous bucket for ``token``"""
+    bucket = TokenBucket(1000, 10 ** 9, token=token)
+    guard = UpstreamGuard(RateLimiter([bucket]), CircuitBreaker(), expected=(platforms.PlatformUserNotFound,),
+                          name='github')
+    monkeypatch.setitem(platforms.GUARDS, 'github', guard)
+    return bucket
+
+
+def test_stars_are_summed_over_every_page(monkeypatch, github):
+    use_credential(monkeypatch, None)
+    data = asyncio.run(platforms.load_github_data('octo'))
+    assert data == {'public_repos': 250, 'followers': 3, 'following': 1, 'total_stars': sum(range(250))}
+    pages = sorted(int(r.url.params['page']) for r in github.requests if r.url.path.endswith('/repos'))
+    assert pages == [1, 2, 3]
+    assert {r.url.params['per_page'] for r in github.requests if r.url.path.endswith('/repos')} == {'100'}
+
+
+def test_pages_are_capped(monkeypatch, github):
+    use_credential(monkeypatch, None)
+    monkeypatch.setattr(platforms, "GITHUB_MAX_REPO_PAGES", 2)
+    assert asyncio.run(platforms.load_github_data('octo'))['total_stars'] == sum(range(200))
+
+
+def test_unchanged_resources_are_memoized(monkeypatch, github):
+    bucket = use_credential(monkeypatch, 'secret')
+
+    async def scenario():
+        first = await platforms.load_github_data('small')
+        spent = bucket.full_capacity - bucket.tokens
+        second = await platforms.load_github_data('small')
+        return first, spent, second
+
+    first, spent, second = asyncio.run(scenario())
+    assert first == second == {'public_repos': 4, 'followers': 3, 'following': 1, 'total_stars': 6}
+    assert [r.headers.get('If-None-Match') is not None for r in github.requests] == [False, False, True, True]
+    assert all(r.headers['Authorization'] == 'Bearer secret' for r in github.requests)
+    # Authenticated 304s are free, so the second load gave its tokens back
+    assert spent == pytest.approx(2)
+    assert bucket.full_capacity - bucket.tokens == pytest.approx(2)
+
+
+def test_unauthenticated_304s_still_count(monkeypatch, github):
+    bucket = use_credential(monkeypatch, None)
+
+    async def scenario():
+        await platforms.load_github_data('small')
+        await platforms.load_github_data('small')
+
+    asyncio.run(scenario())
+    assert bucket.full_capacity - bucket.tokens == pytest.approx(4)
+
+
+def test_changed_resources_are_reparsed(monkeypatch, github):
+    use_credential(monkeypatch, 'secret')
+
+    async def scenario():
+        await platforms.load_github_data('small')
+        github.repos['small'] = 5
+        return await platforms.load_github_data('small')
+
+    assert asyncio.run(scenario())['total_stars'] == 10
+
+
+def test_unknown_user(monkeypatch, github):
+    use_credential(monkeypatch, None)
+    with pytest.raises(platforms.PlatformUserNotFound):
+        asyncio.run(platforms.load_github_data('ghost'))
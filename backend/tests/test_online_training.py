@@ -0,0 +1,115 @@
+"""Online refresh: the holdout gate, and skipping when nothing is new"""
+from datetime import datetime, timedelta
+from functools import partial
+
+import numpy as np
+import pytest
+
+from app import model_bundle, online_training, synthetic
+from app.models import SessionLocal, UserAnalysis, init_db
+from app.predictor import COMPANY_TYPES, FEATURE_NAMES
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    init_db()
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """A small served bundle in its own MODEL_DIR"""
+    from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    X, scores, companies = synthetic.generate(3000, seed=1)
+    scaler = StandardScaler().fit(X)
+    placement = HistGradientBoostingRegressor(max_iter=30, random_state=0).fit(scaler.transform(X), scores)
+    company = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(scaler.transform(X), companies)
+    model_bundle.save_bundle(placement, company, scaler, model_dir=tmp_path)
+
+    for name in ('current_bundle_path', 'save_bundle', 'prune_bundles'):
+        monkeypatch.setattr(online_training, name, partial(getattr(model_bundle, name), model_dir=tmp_path))
+    monkeypatch.setattr(online_training, "ONLINE_MIN_ROWS", 100)
+    monkeypatch.setattr(online_training, "ONLINE_MIN_HOLDOUT", 20)
+    monkeypatch.setattr(online_training, "ONLINE_REPLAY_ROWS", 300)
+    monkeypatch.setattr(online_training, "ONLINE_EXTRA_ROUNDS", 30)
+    monkeypatch.setattr(online_training, "ONLINE_EXTRA_TREES", 10)
+
+    with SessionLocal() as db:
+        db.query(UserAnalysis).delete()
+        db.commit()
+    return tmp_path
+
+
+def report_outcomes(n: int, seed: int, training_labels=None, shift: float = 0.0):
+    """Analyses with outcomes drawn like the synthetic data, scores moved by
+    ``shift``. ``training_labels(scores, companies)`` replaces the labels of
+    rows outside the holdout."""
+    X, scores, companies = synthetic.generate(n, seed=seed)
+    scores = np.clip(scores + shift, 0, 100)
+    recorded_at = datetime(2026, 5, 1) + timedelta(seconds=seed)
+    with SessionLocal() as db:
+        rows = [UserAnalysis(user_id=f"student-{seed}-{i}", **dict(zip(FEATURE_NAMES, map(float, x))))
+                for i, x in enumerate(X)]
+        db.add_all(rows)
+        db.flush()
+        ids = np.array([row.id for row in rows])
+        if training_labels is not None:
+            train = ~online_training.holdout_mask(ids)
+            scores[train], companies[train] = training_labels(scores[train], companies[train])
+        for row, score, company in zip(rows, scores, companies):
+            row.outcome_score = int(round(score))
+            row.outcome_company_type = COMPANY_TYPES[company]
+            row.outcome_recorded_at = recorded_at
+        db.commit()
+
+
+def test_holdout_is_a_stable_fraction_of_ids():
+    ids = np.arange(1, 20001)
+    mask = online_training.holdout_mask(ids)
+    assert mask.mean() == pytest.approx(online_training.ONLINE_HOLDOUT_FRACTION, abs=0.01)
+    # The same id is always on the same side, whatever else is loaded with it
+    assert np.array_equal(online_training.holdout_mask(ids[::-1])[::-1], mask)
+    assert np.array_equal(online_training.holdout_mask(ids[5000:7000]), mask[5000:7000])
+    assert not online_training.holdout_mask(ids, fraction=0.0).any()
+
+
+def test_better_models_are_saved_once(model_dir):
+    served = model_bundle.current_bundle_path(model_dir)
+    # Placements score higher than the served models expect
+    report_outcomes(800, seed=2, shift=15)
+
+    summary = online_training.refresh_once(seed=0)
+    assert summary['status'] == 'saved'
+    assert summary['holdout_after']['placement_mse'] < summary['holdout_before']['placement_mse']
+    assert model_bundle.current_bundle_path(model_dir) != served
+    online = model_bundle.read_manifest(model_bundle.current_bundle_path(model_dir))['training']['online']
+    assert online['models'] == ['placement_model', 'company_model']
+    assert online['refreshes'] == 1
+
+    again = online_training.refresh_once(seed=0)
+    assert again['status'] == 'skipped'
+    assert again['new_outcomes'] == again['new_scores'] == 0
+
+
+def test_worse_models_are_rejected(model_dir):
+    served = model_bundle.current_bundle_path(model_dir)
+    rng = np.random.default_rng(0)
+
+    def noise(scores, companies):
+        return 100 - scores, rng.integers(len(COMPANY_TYPES), size=len(companies))
+
+    # Training rows are labelled backwards; the holdout keeps the truth
+    report_outcomes(800, seed=3, training_labels=noise)
+
+    summary = online_training.refresh_once(seed=0)
+    assert summary['status'] == 'rejected'
+    assert 'placement_mse' in summary['reason']
+    assert model_bundle.current_bundle_path(model_dir) == served
+
+
+def test_too_few_outcomes_are_skipped(model_dir):
+    report_outcomes(50, seed=4)
+    summary = online_training.refresh_once(seed=0)
+    assert summary['status'] == 'skipped'
+    assert summary['new_outcomes'] + summary['holdout_outcomes'] == 50
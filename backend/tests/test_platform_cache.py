@@ -0,0 +1,223 @@
+"""Read-through platform cache: TTLs, stale-while-revalidate, negative entries"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app import platform_cache
+from app.models import PlatformCache, SessionLocal, engine, init_db, make_platform_cache_unique
+from app.platforms import LOADERS, PlatformUserNotFound
+
+T0 = datetime(2026, 3, 1, 12, 0)
+TTL = platform_cache.CACHE_TTLS['github']
+
+
+class Clock(datetime):
+    """Stands in for platform_cache.datetime; utcnow() returns ``now``"""
+    now = T0
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now
+
+
+class Upstream:
+    """Fake GitHub loader counting calls; ``gate`` holds loads until set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.stars = 1
+        self.error = None
+        self.gate = None
+
+    async def __call__(self, username: str) -> dict:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return {'public_repos': 1, 'followers': 0, 'following': 0, 'total_stars': self.stars}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    init_db()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    with SessionLocal() as db:
+        db.query(PlatformCache).delete()
+        db.commit()
+    platform_cache.clear_memory_cache()
+    Clock.now = T0
+    monkeypatch.setattr(platform_cache, "datetime", Clock)
+    fake = Upstream()
+    monkeypatch.setitem(LOADERS, 'github', fake)
+    return fake
+
+
+async def settle():
+    """Wait for background loads and activity writes"""
+    await asyncio.gather(*platform_cache._inflight.values(), *platform_cache._activity_writes)
+
+
+def stored_rows():
+    with SessionLocal() as db:
+        return db.query(PlatformCache).filter(PlatformCache.platform == 'github').all()
+
+
+def test_fresh_entries_are_served_from_both_tiers(upstream):
+    async def scenario():
+        first = await platform_cache.get_platform_data('github', 'Octo')
+        Clock.now = T0 + TTL - timedelta(seconds=1)
+        second = await platform_cache.get_platform_data('github', 'octo ')
+        platform_cache.clear_memory_cache()
+        third = await platform_cache.get_platform_data('github', 'OCTO')
+        await settle()
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first == second == third
+    assert upstream.calls == 1
+    assert [(row.username, row.is_valid) for row in stored_rows()] == [('octo', True)]
+
+
+def test_expired_entries_reload_in_the_foreground(upstream):
+    async def scenario():
+        await platform_cache.get_platform_data('github', 'octo')
+        upstream.stars = 2
+        Clock.now = T0 + TTL + platform_cache.STALE_GRACE
+        return await platform_cache.get_platform_data('github', 'octo')
+
+    assert asyncio.run(scenario())['total_stars'] == 2
+    assert upstream.calls == 2
+
+
+def test_stale_entries_are_served_while_revalidating(upstream):
+    async def scenario():
+        await platform_cache.get_platform_data('github', 'octo')
+        upstream.stars = 2
+        Clock.now = T0 + TTL
+        stale = await platform_cache.get_platform_data('github', 'octo')
+        await settle()
+        return stale, await platform_cache.get_platform_data('github', 'octo')
+
+    stale, refreshed = asyncio.run(scenario())
+    assert stale['total_stars'] == 1
+    assert refreshed['total_stars'] == 2
+    assert upstream.calls == 2
+    assert stored_rows()[0].last_updated == T0 + TTL
+
+
+def test_unknown_users_are_cached_negatively(upstream):
+    upstream.error = PlatformUserNotFound('ghost')
+
+    async def scenario():
+        first = await platform_cache.get_platform_data('github', 'ghost')
+        Clock.now = T0 + platform_cache.NEGATIVE_TTL - timedelta(seconds=1)
+        second = await platform_cache.get_platform_data('github', 'ghost')
+        Clock.now = T0 + platform_cache.NEGATIVE_TTL + platform_cache.STALE_GRACE
+        await platform_cache.get_platform_data('github', 'ghost')
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == platform_cache.default_data('github')
+    assert upstream.calls == 2
+    assert [row.is_valid for row in stored_rows()] == [False]
+
+
+def test_transient_errors_are_not_cached(upstream):
+    upstream.error = RuntimeError('502')
+
+    async def scenario():
+        first = await platform_cache.get_platform_data('github', 'octo')
+        upstream.error = None
+        return first, await platform_cache.get_platform_data('github', 'octo')
+
+    first, second = asyncio.run(scenario())
+    assert first == platform_cache.default_data('github')
+    assert second['total_stars'] == 1
+    assert upstream.calls == 2
+
+
+def test_concurrent_lookups_share_one_load(upstream):
+    async def scenario():
+        upstream.gate = asyncio.Event()
+        lookups = [asyncio.create_task(platform_cache.get_platform_data('github', name))
+                   for name in ['octo', 'Octo', 'OCTO ', 'octo']]
+        while upstream.calls == 0:
+            await asyncio.sleep(0.001)
+        # Let every lookup finish its database read and join the load
+        await asyncio.sleep(0.1)
+        # A caller that gives up does not cancel the load for the others
+        lookups[0].cancel()
+        await asyncio.sleep(0)
+        upstream.gate.set()
+        return await asyncio.gather(*lookups[1:])
+
+    results = asyncio.run(scenario())
+    assert upstream.calls == 1
+    assert all(result['total_stars'] == 1 for result in results)
+    assert len(stored_rows()) == 1
+
+
+def test_activity_is_written_at_most_once_per_resolution(upstream):
+    resolution = platform_cache.ACTIVITY_RESOLUTION
+
+    async def lookup_at(when: datetime):
+        Clock.now = when
+        await platform_cache.get_platform_data('github', 'octo')
+        await settle()
+        return stored_rows()[0].last_requested
+
+    async def scenario():
+        return [
+            await lookup_at(T0),
+            await lookup_at(T0 + resolution / 2),
+            await lookup_at(T0 + resolution),
+        ]
+
+    assert asyncio.run(scenario()) == [T0, T0, T0 + resolution]
+    assert upstream.calls == 1
+
+
+def test_write_upserts_one_row_per_handle(upstream):
+    key = platform_cache.cache_key('github', 'octo')
+    platform_cache._write_db(key, platform_cache.CacheEntry(data={'total_stars': 1}, fetched_at=T0, requested_at=T0))
+    later = T0 + timedelta(hours=1)
+    # A refresh without request activity keeps the recorded last_requested
+    platform_cache._write_db(key, platform_cache.CacheEntry(data={'total_stars': 5}, fetched_at=later))
+    [row] = stored_rows()
+    assert (row.data, row.last_updated, row.last_requested) == ('{"total_stars": 5}', later, T0)
+    assert platform_cache._read_db(key).data == {'total_stars': 5}
+
+
+def test_migration_keeps_the_newest_row(upstream):
+    with engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_platform_cache_platform_username'))
+        connection.execute(text('CREATE INDEX ix_platform_cache_platform_username ON platform_cache (platform, username)'))
+    rows = [
+        ('octo', T0, '{"total_stars": 1}'),
+        ('octo', T0 + timedelta(hours=2), '{"total_stars": 3}'),
+        ('octo', T0 + timedelta(hours=1), '{"total_stars": 2}'),
+        # Ties on last_updated keep the higher id
+        ('cat', T0, '{"total_stars": 7}'),
+        ('cat', T0, '{"total_stars": 8}'),
+    ]
+    with SessionLocal() as db:
+        db.add_all([
+            PlatformCache(platform='github', username=username, last_updated=updated, data=data, is_valid=True)
+            for username, updated, data in rows
+        ])
+        db.commit()
+
+    make_platform_cache_unique()
+    init_db()
+
+    assert sorted((row.username, row.data) for row in stored_rows()) == [
+        ('cat', '{"total_stars": 8}'), ('octo', '{"total_stars": 3}'),
+    ]
+    indexes = {index['name']: index for index in inspect(engine).get_indexes('platform_cache')}
+    assert indexes['ix_platform_cache_platform_username']['unique']
@@ -0,0 +1,134 @@
+"""Prediction cache: request coalescing, model-version invalidation, bounds"""
+import asyncio
+
+import pytest
+
+from app import prediction_cache
+from app.prediction_cache import PredictionCache, profile_key
+from app.schemas import UserProfile
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class Compute:
+    """Counts calls; each call waits for ``gate`` when set"""
+
+    def __init__(self, value='result', error=None):
+        self.calls = 0
+        self.value = value
+        self.error = error
+        self.gate = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(prediction_cache, "time", fake)
+    return fake
+
+
+def test_concurrent_misses_share_one_computation(clock):
+    cache = PredictionCache()
+    compute = Compute()
+
+    async def scenario():
+        compute.gate = asyncio.Event()
+        callers = [asyncio.create_task(cache.get_or_compute(('v1', 'k'), compute)) for _ in range(10)]
+        await asyncio.sleep(0)
+        # A caller that gives up does not cancel the computation
+        callers[0].cancel()
+        compute.gate.set()
+        results = await asyncio.gather(*callers[1:])
+        return results, await cache.get_or_compute(('v1', 'k'), compute)
+
+    results, again = asyncio.run(scenario())
+    assert results == ['result'] * 9 and again == 'result'
+    assert compute.calls == 1
+    stats = cache.stats()
+    assert (stats['misses'], stats['coalesced'], stats['hits'], stats['in_flight']) == (1, 9, 1, 0)
+
+
+def test_failures_reach_every_caller_and_are_not_cached(clock):
+    cache = PredictionCache()
+    compute = Compute(error=ValueError('model failed'))
+
+    async def scenario():
+        compute.gate = asyncio.Event()
+        callers = [asyncio.create_task(cache.get_or_compute(('v1', 'k'), compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        compute.gate.set()
+        failed = await asyncio.gather(*callers, return_exceptions=True)
+        compute.error, compute.gate = None, None
+        return failed, await cache.get_or_compute(('v1', 'k'), compute)
+
+    failed, recovered = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in failed)
+    assert recovered == 'result'
+    assert compute.calls == 2
+
+
+def test_new_model_version_invalidates(clock):
+    cache = PredictionCache()
+
+    async def scenario():
+        await cache.get_or_compute(('v1', 'a'), Compute('old'))
+        assert cache.get(('v1', 'a')) == 'old'
+
+        # A result still computing with v1 when v2 arrives is not stored
+        slow = Compute('stale')
+        slow.gate = asyncio.Event()
+        pending = asyncio.create_task(cache.get_or_compute(('v1', 'b'), slow))
+        await asyncio.sleep(0)
+        fresh = await cache.get_or_compute(('v2', 'a'), Compute('new'))
+        slow.gate.set()
+        return fresh, await pending
+
+    fresh, stale = asyncio.run(scenario())
+    assert (fresh, stale) == ('new', 'stale')
+    assert cache.model_version == 'v2'
+    assert cache.get(('v2', 'a')) == 'new'
+    assert cache.get(('v2', 'b')) is None
+    assert cache.stats()['entries'] == 1
+    assert cache.invalidations == 1
+
+
+def test_entries_expire_and_stay_within_max_bytes(clock):
+    cache = PredictionCache(ttl=60)
+    cache.get(('v1', 'a'))
+    cache.put(('v1', 'a'), 'x' * 100)
+    clock.now += 59
+    assert cache.get(('v1', 'a')) is not None
+    clock.now += 1
+    assert cache.get(('v1', 'a')) is None
+    assert cache.expirations == 1 and cache.bytes == 0
+
+    one = prediction_cache._sizeof(('v1', 'k0')) + prediction_cache._sizeof('x' * 1000)
+    cache = PredictionCache(max_bytes=3 * one)
+    cache.get(('v1', 'k0'))
+    for i in range(5):
+        cache.put(('v1', f'k{i}'), 'x' * 1000)
+    assert list(key for _, key in cache._entries) == ['k2', 'k3', 'k4']
+    assert cache.bytes <= cache.max_bytes and cache.evictions == 2
+
+
+def test_profile_key_ignores_who_asked_and_handle_case():
+    base = UserProfile(cgpa=8.0, skills=['Python', 'Go'], github_username='Octo', user_id='a')
+    same = UserProfile(cgpa=8.0, skills=['Go ', 'Python'], github_username=' octo', user_id='b')
+    other = UserProfile(cgpa=8.0, skills=['Go', 'Python', 'Rust'], github_username='octo')
+    assert profile_key(base, 'v1') == profile_key(same, 'v1')
+    assert profile_key(base, 'v1') != profile_key(other, 'v1')
+    assert profile_key(base, 'v1')[1] == profile_key(base, 'v2')[1]
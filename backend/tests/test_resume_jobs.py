@@ -0,0 +1,83 @@
+"""Resume job status is shared between worker processes through the database"""
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.models import init_db
+from app.resume import ResumeJobQueue, store_upload
+
+RESUME = b"""Jane Doe
+B.Tech in Computer Science, 2016 - 2020
+Software Engineer at Acme, 2020 - 2023
+Python, Docker, PostgreSQL
+"""
+
+
+def poll_in_other_process(job_id: str) -> dict:
+    """What a second app.serve worker answers for the job"""
+    job = asyncio.run(ResumeJobQueue(workers=1).get(job_id))
+    return None if job is None else job.to_dict()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    init_db()
+
+
+async def upload(queue: ResumeJobQueue, upload_dir, content: bytes):
+    resume = await store_upload(UploadFile(io.BytesIO(content), filename="resume.txt"), upload_dir=upload_dir)
+    return await queue.submit(resume)
+
+
+async def wait_done(queue: ResumeJobQueue, job_id: str):
+    for _ in range(600):
+        job = await queue.get(job_id)
+        if job.status in ('done', 'failed'):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError("resume job did not finish")
+
+
+def test_other_worker_sees_job(tmp_path):
+    accepting = ResumeJobQueue(workers=1)
+    polling = ResumeJobQueue(workers=1)
+
+    async def scenario():
+        job = await upload(accepting, tmp_path, RESUME)
+        # Known to the other worker before parsing finishes
+        assert (await polling.get(job.id)).status in ('queued', 'running', 'done')
+        return job.id, await wait_done(polling, job.id)
+
+    try:
+        job_id, finished = asyncio.run(scenario())
+    finally:
+        accepting.shutdown()
+
+    assert finished.status == 'done'
+    assert 'Python' in finished.result['keywords']
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as other:
+        assert other.submit(poll_in_other_process, job_id).result() == finished.to_dict()
+
+
+def test_cached_resume_is_done_everywhere(tmp_path):
+    queue = ResumeJobQueue(workers=1)
+
+    async def scenario():
+        first = await upload(queue, tmp_path, RESUME + b"Kubernetes\n")
+        await wait_done(queue, first.id)
+        return first, await upload(queue, tmp_path, RESUME + b"Kubernetes\n")
+
+    try:
+        first, again = asyncio.run(scenario())
+    finally:
+        queue.shutdown()
+    assert again.id != first.id and again.status == 'done'
+    assert asyncio.run(ResumeJobQueue(workers=1).get(again.id)).result == again.result
+
+
+def test_unknown_job():
+    assert asyncio.run(ResumeJobQueue(workers=1).get('0' * 32)) is None
@@ -0,0 +1,98 @@
+"""Skill, education and experience extraction from resume text"""
+import pytest
+
+from app.resume import _education, _experience_years, parse_resume
+
+RESUME = """Priya Sharma
+priya.sharma@example.com | github.com/priya
+
+SUMMARY
+Backend engineer who enjoys building reliable services. I like to go deep
+on performance, and to rest of the team I am the go-to person for on-call.
+
+SKILLS
+Languages: Python, Go, C, Java, SQL
+Frameworks: Django, Express, Spring Boot, React
+Tools: Git, Docker, Kubernetes, AWS
+
+EXPERIENCE
+Software Engineer, Acme Corp
+- Designed REST APIs in Go serving 2M requests a day.
+- Moved deployments from Heroku to Kubernetes.
+"""
+
+
+def parse(tmp_path, text: str) -> dict:
+    path = tmp_path / "resume.txt"
+    path.write_text(text)
+    return parse_resume(str(path))
+
+
+def test_skills_from_resume(tmp_path):
+    assert parse(tmp_path, RESUME)['keywords'] == [
+        'Python', 'Go', 'C', 'Java', 'SQL', 'Django', 'Express', 'Spring', 'React',
+        'Git', 'Docker', 'Kubernetes', 'AWS', 'REST',
+    ]
+
+
+@pytest.mark.parametrize("text, skills", [
+    ("I want to go to C++ class and learn about rest of express delivery. Git gud. Swift decision.", ['C++']),
+    ("Volunteered at a spring fair; rust removal and react quickly to customer needs.", []),
+    ("Go team! Swift and decisive under pressure.", []),
+])
+def test_everyday_words_are_not_skills(tmp_path, text, skills):
+    assert parse(tmp_path, text)['keywords'] == skills
+
+
+def test_ambiguous_skills_in_capitals(tmp_path):
+    assert parse(tmp_path, "TECHNICAL SKILLS: PYTHON, GO, RUST, GIT")['keywords'] == ['Python', 'Go', 'Rust', 'Git']
+
+
+def test_unambiguous_skills_in_any_case(tmp_path):
+    assert parse(tmp_path, "worked with postgresql, docker and machine learning")['keywords'] == [
+        'PostgreSQL', 'Docker', 'Machine Learning',
+    ]
+
+
+@pytest.mark.parametrize("text, education", [
+    ("B.Tech in CSE, 2016 - 2020", "Bachelor in Computer Science"),
+    ("B.E. (Electronics)", "Bachelor in Electronics"),
+    ("BE in Mechanical Engineering", "Bachelor in Mechanical"),
+    ("Bachelor's degree in information technology", "Bachelor in Information Technology"),
+    ("M.S. in Computer Science", "Master in Computer Science"),
+    ("MS in Computer Science", "Master in Computer Science"),
+    ("MSc Computer Science", "Master in Computer Science"),
+    ("Master of Technology, IT", "Master in Information Technology"),
+    ("M.Tech ECE", "Master in Electronics"),
+    ("Ph.D in EEE", "Ph.D in Electrical"),
+    ("BCA", "Bachelor"),
+])
+def test_degrees_and_fields(text, education):
+    assert _education(text) == education
+
+
+@pytest.mark.parametrize("text", [
+    "I want to be the engineer who makes it work.",
+    "Proficient in MS Office and Excel.",
+    "Certified Scrum Master. Mastered Python in a month.",
+    "It is what it is; be kind.",
+])
+def test_ordinary_words_are_not_education(text):
+    assert _education(text) == 'Not specified'
+
+
+@pytest.mark.parametrize("text, years", [
+    ("2015 - 2019 B.Tech in CSE\nSoftware Engineer, Acme 2019 - 2022", 3.0),
+    ("Stanford University 2010-2014\nGoogle 2014 - 2016", 2.0),
+    ("EDUCATION\nIIT Delhi\n2015 - 2019\nEXPERIENCE\nAcme\n2019 - 2021\nGlobex 2021 - 2023", 4.0),
+    ("Education:\nB.Sc Physics\n2012 to 2015", 0.0),
+])
+def test_education_ranges_are_not_experience(text, years):
+    assert _experience_years(text) == years
+
+
+def test_stated_years_win(tmp_path):
+    text = RESUME + "\nEDUCATION\nB.Tech in Computer Science, 2012 - 2016\n\n6+ years of backend experience\n"
+    parsed = parse(tmp_path, text)
+    assert parsed['experience_years'] == 6.0
+    assert parsed['education'] == 'Bachelor in Computer Science'
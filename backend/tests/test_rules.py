@@ -0,0 +1,119 @@
+"""The compiled rule table against the per-student builders it replaced"""
+import numpy as np
+import orjson
+
+from app import rules
+from app.predictor import COMPANY_TYPES, FEATURE_NAMES, build_feature_matrix, prediction_payload
+
+
+# The original response builders, kept here as the reference
+
+def baseline_suggestions(profile, platform_data):
+    suggestions = []
+    if platform_data.leetcode_problems < 100:
+        suggestions.append('Solve more LeetCode problems daily')
+    if platform_data.codeforces_rating < 1200:
+        suggestions.append('Participate in Codeforces contests')
+    if profile.project_count < 3:
+        suggestions.append('Build more projects to showcase skills')
+    if len(profile.skills) < 5:
+        suggestions.append('Learn more relevant technologies')
+    if not profile.linkedin_profile:
+        suggestions.append('Create a professional LinkedIn profile')
+    return suggestions
+
+
+def baseline_focus_areas(profile, platform_data, score):
+    focus_areas = []
+    if platform_data.leetcode_problems < 100:
+        focus_areas.append('Data Structures & Algorithms')
+    if profile.project_count < 3:
+        focus_areas.append('Project Development')
+    if len(profile.skills) < 5:
+        focus_areas.append('Technical Skills')
+    if score > 70:
+        focus_areas.append('System Design')
+    if not profile.linkedin_profile:
+        focus_areas.append('Professional Networking')
+    return focus_areas if focus_areas else ['Continue building on strengths']
+
+
+def baseline_strengths(profile, platform_data, score):
+    strengths = []
+    if profile.cgpa >= 8.0:
+        strengths.append('Strong Academic Performance')
+    if platform_data.leetcode_problems >= 200:
+        strengths.append('Excellent Problem Solving')
+    if profile.project_count >= 5:
+        strengths.append('Strong Project Portfolio')
+    if len(profile.skills) >= 8:
+        strengths.append('Diverse Technical Skills')
+    if profile.work_experience > 0:
+        strengths.append('Relevant Work Experience')
+    return strengths if strengths else ['Dedicated to learning']
+
+
+def baseline_response(profile, platform_data, score, probs):
+    requirements = {company_type: list(reqs) for company_type, reqs in rules.COMPANY_REQUIREMENTS.items()}
+    company_matches = [
+        {
+            'type': company_type,
+            'match_percentage': int(prob * 100),
+            'description': f'Match probability for {company_type} companies',
+            'requirements': requirements[company_type],
+            'suggestions': baseline_suggestions(profile, platform_data),
+        }
+        for company_type, prob in zip(COMPANY_TYPES, probs)
+    ]
+    company_matches.sort(key=lambda x: x['match_percentage'], reverse=True)
+    return {
+        'overall_score': score,
+        'company_matches': company_matches,
+        'focus_areas': baseline_focus_areas(profile, platform_data, score),
+        'strengths': baseline_strengths(profile, platform_data, score),
+        'course_recommendations': [{
+            'title': 'Master the Coding Interview: Data Structures + Algorithms',
+            'provider': 'Udemy',
+            'duration': '19 hours',
+            'difficulty': 'Intermediate',
+            'rating': 4.6,
+            'price': '$84.99',
+            'url': 'https://www.udemy.com/course/master-the-coding-interview-data-structures-algorithms/',
+        }],
+        'international_opportunities': [{
+            'country': 'United States',
+            'match_score': min(score + 10, 100),
+            'visa_type': 'H1-B',
+            'average_salary': '$120,000 - $200,000',
+            'top_companies': ['Google', 'Microsoft', 'Amazon'],
+        }],
+        'linkedin_insights': {
+            'profile_strength': 75,
+            'network_quality': 80,
+            'industry_alignment': 70,
+            'suggestions': [
+                'Add more technical skills',
+                'Get recommendations from colleagues',
+                'Share technical articles',
+            ],
+        } if profile.linkedin_profile else None,
+    }
+
+
+def test_table_covers_every_mask():
+    assert len(rules.TABLE) == 1 << len(rules.RULES)
+
+
+def test_payload_matches_baseline(students):
+    for profile, data, score, probs in students:
+        payload = prediction_payload(profile, data, score, probs)
+        assert orjson.loads(orjson.dumps(payload)) == baseline_response(profile, data, score, probs)
+
+
+def test_batch_masks_match_student_masks(students):
+    profiles, data, scores, _ = zip(*students)
+    features = build_feature_matrix(profiles, data)
+    has_linkedin = np.array([bool(profile.linkedin_profile) for profile in profiles])
+    masks = rules.batch_masks(features, FEATURE_NAMES, has_linkedin, np.array(scores))
+    expected = [rules.student_mask(profile, d, score) for profile, d, score in zip(profiles, data, scores)]
+    assert masks.tolist() == expected
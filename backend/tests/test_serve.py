@@ -0,0 +1,77 @@
+"""Upstream quotas shared between app.serve workers (and app.refresher)"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, serve, similarity, upstream
+from app.platforms import GUARDS
+
+
+def worker_buckets(monkeypatch, workers: int):
+    """Token buckets of one worker after its lifespan has started"""
+    monkeypatch.setattr(main, "WORKER_PROCESSES", workers)
+    monkeypatch.setattr(main, "STARTUP_MODE", "lazy")
+    monkeypatch.setattr(main, "MODEL_RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(similarity, "SIMILARITY_SYNC_INTERVAL", 0)
+    with TestClient(main.app):
+        return {platform: list(guard.limiter.buckets) for platform, guard in GUARDS.items()}
+
+
+@pytest.fixture(autouse=True)
+def restore_quotas():
+    yield
+    upstream.scale_guards(GUARDS, 1.0)
+
+
+@pytest.mark.parametrize("refresher", [False, True])
+@pytest.mark.parametrize("workers", [1, 2, 3, 4])
+def test_worker_quotas_sum_to_configured(monkeypatch, workers, refresher):
+    monkeypatch.setattr(upstream, "REFRESHER_ENABLED", refresher)
+    # Every forked worker applies the same share to its own copy
+    buckets = worker_buckets(monkeypatch, workers)
+    refresher_guards = upstream.build_guards()
+    upstream.scale_guards(refresher_guards, upstream.REFRESH_QUOTA_SHARE)
+
+    worker_share = upstream.api_quota_share() / workers
+    for platform, platform_buckets in buckets.items():
+        for i, bucket in enumerate(platform_buckets):
+            shares = [worker_share] * workers
+            rate = workers * bucket.rate
+            capacity = workers * bucket.capacity
+            if refresher:
+                refresher_bucket = refresher_guards[platform].limiter.buckets[i]
+                shares.append(upstream.REFRESH_QUOTA_SHARE)
+                rate += refresher_bucket.rate
+                capacity += refresher_bucket.capacity
+            assert rate == pytest.approx(bucket.full_rate)
+            # Bursts round down, but every process keeps at least one call
+            assert capacity <= sum(max(1.0, bucket.full_capacity * share) for share in shares)
+            if all(bucket.full_capacity * share >= 1 for share in shares):
+                assert capacity <= bucket.full_capacity
+
+
+def test_lifespan_scaling_does_not_compound(monkeypatch):
+    first = {platform: [b.rate for b in buckets] for platform, buckets in worker_buckets(monkeypatch, 2).items()}
+    second = {platform: [b.rate for b in buckets] for platform, buckets in worker_buckets(monkeypatch, 2).items()}
+    assert first == second
+
+
+def test_preload_configures_workers(monkeypatch):
+    monkeypatch.setattr(main, "WORKER_PROCESSES", 1)
+    monkeypatch.setattr(main, "STARTUP_MODE", "eager")
+    monkeypatch.setattr(main, "init_db", lambda: None)
+    monkeypatch.setattr(main, "warm_up", lambda: None)
+    serve.preload(3)
+    assert main.WORKER_PROCESSES == 3
+    assert main.STARTUP_MODE == "preloaded"
+
+
+def test_preloaded_workers_skip_startup(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "STARTUP_MODE", "preloaded")
+    monkeypatch.setattr(main, "MODEL_RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(similarity, "SIMILARITY_SYNC_INTERVAL", 0)
+    monkeypatch.setattr(main, "init_db", lambda: calls.append("init_db"))
+    monkeypatch.setattr(main, "warm_up", lambda: calls.append("warm_up"))
+    with TestClient(main.app):
+        pass
+    assert calls == []
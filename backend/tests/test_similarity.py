@@ -0,0 +1,156 @@
+"""Similar-students index: incremental sync, rebuilds and neighbor selection"""
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from app import similarity
+from app.models import SessionLocal, UserAnalysis, init_db
+from app.predictor import FEATURE_NAMES
+from app.similarity import DIM, SimilarityIndex, similar_students, sync
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    init_db()
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    with SessionLocal() as db:
+        db.query(UserAnalysis).delete()
+        db.commit()
+    return tmp_path / "similarity"
+
+
+def scaler(seed: int = 0) -> StandardScaler:
+    return StandardScaler().fit(np.random.default_rng(seed).normal(size=(100, DIM)) * [1, 100, 400, 2, 3, 1])
+
+
+def add_analyses(features, user_ids=None) -> list:
+    features = np.asarray(features, dtype=np.float64)
+    user_ids = user_ids or [f"student-{i}" for i in range(len(features))]
+    with SessionLocal() as db:
+        rows = [
+            UserAnalysis(user_id=user_id, overall_score=50, **dict(zip(FEATURE_NAMES, map(float, x))))
+            for user_id, x in zip(user_ids, features)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+
+def random_features(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(6, 10, n), rng.integers(0, 600, n), rng.integers(0, 2400, n),
+        rng.integers(0, 10, n), rng.integers(0, 15, n), rng.integers(0, 4, n),
+    ])
+
+
+def brute_force(features: np.ndarray, ids: list, s: StandardScaler, query: np.ndarray, k: int) -> list:
+    distances = ((similarity.scale(s, features) - similarity.scale(s, query.reshape(1, DIM))[0]) ** 2).sum(axis=1)
+    return [ids[i] for i in np.argsort(distances, kind='stable')[:k]]
+
+
+def test_sync_appends_new_rows(index_dir):
+    s = scaler()
+    features = random_features(300, seed=1)
+    ids = add_analyses(features[:200])
+    first = sync(s, index_dir)
+    ids += add_analyses(features[200:])
+    second = sync(s, index_dir)
+
+    assert second['generation'] == first['generation']
+    assert (first['rows'], second['rows'], second['last_id']) == (200, 300, ids[-1])
+    index = SimilarityIndex(index_dir)
+    assert index.refresh() and not index.refresh()
+    query = features[250]
+    found, distances = index.search(similarity.scale(s, query.reshape(1, DIM))[0], 5)
+    assert found.tolist() == brute_force(features, ids, s, query, 5)
+    assert distances[0] == 0
+
+
+def test_sync_truncates_a_failed_append(index_dir):
+    s = scaler()
+    ids = add_analyses(random_features(50, seed=2))
+    state = sync(s, index_dir)
+    path = index_dir / state['generation']
+    # A crash mid-append leaves bytes that current.json does not count
+    for name in ("vectors.f32", "ids.i64"):
+        with open(path / name, 'ab') as f:
+            f.write(b'\xff' * 13)
+
+    new = random_features(10, seed=3)
+    ids += add_analyses(new)
+    state = sync(s, index_dir)
+    assert state['rows'] == 60
+    assert (path / "vectors.f32").stat().st_size == 60 * DIM * 4
+    assert (path / "ids.i64").stat().st_size == 60 * 8
+
+    index = SimilarityIndex(index_dir)
+    index.refresh()
+    assert index._snapshot.ids.tolist() == ids
+    found, _ = index.search(similarity.scale(s, new[:1])[0], 1)
+    assert found.tolist() == [ids[50]]
+
+
+def test_scaler_change_rebuilds(index_dir):
+    old, new = scaler(0), scaler(1)
+    add_analyses(random_features(40, seed=4))
+    first = sync(old, index_dir)
+    index = SimilarityIndex(index_dir)
+    index.refresh()
+
+    query = random_features(1, seed=5)[0]
+    assert similar_students(index, new, query, 3)['index']['stale']
+
+    second = sync(new, index_dir)
+    assert second['generation'] != first['generation']
+    assert second['scaler'] == similarity.scaler_checksum(new) != first['scaler']
+    assert [p.name for p in index_dir.glob("gen-*")] == [second['generation']]
+    index.refresh()
+    assert not similar_students(index, new, query, 3)['index']['stale']
+
+
+def test_outgrowing_the_exact_scan_partitions(index_dir, monkeypatch):
+    monkeypatch.setattr(similarity, "SIMILARITY_EXACT_MAX_ROWS", 100)
+    s = scaler()
+    features = random_features(400, seed=6)
+    ids = add_analyses(features[:80])
+    assert sync(s, index_dir)['lists'] == 0
+    ids += add_analyses(features[80:])
+    state = sync(s, index_dir)
+    assert state['lists'] == 20 and state['rows'] == 400
+
+    # Probing every list gives the exact answer
+    index = SimilarityIndex(index_dir, nprobe=state['lists'])
+    index.refresh()
+    assert index.stats()['mode'] == 'ivf'
+    for query in features[:20]:
+        found, _ = index.search(similarity.scale(s, query.reshape(1, DIM))[0], 5)
+        assert found.tolist() == brute_force(features, ids, s, query, 5)
+
+
+def test_neighbors_skip_the_asker_and_repeat_analyses(index_dir):
+    s = scaler()
+    me = np.array([8.0, 300, 1500, 4, 6, 1])
+    nearby = [me + [0.0, step, 0, 0, 0, 0] for step in (1, 2, 3, 4, 5, 6)]
+    far = random_features(30, seed=7) + [0, 5000, 0, 0, 0, 0]
+    add_analyses(
+        [me, me] + nearby + list(far),
+        ['me', 'me', 'twin', 'twin', 'twin', 'other', None, None] + [f"far-{i}" for i in range(30)],
+    )
+    sync(s, index_dir)
+    index = SimilarityIndex(index_dir)
+    index.refresh()
+
+    result = similar_students(index, s, me, 4, exclude_user='me')
+    distances = [n['distance'] for n in result['neighbors']]
+    # twin's nearest analysis only, then other, then both anonymous rows
+    assert len(distances) == 4
+    assert distances == sorted(distances)
+    expected = similarity.scale(s, np.array(nearby)[[0, 3, 4, 5]]) - similarity.scale(s, me.reshape(1, DIM))
+    assert distances == pytest.approx(np.sqrt((expected ** 2).sum(axis=1)), abs=1e-4)
+
+    # Without exclude_user the asker's own analyses come first, once
+    assert similar_students(index, s, me, 1)['neighbors'][0]['distance'] == 0
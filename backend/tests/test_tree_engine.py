@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from app.tree_engine import (
+    CompiledGradientBoosting,
+    CompiledHistGradientBoosting,
+    CompiledRandomForest,
+    CompiledTrees,
+)
+
+
+def training_data(seed: int = 0, rows: int = 400):
+    rng = np.random.default_rng(seed)
+    # Very different scales per feature, like the real ones
+    X = rng.normal(size=(rows, 6)) * [1.5, 300, 400, 3, 4, 1] + [7.5, 200, 1200, 4, 8, 1]
+    X[:, 3] = np.round(np.abs(X[:, 3]))
+    y = X @ [5, 0.05, 0.02, 2, 1, 3] + rng.normal(0, 2, rows)
+    return X, y
+
+
+def threshold_inputs(model_trees, scaler, rng, rows: int = 300) -> np.ndarray:
+    """Raw rows whose features sit exactly on (and one ulp around) split
+    thresholds mapped back from the scaled space"""
+    features = np.concatenate([tree.feature[tree.children_left != -1] for tree in model_trees])
+    thresholds = np.concatenate([tree.threshold[tree.children_left != -1] for tree in model_trees])
+    raw = thresholds * scaler.scale_[features] + scaler.mean_[features]
+    picks = rng.integers(0, len(raw), size=rows)
+    X = scaler.inverse_transform(rng.normal(size=(rows, scaler.n_features_in_)))
+    X[np.arange(rows), features[picks]] = raw[picks]
+    nudged = X.copy()
+    nudged[np.arange(rows), features[picks]] = np.nextafter(raw[picks], np.inf)
+    below = X.copy()
+    below[np.arange(rows), features[picks]] = np.nextafter(raw[picks], -np.inf)
+    return np.vstack([X, nudged, below])
+
+
+@pytest.fixture(scope="module")
+def scaled():
+    X, y = training_data()
+    scaler = StandardScaler().fit(X)
+    return X, y, scaler
+
+
+@pytest.mark.parametrize("rows", [1, 37, 5000])
+def test_gradient_boosting_matches_sklearn(scaled, rows):
+    X, y, scaler = scaled
+    model = GradientBoostingRegressor(n_estimators=40, max_depth=4, random_state=0).fit(scaler.transform(X), y)
+    compiled = CompiledGradientBoosting(model, scaler)
+    rng = np.random.default_rng(rows)
+    X_test = scaler.inverse_transform(rng.normal(size=(rows, X.shape[1])))
+    np.testing.assert_allclose(compiled.predict(X_test), model.predict(scaler.transform(X_test)), rtol=1e-9, atol=1e-9)
+
+
+def test_gradient_boosting_folded_thresholds(scaled):
+    X, y, scaler = scaled
+    model = GradientBoostingRegressor(n_estimators=40, max_depth=4, random_state=0).fit(scaler.transform(X), y)
+    compiled = CompiledGradientBoosting(model, scaler)
+    X_test = threshold_inputs([e.tree_ for e in model.estimators_[:, 0]], scaler, np.random.default_rng(1))
+    np.testing.assert_allclose(compiled.predict(X_test), model.predict(scaler.transform(X_test)), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("rows", [1, 37, 5000])
+def test_hist_gradient_boosting_matches_sklearn(scaled, rows):
+    X, y, scaler = scaled
+    model = HistGradientBoostingRegressor(max_iter=40, random_state=0).fit(scaler.transform(X), y)
+    compiled = CompiledHistGradientBoosting(model, scaler)
+    rng = np.random.default_rng(rows)
+    X_test = scaler.inverse_transform(rng.normal(size=(rows, X.shape[1])))
+    np.testing.assert_allclose(compiled.predict(X_test), model.predict(scaler.transform(X_test)), rtol=1e-9, atol=1e-9)
+
+
+def test_hist_gradient_boosting_on_training_rows(scaled):
+    # Training rows land on bin edges, where the folded thresholds matter
+    X, y, scaler = scaled
+    model = HistGradientBoostingRegressor(max_iter=40, random_state=0).fit(scaler.transform(X), y)
+    compiled = CompiledHistGradientBoosting(model, scaler)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(scaler.transform(X)), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("rows", [1, 37, 5000])
+def test_random_forest_matches_sklearn(scaled, rows):
+    X, y, scaler = scaled
+    labels = np.digitize(y, np.quantile(y, [0.25, 0.5, 0.75]))
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(scaler.transform(X), labels)
+    compiled = CompiledRandomForest(model, scaler)
+    rng = np.random.default_rng(rows)
+    X_test = scaler.inverse_transform(rng.normal(size=(rows, X.shape[1])))
+    np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(scaler.transform(X_test)),
+                               rtol=1e-9, atol=1e-12)
+
+
+def test_random_forest_folded_thresholds(scaled):
+    X, y, scaler = scaled
+    labels = np.digitize(y, np.quantile(y, [0.25, 0.5, 0.75]))
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(scaler.transform(X), labels)
+    compiled = CompiledRandomForest(model, scaler)
+    X_test = threshold_inputs([e.tree_ for e in model.estimators_], scaler, np.random.default_rng(2))
+    np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(scaler.transform(X_test)),
+                               rtol=1e-9, atol=1e-12)
+
+
+def test_breadth_first_and_tree_by_tree_agree(scaled):
+    X, y, scaler = scaled
+    model = GradientBoostingRegressor(n_estimators=20, max_depth=5, random_state=0).fit(scaler.transform(X), y)
+    trees: CompiledTrees = CompiledGradientBoosting(model, scaler).trees
+    np.testing.assert_array_equal(trees._apply_all_trees(X), trees._apply_tree_by_tree(X))
@@ -0,0 +1,228 @@
+"""Token buckets, circuit breakers and the guard combining them"""
+import asyncio
+
+import pytest
+
+from app import upstream
+from app.upstream import (
+    CircuitBreaker, CircuitOpen, RateLimited, RateLimiter, TokenBucket, UpstreamGuard,
+)
+
+
+class Clock:
+    """Stands in for upstream.time, so quotas and breakers run on fake time"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        # Wall clock, a fixed offset from the monotonic one
+        return self.now + 1_700_000_000
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+class NotFound(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(upstream, "time", fake)
+    return fake
+
+
+def test_bucket_refills_evenly_up_to_capacity(clock):
+    bucket = TokenBucket(5, 10)
+    bucket.take(5)
+    assert bucket.wait_time(1, clock.now) == pytest.approx(2.0)
+    clock.now += 4
+    assert bucket.wait_time(2, clock.now) == 0
+    assert bucket.tokens == pytest.approx(2.0)
+    clock.now += 100
+    bucket.wait_time(1, clock.now)
+    assert bucket.tokens == 5
+    assert bucket.wait_time(6, clock.now) == float('inf')
+
+
+def test_acquire_uses_the_credential_with_most_quota(clock):
+    limiter = RateLimiter([TokenBucket(2, 10, token='a'), TokenBucket(3, 10, token='b')], max_wait=0)
+
+    async def acquire_all():
+        return [await limiter.acquire() for _ in range(5)]
+
+    assert sorted(asyncio.run(acquire_all())) == ['a', 'a', 'b', 'b', 'b']
+    with pytest.raises(RateLimited):
+        asyncio.run(limiter.acquire())
+    assert limiter.rejected == 1
+
+
+def test_cancelled_wait_gives_its_tokens_back(clock):
+    bucket = TokenBucket(1, 0.2)
+    limiter = RateLimiter([bucket], max_wait=1)
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        # Reserved while waiting
+        assert bucket.tokens == -1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+    assert bucket.tokens == 0
+    assert limiter.waited == 1
+    # The next caller queues behind nobody
+    assert bucket.wait_time(1, clock.now) == pytest.approx(0.2)
+
+
+def test_refund_is_capped_at_capacity(clock):
+    bucket = TokenBucket(2, 10, token='t')
+    limiter = RateLimiter([bucket])
+    bucket.take(1)
+    limiter.refund('t')
+    limiter.refund('t')
+    assert bucket.tokens == 2
+    limiter.refund('other')
+    assert bucket.tokens == 2
+
+
+def test_sync_adopts_the_platform_count(clock):
+    bucket = TokenBucket(5000, 3600, token='t')
+    limiter = RateLimiter([bucket], max_wait=5)
+    # Never raises the local count
+    limiter.sync('t', 6000, clock.time() + 3600)
+    assert bucket.tokens == 5000
+    limiter.sync('t', 10, clock.time() + 3600)
+    assert bucket.tokens == 10
+
+    limiter.sync('t', 0, clock.time() + 60)
+    assert bucket.blocked_until == pytest.approx(clock.now + 60)
+    assert bucket.wait_time(1, clock.now) == pytest.approx(60)
+    assert limiter.stats()['blocked_credentials'] == 1
+    with pytest.raises(RateLimited):
+        asyncio.run(limiter.acquire())
+
+    clock.now += 60
+    assert bucket.wait_time(1, clock.now) == 0
+    assert limiter.stats()['blocked_credentials'] == 0
+
+
+def test_scale_replaces_instead_of_compounding(clock):
+    limiter = RateLimiter([TokenBucket(60, 3600), TokenBucket(1, 10)])
+    limiter.scale(0.5)
+    limiter.scale(0.5)
+    assert [b.capacity for b in limiter.buckets] == [30, 1]
+    assert [b.rate for b in limiter.buckets] == pytest.approx([60 / 3600 / 2, 0.05])
+    assert [b.tokens for b in limiter.buckets] == [30, 1]
+    limiter.scale(1.0)
+    assert [b.capacity for b in limiter.buckets] == [60, 1]
+    assert [b.rate for b in limiter.buckets] == pytest.approx([60 / 3600, 0.1])
+
+
+def test_breaker_opens_then_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    clock.now += 30
+    assert breaker.state == 'half_open'
+    breaker.before_call()
+    # Only one trial at a time
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record_failure()
+    # A failed trial reopens for a full period
+    assert breaker.state == 'open'
+    clock.now += 29
+    assert breaker.state == 'open'
+
+    clock.now += 1
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.stats()['times_opened'] == 1
+    assert breaker.rejected == 2
+
+
+def guard(capacity: int = 10, **kwargs) -> UpstreamGuard:
+    return UpstreamGuard(
+        RateLimiter([TokenBucket(capacity, 10)], max_wait=0),
+        CircuitBreaker(failure_threshold=2, reset_seconds=30),
+        expected=(NotFound,), name='test', **kwargs,
+    )
+
+
+async def call(g: UpstreamGuard, error: BaseException = None):
+    async with g.call():
+        if error is not None:
+            raise error
+
+
+def test_expected_exceptions_count_as_success(clock):
+    g = guard()
+    with pytest.raises(RuntimeError):
+        asyncio.run(call(g, RuntimeError()))
+    assert g.breaker.failures == 1
+    with pytest.raises(NotFound):
+        asyncio.run(call(g, NotFound()))
+    assert g.breaker.failures == 0
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(call(g, RuntimeError()))
+    assert g.breaker.state == 'open'
+
+
+def half_open_guard(clock) -> UpstreamGuard:
+    g = guard()
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(call(g, RuntimeError()))
+    clock.now += 30
+    assert g.breaker.state == 'half_open'
+    return g
+
+
+@pytest.mark.parametrize("error", [RateLimited('platform limit'), asyncio.CancelledError()])
+def test_trial_is_released_when_the_platform_is_not_at_fault(clock, error):
+    g = half_open_guard(clock)
+    with pytest.raises(type(error)):
+        asyncio.run(call(g, error))
+    assert not g.breaker.trial_in_flight
+    assert g.breaker.failures == 2
+    asyncio.run(call(g))
+    assert g.breaker.state == 'closed'
+
+
+def test_trial_is_released_when_no_quota_is_left(clock):
+    g = half_open_guard(clock)
+    # The platform reports the quota exhausted for the next minute
+    g.limiter.sync(None, 0, clock.time() + 60)
+    with pytest.raises(RateLimited):
+        asyncio.run(call(g))
+    assert not g.breaker.trial_in_flight
+    assert g.breaker.state == 'half_open'
+
+
+def test_open_circuit_does_not_spend_quota(clock):
+    g = guard(capacity=3)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(call(g, RuntimeError()))
+    with pytest.raises(CircuitOpen):
+        asyncio.run(call(g))
+    assert g.limiter.buckets[0].tokens == 1
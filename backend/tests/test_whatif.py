@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app import whatif
+from app.predictor import COMPANY_TYPES, FEATURE_NAMES
+
+CGPA = FEATURE_NAMES.index('cgpa')
+
+
+def student(**values) -> np.ndarray:
+    base = dict(cgpa=7.0, leetcode_problems=50, codeforces_rating=1000, project_count=2, skills_count=4,
+                work_experience=0)
+    base.update(values)
+    return np.array([base[name] for name in FEATURE_NAMES], dtype=np.float64)
+
+
+def grid(**deltas):
+    return whatif.resolve_grid({name: deltas.get(name, [1.0]) for name in FEATURE_NAMES})
+
+
+def test_increases_are_measured_after_clipping():
+    base = student(cgpa=9.8)
+    steps, deltas, features = whatif.scenario_matrix(base, grid(cgpa=[0.1, 0.5, 1.0]))
+    assert np.array_equal(features[0], base)
+    np.testing.assert_allclose(deltas, features - base)
+    # +0.5 and +1.0 both clip to 10.0: one scenario, a 0.2 increase
+    assert sorted(np.unique(np.round(deltas[:, CGPA], 6))) == [0.0, 0.1, 0.2]
+
+
+def test_clipped_duplicates_are_dropped():
+    base = student(cgpa=10.0)
+    steps, deltas, features = whatif.scenario_matrix(base, grid(cgpa=[0.5, 1.0]))
+    assert len(np.unique(features, axis=0)) == len(features)
+    # CGPA cannot move, so it adds no scenarios
+    assert len(features) == 2 ** (len(FEATURE_NAMES) - 1)
+    assert not deltas[:, CGPA].any() and not steps[:, CGPA].any()
+
+
+def test_student_past_a_limit_is_not_lowered():
+    base = student(codeforces_rating=4100)
+    _, deltas, features = whatif.scenario_matrix(base, grid())
+    assert np.array_equal(features[0], base)
+    assert (deltas >= 0).all()
+
+
+def test_cost_and_curve_use_clipped_increase():
+    base = student(cgpa=9.8)
+    scenarios = whatif.scenario_matrix(base, grid(cgpa=[1.0]))
+    steps, deltas, features = scenarios
+    # Only the CGPA increase moves the student up a tier
+    tiers = np.where(deltas[:, CGPA] > 0, 1, 0)
+    company_probs = np.eye(len(COMPANY_TYPES))[tiers]
+    scores = 50 + 10 * tiers
+    costs = whatif.resolve_costs({})
+    result = whatif.analyse(base, scenarios, costs, scores, company_probs)
+
+    path = result['next_tier']
+    assert path['changes'] == {'cgpa': {'increase': 0.2, 'value': 10.0}}
+    assert path['cost'] == pytest.approx(0.2 * whatif.DEFAULT_COSTS['cgpa'])
+    assert result['features']['cgpa']['curve'][0]['increase'] == 0.2
+    assert result['scenarios'] == len(features)
@@ -52,6 +52,19 @@ export interface ApiPredictionResult {
   };
 }
 
+interface ResumeJob {
+  job_id: string;
+  resume_id: string;
+  status: 'queued' | 'running' | 'done' | 'failed';
+  result: {
+    score: number;
+    keywords: string[];
+    experience_years: number;
+    education: string;
+  } | null;
+  error: string | null;
+}
+
 class ApiService {
   private async makeRequest<T>(
     endpoint: string,
@@ -92,11 +105,26 @@ class ApiService {
     const formData = new FormData();
     formData.append('file', file);
 
-    return this.makeRequest('/api/upload-resume', {
+    // The backend parses resumes in the background; poll until the job is done
+    let job = await this.makeRequest<ResumeJob>('/api/upload-resume', {
       method: 'POST',
       body: formData,
       headers: {}, // Let browser set Content-Type for FormData
     });
+
+    const deadline = Date.now() + 60_000;
+    while (job.status === 'queued' || job.status === 'running') {
+      if (Date.now() > deadline) {
+        throw new Error('Resume analysis timed out');
+      }
+      await new Promise((resolve) => setTimeout(resolve, 500));
+      job = await this.makeRequest<ResumeJob>(`/api/resume-jobs/${job.job_id}`);
+    }
+
+    if (job.status !== 'done' || !job.result) {
+      throw new Error(job.error || 'Resume analysis failed');
+    }
+    return job.result;
   }
 
   async fetchPlatformData(profile: ApiUserProfile): Promise<{